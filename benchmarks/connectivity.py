@@ -0,0 +1,55 @@
+"""
+Benchmarks of sampling the connectivity and cell parameters of large
+projections and populations
+
+:copyright: Copyright 2010-2017 by the NineML Python team, see AUTHORS.
+:license: BSD-3, see LICENSE for details.
+"""
+from . import models
+
+
+class _ConnectivityBenchmarks(object):
+
+    timeout = 300
+    num_ranks = 4
+
+    def setup(self, size):
+        self.network = self.create(size)
+        self.projection = next(iter(self.network.projections))
+        self.partition = self.network.partition(self.num_ranks)
+
+    def time_connections(self, size):  # @UnusedVariable
+        for _ in self.projection.connections():
+            pass
+
+    def time_local_connections(self, size):  # @UnusedVariable
+        self.partition.local_connections(self.projection, 0, random_seed=1)
+
+    def peakmem_local_connections(self, size):  # @UnusedVariable
+        self.partition.local_connections(self.projection, 0, random_seed=1)
+
+    def time_parameter_arrays(self, size):  # @UnusedVariable
+        self.projection.pre.parameter_arrays()
+
+
+class ProbabilisticConnectivity(_ConnectivityBenchmarks):
+    """Probabilistic projections between populations of 'size' cells"""
+
+    params = [1000, 10000]
+    param_names = ['population_size']
+
+    def create(self, size):
+        return models.network(2, population_size=size, probability=0.01)
+
+
+class ExplicitConnectivity(_ConnectivityBenchmarks):
+    """
+    Explicit projections of 'size' connections between populations of 10000
+    cells
+    """
+
+    params = [10000, 1000000]
+    param_names = ['num_connections']
+
+    def create(self, size):
+        return models.network(2, population_size=10000, num_explicit=size)
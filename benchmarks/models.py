@@ -0,0 +1,271 @@
+"""
+Synthetic 9ML models whose size can be scaled to benchmark the hot paths of
+the library
+
+:copyright: Copyright 2010-2017 by the NineML Python team, see AUTHORS.
+:license: BSD-3, see LICENSE for details.
+"""
+from builtins import range
+import numpy
+import nineml.units as un
+from nineml.document import Document
+from nineml.abstraction import (
+    Dynamics, Regime, StateVariable, Parameter, OnCondition, OnEvent,
+    StateAssignment, OutputEvent, AnalogSendPort, AnalogReceivePort,
+    AnalogReducePort, EventSendPort, EventReceivePort)
+from nineml.abstraction.connectionrule import (
+    explicit_connection_rule, probabilistic_connection_rule)
+from nineml.user import (
+    DynamicsProperties, MultiDynamics, MultiDynamicsProperties, Population,
+    Projection, ConnectionRuleProperties, Network)
+from nineml.values import ArrayValue
+
+
+def dynamics(num_regimes=1, name='Cell'):
+    """
+    An adaptive integrate-and-fire style cell with 'num_regimes' regimes,
+    each with its own resting potential, which cycle from one to the next
+    when the cell spikes
+
+    Parameters
+    ----------
+    num_regimes : int
+        The number of regimes of the dynamics
+    name : str
+        The name of the dynamics
+    """
+    regimes = []
+    for i in range(num_regimes):
+        regimes.append(Regime(
+            'dv/dt = (e{} - v - w + R * I) / tau'.format(i),
+            'dw/dt = -w / tau_w',
+            on_conditions=[OnCondition(
+                'v > theta',
+                state_assignments=[StateAssignment('v', 'v_reset'),
+                                   StateAssignment('w', 'w + b')],
+                output_events=[OutputEvent('spike')],
+                target_regime_name='R{}'.format((i + 1) % num_regimes))],
+            on_events=[OnEvent(
+                'spike_in', state_assignments=[StateAssignment('w',
+                                                               'w - b')])],
+            name='R{}'.format(i)))
+    return Dynamics(
+        name=name,
+        state_variables=[StateVariable('v', dimension=un.voltage),
+                         StateVariable('w', dimension=un.voltage)],
+        regimes=regimes,
+        parameters=(
+            [Parameter('tau', dimension=un.time),
+             Parameter('tau_w', dimension=un.time),
+             Parameter('theta', dimension=un.voltage),
+             Parameter('v_reset', dimension=un.voltage),
+             Parameter('b', dimension=un.voltage),
+             Parameter('R', dimension=un.resistance)] +
+            [Parameter('e{}'.format(i), dimension=un.voltage)
+             for i in range(num_regimes)]),
+        analog_ports=[AnalogSendPort('v', dimension=un.voltage),
+                      AnalogReducePort('I', dimension=un.current,
+                                       operator='+')],
+        event_ports=[EventSendPort('spike'), EventReceivePort('spike_in')])
+
+
+def dynamics_properties(num_regimes=1, name='CellProps', definition=None):
+    """
+    Properties of the dynamics returned by 'dynamics' (or of 'definition' if
+    provided)
+    """
+    if definition is None:
+        definition = dynamics(num_regimes)
+    properties = {'tau': 20.0 * un.ms, 'tau_w': 100.0 * un.ms,
+                  'theta': -50.0 * un.mV, 'v_reset': -70.0 * un.mV,
+                  'b': 2.0 * un.mV, 'R': 100.0 * un.Mohm}
+    properties.update(('e{}'.format(i), (-65.0 + i) * un.mV)
+                      for i in range(num_regimes))
+    return DynamicsProperties(
+        name=name, definition=definition, properties=properties,
+        initial_values={'v': -65.0 * un.mV, 'w': 0.0 * un.mV})
+
+
+def synapse(name='Synapse'):
+    """
+    An exponentially decaying current triggered by incoming spikes
+    """
+    return Dynamics(
+        name=name,
+        state_variables=[StateVariable('I', dimension=un.current)],
+        regimes=[Regime(
+            'dI/dt = -I / tau_syn',
+            on_events=[OnEvent('spike', state_assignments=[
+                StateAssignment('I', 'I + weight')])],
+            name='R0')],
+        parameters=[Parameter('tau_syn', dimension=un.time),
+                    Parameter('weight', dimension=un.current)],
+        analog_ports=[AnalogSendPort('I', dimension=un.current)],
+        event_ports=[EventReceivePort('spike')])
+
+
+def synapse_properties(name='SynapseProps', definition=None):
+    if definition is None:
+        definition = synapse()
+    return DynamicsProperties(
+        name=name, definition=definition,
+        properties={'tau_syn': 5.0 * un.ms, 'weight': 0.1 * un.nA},
+        initial_values={'I': 0.0 * un.nA})
+
+
+def compartment(name='Compartment'):
+    """
+    A leaky compartment whose voltage relaxes towards that of a receive port
+    """
+    return Dynamics(
+        name=name,
+        state_variables=[StateVariable('v', dimension=un.voltage)],
+        regimes=[Regime(
+            'dv/dt = (v_in - v) / tau',
+            on_conditions=[OnCondition(
+                'v > theta', state_assignments=[StateAssignment('v',
+                                                                'v_reset')],
+                output_events=[OutputEvent('spike')])],
+            name='R0')],
+        parameters=[Parameter('tau', dimension=un.time),
+                    Parameter('theta', dimension=un.voltage),
+                    Parameter('v_reset', dimension=un.voltage)],
+        analog_ports=[AnalogSendPort('v', dimension=un.voltage),
+                      AnalogReceivePort('v_in', dimension=un.voltage)],
+        event_ports=[EventSendPort('spike')])
+
+
+def _chain(num_sub_components):
+    """
+    The names, port connections and port exposures of a chain of
+    compartments
+    """
+    names = ['c{}'.format(i) for i in range(num_sub_components)]
+    port_connections = [(pre, 'v', post, 'v_in')
+                        for pre, post in zip(names[:-1], names[1:])]
+    port_exposures = [(names[0], 'v_in'), (names[-1], 'v'),
+                      (names[-1], 'spike')]
+    return names, port_connections, port_exposures
+
+
+def multi_dynamics(num_sub_components=2, name='MultiCell'):
+    """
+    A chain of 'num_sub_components' compartments, where the voltage of each
+    compartment drives the next through a receive port (the first is driven
+    by an exposed receive port)
+
+    Parameters
+    ----------
+    num_sub_components : int
+        The number of sub-components in the chain
+    name : str
+        The name of the multi-dynamics
+    """
+    names, port_connections, port_exposures = _chain(num_sub_components)
+    return MultiDynamics(
+        name=name,
+        sub_components=dict((n, compartment()) for n in names),
+        port_connections=port_connections, port_exposures=port_exposures)
+
+
+def multi_dynamics_properties(num_sub_components=2, name='MultiCellProps'):
+    """
+    Properties of a chain of 'num_sub_components' compartments (see
+    'multi_dynamics')
+    """
+    names, port_connections, port_exposures = _chain(num_sub_components)
+    return MultiDynamicsProperties(
+        name=name,
+        sub_components=dict(
+            (n, DynamicsProperties(
+                name='CompartmentProps', definition=compartment(),
+                properties={'tau': 10.0 * un.ms, 'theta': -50.0 * un.mV,
+                            'v_reset': -70.0 * un.mV},
+                initial_values={'v': -65.0 * un.mV})) for n in names),
+        port_connections=port_connections, port_exposures=port_exposures)
+
+
+def network(num_populations=2, population_size=100, probability=0.1,
+            num_explicit=0, random_seed=1, name='Net'):
+    """
+    A network of 'num_populations' populations of 'population_size' cells,
+    where each population projects onto the next with either a probabilistic
+    connection rule or, if 'num_explicit' is non-zero, an explicit list of
+    that many randomly generated connections
+
+    Parameters
+    ----------
+    num_populations : int
+        The number of populations in the network
+    population_size : int
+        The number of cells in each population
+    probability : float
+        The connection probability of probabilistic projections
+    num_explicit : int
+        The number of connections of explicit projections (probabilistic
+        projections are used if 0)
+    random_seed : int
+        The seed used to generate the explicit connections
+    name : str
+        The name of the network
+    """
+    rng = numpy.random.default_rng(random_seed)
+    # The standard library connection rule is cloned so it isn't bound to
+    # the documents the networks are written to
+    if num_explicit:
+        rule = explicit_connection_rule.clone()
+    else:
+        rule = probabilistic_connection_rule.clone()
+    cell = dynamics_properties()
+    response = synapse_properties()
+    populations = [Population('Pop{}'.format(i), population_size, cell)
+                   for i in range(num_populations)]
+    projections = []
+    for i, (pre, post) in enumerate(zip(
+            populations, populations[1:] + populations[:1])):
+        if num_explicit:
+            rule_props = ConnectionRuleProperties(
+                name='Explicit{}'.format(i),
+                definition=rule,
+                properties={
+                    'sourceIndices': ArrayValue(rng.integers(
+                        0, population_size, num_explicit)),
+                    'destinationIndices': ArrayValue(rng.integers(
+                        0, population_size, num_explicit))})
+        else:
+            rule_props = ConnectionRuleProperties(
+                name='Probabilistic{}'.format(i),
+                definition=rule,
+                properties={'probability': probability})
+        projections.append(Projection(
+            'Proj{}'.format(i), pre=pre, post=post, response=response,
+            delay=1.0 * un.ms, connection_rule_properties=rule_props,
+            port_connections=[('pre', 'spike', 'response', 'spike'),
+                              ('response', 'I', 'post', 'I')]))
+    return Network(name, populations=populations, projections=projections)
+
+
+def document(num_elements=100):
+    """
+    A document containing 'num_elements' independent dynamics and dynamics
+    properties (half of each)
+    """
+    elements = []
+    for i in range(num_elements // 2):
+        definition = dynamics(name='Cell{}'.format(i))
+        elements.append(definition)
+        elements.append(dynamics_properties(name='CellProps{}'.format(i),
+                                            definition=definition))
+    return Document(*elements)
+
+
+def unit_library(num_elements=50000):
+    """
+    A document containing 'num_elements' units (and the dimension they
+    share), which are cheap to serialize so the cost of the per-element
+    bookkeeping of the document dominates
+    """
+    time = un.Dimension('time', t=1)
+    return Document(time, *(
+        un.Unit('u{}'.format(i), time, power=i % 7 - 3, offset=float(i))
+        for i in range(num_elements)))
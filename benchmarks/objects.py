@@ -0,0 +1,95 @@
+"""
+Benchmarks of cloning, validating, comparing, hashing and flattening models
+of increasing size
+
+:copyright: Copyright 2010-2017 by the NineML Python team, see AUTHORS.
+:license: BSD-3, see LICENSE for details.
+"""
+from . import models
+
+
+class _ObjectBenchmarks(object):
+
+    timeout = 300
+
+    def setup(self, size):
+        self.obj = self.create(size)
+        self.other = self.create(size)
+
+    def time_clone(self, size):  # @UnusedVariable
+        self.obj.clone()
+
+    def peakmem_clone(self, size):  # @UnusedVariable
+        self.obj.clone()
+
+    def time_equality(self, size):  # @UnusedVariable
+        self.obj.equals(self.other)
+
+
+class _ComponentBenchmarks(_ObjectBenchmarks):
+
+    def time_hash(self, size):  # @UnusedVariable
+        hash(self.obj)
+
+
+class DynamicsBenchmarks(_ComponentBenchmarks):
+    """Dynamics with 'size' regimes"""
+
+    params = [1, 10, 100]
+    param_names = ['num_regimes']
+
+    def create(self, size):
+        return models.dynamics(size)
+
+    def time_validate(self, size):  # @UnusedVariable
+        self.obj.validate()
+
+
+class MultiDynamicsBenchmarks(_ComponentBenchmarks):
+    """MultiDynamics with 'size' sub-components"""
+
+    params = [2, 8, 32]
+    param_names = ['num_sub_components']
+
+    def create(self, size):
+        return models.multi_dynamics(size)
+
+    def time_validate(self, size):  # @UnusedVariable
+        self.obj.validate()
+
+    def time_flatten(self, size):  # @UnusedVariable
+        self.obj.flatten()
+
+    def peakmem_flatten(self, size):  # @UnusedVariable
+        self.obj.flatten()
+
+
+class NetworkBenchmarks(_ComponentBenchmarks):
+    """Networks with 'size' populations"""
+
+    params = [2, 10, 50]
+    param_names = ['num_populations']
+
+    def create(self, size):
+        return models.network(size)
+
+    def time_flatten(self, size):  # @UnusedVariable
+        self.obj.flatten()
+
+    def peakmem_flatten(self, size):  # @UnusedVariable
+        self.obj.flatten()
+
+
+class DocumentBenchmarks(_ObjectBenchmarks):
+    """Documents containing 'size' dynamics and dynamics properties"""
+
+    params = [100, 1000]
+    param_names = ['num_elements']
+
+    def create(self, size):
+        return models.document(size)
+
+    def time_equality(self, size):  # @UnusedVariable
+        # Documents only compare their own attributes so compare each element
+        for name, element in self.obj.items():
+            element.equals(self.other[name])
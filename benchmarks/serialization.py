@@ -0,0 +1,86 @@
+"""
+Benchmarks of reading and writing documents of increasing size in each
+serialization format
+
+:copyright: Copyright 2010-2017 by the NineML Python team, see AUTHORS.
+:license: BSD-3, see LICENSE for details.
+"""
+import os.path
+import shutil
+import tempfile
+import nineml
+from nineml.serialization import format_to_serializer
+from . import models
+
+
+format_to_ext = {'xml': '.xml', 'yaml': '.yml', 'json': '.json',
+                 'hdf5': '.h5'}
+
+
+class _SerializationBenchmarks(object):
+
+    param_names = ['format', 'size']
+    timeout = 300
+
+    def setup(self, format, size):  # @ReservedAssignment
+        if format_to_serializer[format] is None:
+            # Skips the benchmark as the serializer's dependencies aren't
+            # installed
+            raise NotImplementedError(
+                "'{}' serializer is not available".format(format))
+        self.tmp_dir = tempfile.mkdtemp()
+        # Separate files are written and read as the documents read from
+        # some formats (e.g. HDF5) keep their file open
+        self.url = os.path.join(self.tmp_dir, 'read' + format_to_ext[format])
+        self.write_url = os.path.join(self.tmp_dir,
+                                      'write' + format_to_ext[format])
+        nineml.write(self.url, self.create_document(size), format=format)
+        self.document = self.create_document(size)
+
+    def teardown(self, format, size):  # @ReservedAssignment @UnusedVariable
+        shutil.rmtree(self.tmp_dir)
+
+    def time_write(self, format, size):  # @ReservedAssignment @UnusedVariable
+        nineml.write(self.write_url, self.document, format=format)
+
+    def peakmem_write(self, format, size):  # @ReservedAssignment @UnusedVariable @IgnorePep8
+        nineml.write(self.write_url, self.document, format=format)
+
+    def time_read(self, format, size):  # @ReservedAssignment @UnusedVariable
+        nineml.read(self.url, reload=True)
+
+    def peakmem_read(self, format, size):  # @ReservedAssignment @UnusedVariable @IgnorePep8
+        nineml.read(self.url, reload=True)
+
+
+class DocumentSerialization(_SerializationBenchmarks):
+    """Documents containing 'size' dynamics and dynamics properties"""
+
+    params = [list(format_to_ext), [100, 1000]]
+
+    def create_document(self, size):
+        return models.document(size)
+
+
+class LargeDocumentSerialization(_SerializationBenchmarks):
+    """
+    Documents containing 'size' units, which guard against the cost of
+    loading each element growing with the size of the document
+    """
+
+    params = [['xml', 'yaml', 'json'], [50000]]
+
+    def create_document(self, size):
+        return models.unit_library(size)
+
+
+class NetworkSerialization(_SerializationBenchmarks):
+    """
+    Networks with 'size' populations and explicit projections of 1000
+    connections between them
+    """
+
+    params = [list(format_to_ext), [2, 20]]
+
+    def create_document(self, size):
+        return nineml.Document(models.network(size, num_explicit=1000))
@@ -13,7 +13,7 @@ from .document import Document  # @IgnorePep8
 from . import abstraction  # @IgnorePep8
 from . import user  # @IgnorePep8
 from . import exceptions  # @IgnorePep8
-from .units import Unit, Dimension, Quantity  # @IgnorePep8
+from .units import Unit, Dimension, Quantity, QuantityArray  # @IgnorePep8
 from .abstraction import (  # @IgnorePep8
     Dynamics, ConnectionRule, RandomDistribution)
 from .user import (  # @IgnorePep8
@@ -23,6 +23,7 @@ from .user import (  # @IgnorePep8
     MultiDynamicsProperties, Concatenate, ComponentArray, EventConnectionGroup,
     AnalogConnectionGroup)
 from .values import SingleValue, ArrayValue, RandomDistributionValue  # @IgnorePep8
-from .serialization import read, write, serialize, unserialize  # @IgnorePep8
+from .serialization import (  # @IgnorePep8
+    read, write, serialize, unserialize, DocumentPool, UrlCache)
 from .reference import Reference  # @IgnorePep8
 from .annotations import Annotations  # @IgnorePep8
@@ -23,3 +23,4 @@ from .ports import (AnalogSendPort, AnalogReceivePort,
                     EventReceivePort, AnalogPort, EventPort, Port)
 from .connectionrule import ConnectionRule
 from .randomdistribution import RandomDistribution
+from .store import ComponentClassStore
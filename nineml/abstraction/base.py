@@ -9,6 +9,8 @@ class BaseALObject(AnnotatedNineMLObject):
     """
     Base class for abstraction layer classes
     """
+    __slots__ = ()
+
     layer = 'abstraction'
 
 
@@ -20,6 +22,8 @@ class Parameter(BaseALObject):
     future, wrapping in into its own object may make the transition easier
     """
 
+    __slots__ = ('_annotations', '_name', '_dimension')
+
     nineml_type = 'Parameter'
     nineml_attr = ('name',)
     nineml_child = {'dimension': Dimension}
@@ -231,8 +231,8 @@ class Dynamics(ComponentClass, DynamicPortsObject):
     def validate(self, validate_dimensions=None, **kwargs):
         if validate_dimensions is None:
             validate_dimensions = (
-                self.annotations.get((VALIDATION, PY9ML_NS), DIMENSIONALITY,
-                                     default='True') == 'True')
+                self.get_annotation((VALIDATION, PY9ML_NS), DIMENSIONALITY,
+                                    default='True') == 'True')
         DynamicsValidator.validate_componentclass(self, validate_dimensions,
                                                   **kwargs)
 
@@ -257,6 +257,37 @@ class Dynamics(ComponentClass, DynamicPortsObject):
         """
         return DynamicsIsLinear().is_linear(self, outputs=outputs)
 
+    def evaluation_plan(self, regime_name, include=None, **kwargs):
+        """
+        Returns an evaluation plan for the expressions evaluated within the
+        given regime, in which subexpressions shared between the expressions
+        are evaluated once into temporaries (see EvaluationPlan.from_regime)
+
+        Parameters
+        ----------
+        regime_name : str
+            Name of the regime to create the plan for
+        include : list(str) | None
+            The types of expressions to include in the plan ('Alias',
+            'TimeDerivative', 'Trigger' and/or 'StateAssignment'). If None,
+            all types are included
+        """
+        return EvaluationPlan.from_regime(self, regime_name, include=include,
+                                          **kwargs)
+
+    def trigger_analysis(self, regime_name):
+        """
+        Classifies the triggers of the on-conditions in the given regime into
+        threshold, time-based and general triggers, and provides vectorised
+        detection of their crossings (see TriggerAnalysis)
+
+        Parameters
+        ----------
+        regime_name : str
+            Name of the regime to analyse the triggers of
+        """
+        return TriggerAnalysis.from_regime(self, regime_name)
+
     def is_flat(self):
         return True
 
@@ -540,3 +571,5 @@ from .visitors.queriers import (DynamicsRequiredDefinitions,  # @IgnorePep8
                                 DynamicsInterfaceInferer)
 from .visitors.modifiers import (  # @IgnorePep8
     DynamicsRenameSymbol, DynamicsSubstituteAliases)
+from .evaluation import EvaluationPlan  # @IgnorePep8
+from .triggers import TriggerAnalysis  # @IgnorePep8
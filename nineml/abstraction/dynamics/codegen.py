@@ -0,0 +1,561 @@
+"""
+Generates self-contained C kernels from Dynamics classes, which update the
+state of a whole population of cells in a single call, and compiles/loads them
+via ctypes.
+
+:copyright: Copyright 2010-2017 by the NineML Python team, see AUTHORS.
+:license: BSD-3, see LICENSE for details.
+"""
+from builtins import object
+from collections import OrderedDict
+import os
+import sys
+import ctypes
+import hashlib
+import tempfile
+import subprocess
+import sympy
+from sympy.printing import ccode
+from sympy.logic.boolalg import BooleanTrue, BooleanFalse
+import numpy
+from nineml.abstraction.expressions import Expression, t
+from .evaluation import EvaluationPlan
+from nineml.exceptions import NineMLCodeGenerationError, NineMLNameError
+
+
+class DynamicsCCodeGenerator(object):
+    """
+    Generates a self-contained C source file that updates the state of a
+    population of instances of a Dynamics class.
+
+    The state of the population is laid out as a struct-of-arrays, i.e. a
+    struct containing one pointer to a contiguous array of length 'size' for
+    each state variable, parameter, analog input, alias-valued analog output
+    and event port, plus an integer array holding the index of the current
+    regime of each instance. A static step function is generated for each
+    regime, which integrates the time derivatives of the regime (forward
+    Euler), checks the triggers of its on-conditions and applies the state
+    assignments, output events and regime changes of the first trigger that
+    has become true during the step (i.e. triggers are edge-triggered, they
+    are evaluated before and after the integration step and only fire if
+    they were false before it). Incoming events are handled before the
+    integration step. The
+    exported '<name>_update' function loops over the population and dispatches
+    to the step function of the current regime of each instance.
+
+    Values are used in the units that they are provided in, which for
+    constants are the units they are declared in.
+
+    Parameters
+    ----------
+    dynamics : Dynamics
+        The dynamics class to generate the kernel for. MultiDynamics objects
+        are flattened first.
+    name : str | None
+        The prefix used for the generated struct and functions. If None the
+        name of the dynamics class is used.
+    """
+
+    state_prefix = 'sv_'
+    parameter_prefix = 'p_'
+    input_prefix = 'in_'
+    output_prefix = 'out_'
+    constant_prefix = 'c_'
+    event_in_prefix = 'evin_'
+    event_out_prefix = 'evout_'
+    _t_next = sympy.Symbol('t_next')
+
+    def __init__(self, dynamics, name=None):
+        if dynamics.is_random:
+            raise NineMLCodeGenerationError(
+                "Cannot generate C kernel for '{}' as it contains random "
+                "distributions in its state assignments"
+                .format(dynamics.name))
+        self._dynamics = dynamics.flatten().substitute_aliases()
+        self._name = name if name is not None else self._dynamics.name
+        dyn = self._dynamics
+        self.state_variable_names = sorted(dyn.state_variable_names)
+        self.parameter_names = sorted(dyn.parameter_names)
+        self.constant_names = sorted(dyn.constant_names)
+        self.input_names = sorted(list(dyn.analog_receive_port_names) +
+                                  list(dyn.analog_reduce_port_names))
+        self.output_names = sorted(
+            n for n in dyn.analog_send_port_names
+            if n not in self.state_variable_names)
+        self.event_receive_port_names = sorted(dyn.event_receive_port_names)
+        self.event_send_port_names = sorted(dyn.event_send_port_names)
+        self.regime_names = sorted(dyn.regime_names)
+        self._symbol_map = dict(
+            [(sympy.Symbol(n), sympy.Symbol(self.state_prefix + n))
+             for n in self.state_variable_names] +
+            [(sympy.Symbol(n), sympy.Symbol(self.parameter_prefix + n))
+             for n in self.parameter_names] +
+            [(sympy.Symbol(n), sympy.Symbol(self.input_prefix + n))
+             for n in self.input_names] +
+            [(sympy.Symbol(n), sympy.Symbol(self.constant_prefix + n))
+             for n in self.constant_names])
+        self._source = None
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def dynamics(self):
+        return self._dynamics
+
+    @property
+    def struct_name(self):
+        return self.name + '_state_t'
+
+    @property
+    def update_function_name(self):
+        return self.name + '_update'
+
+    def regime_index(self, name):
+        try:
+            return self.regime_names.index(name)
+        except ValueError:
+            raise NineMLNameError(
+                "No regime named '{}' in '{}'".format(name, self.name))
+
+    @property
+    def struct_fields(self):
+        """
+        The fields of the state struct as a list of (name, C-type) tuples,
+        in the order they are declared in the generated source
+        """
+        return (
+            [('regime', 'int')] +
+            [(self.state_prefix + n, 'double')
+             for n in self.state_variable_names] +
+            [(self.parameter_prefix + n, 'double')
+             for n in self.parameter_names] +
+            [(self.input_prefix + n, 'double') for n in self.input_names] +
+            [(self.output_prefix + n, 'double') for n in self.output_names] +
+            [(self.event_in_prefix + n, 'int')
+             for n in self.event_receive_port_names] +
+            [(self.event_out_prefix + n, 'int')
+             for n in self.event_send_port_names])
+
+    @property
+    def source(self):
+        """The generated C source code"""
+        if self._source is None:
+            self._source = self._generate()
+        return self._source
+
+    def cexpr(self, expr, after_step=False):
+        """
+        Converts a sympy expression (or Expression object) to a C expression
+        string in terms of the local variables of the generated functions
+
+        Parameters
+        ----------
+        expr : sympy.Basic | Expression
+            The expression to convert
+        after_step : bool
+            Whether the expression is evaluated after the integration step,
+            in which case references to 't' are mapped to the end of the step
+        """
+        if isinstance(expr, Expression):
+            expr = expr.rhs
+        expr = sympy.sympify(expr)
+        if isinstance(expr, BooleanTrue):
+            return '1'
+        elif isinstance(expr, BooleanFalse):
+            return '0'
+        symbol_map = dict(self._symbol_map)
+        if after_step:
+            symbol_map[t] = self._t_next
+        expr = Expression.expand_integer_powers(expr.xreplace(symbol_map))
+        cstr = ccode(expr, user_functions=Expression._cfunc_map)
+        if 'Not supported in C' in cstr:
+            raise NineMLCodeGenerationError(
+                "Could not convert '{}' to C in '{}':\n{}"
+                .format(expr, self.name, cstr))
+        cstr = Expression.strip_L_from_rationals(cstr)
+        return Expression._multiple_whitespace_re.sub(' ', cstr)
+
+    def _generate(self):
+        lines = [
+            '/* C kernel generated by the NineML Python library for the',
+            " * '{}' Dynamics class. */".format(self._dynamics.name),
+            '#include <math.h>',
+            '#include <stddef.h>',
+            '',
+            'typedef struct {']
+        lines.extend('    {} *{};'.format(ctype, field)
+                     for field, ctype in self.struct_fields)
+        lines.append('}} {};'.format(self.struct_name))
+        lines.append('')
+        for const_name in self.constant_names:
+            lines.append('static const double {}{} = {!r};'.format(
+                self.constant_prefix, const_name,
+                float(self._dynamics.constant(const_name).value)))
+        if self.constant_names:
+            lines.append('')
+        for regime_name in self.regime_names:
+            lines.extend(self._regime_functions(regime_name))
+            lines.append('')
+        lines.extend(self._update_function())
+        return '\n'.join(lines) + '\n'
+
+    def _load_lines(self, indent):
+        lines = []
+        for name in self.state_variable_names:
+            lines.append('{}double {p}{n} = s->{p}{n}[i];'.format(
+                indent, p=self.state_prefix, n=name))
+        for name in self.parameter_names:
+            lines.append('{}const double {p}{n} = s->{p}{n}[i];'.format(
+                indent, p=self.parameter_prefix, n=name))
+        for name in self.input_names:
+            lines.append('{}const double {p}{n} = s->{p}{n}[i];'.format(
+                indent, p=self.input_prefix, n=name))
+        return lines
+
+    def _store_lines(self, indent):
+        return ['{}s->{p}{n}[i] = {p}{n};'.format(indent, p=self.state_prefix,
+                                                   n=name)
+                for name in self.state_variable_names]
+
+    def _transition_lines(self, transition, indent, after_step):
+        lines = []
+        assignments = sorted(transition.state_assignments,
+                             key=lambda a: a.variable)
+        # All right-hand-sides are evaluated before any of the state variables
+        # are assigned
+        for assignment in assignments:
+            lines.append('{}const double new_{} = {};'.format(
+                indent, assignment.variable,
+                self.cexpr(assignment, after_step=after_step)))
+        for assignment in assignments:
+            lines.append('{i}{p}{n} = new_{n};'.format(
+                i=indent, p=self.state_prefix, n=assignment.variable))
+        for port_name in sorted(transition.output_event_port_names):
+            lines.append('{}s->{}{}[i] = 1;'.format(
+                indent, self.event_out_prefix, port_name))
+        if transition.target_regime_name is not None:
+            lines.append('{}s->regime[i] = {};'.format(
+                indent, self.regime_index(transition.target_regime_name)))
+        return lines
+
+    def _temporary_lines(self, plan, indent, after_step=False):
+        return ['{}const double {} = {};'.format(
+            indent, sym, self.cexpr(expr, after_step=after_step))
+            for sym, expr in plan.temporaries]
+
+    def _regime_functions(self, regime_name):
+        regime = self._dynamics.regime(regime_name)
+        lines = []
+        signature = ('static void {}_{{}}_{}({} *s, size_t i, double t{{}})'
+                     .format(self.name, regime_name, self.struct_name))
+        # Handle incoming events
+        if self.event_receive_port_names:
+            lines.append(signature.format('receive', ''))
+            lines.append('{')
+            lines.extend(self._load_lines('    '))
+            for on_event in sorted(regime.on_events,
+                                   key=lambda e: e.src_port_name):
+                lines.append('    if (s->{}{}[i]) {{'.format(
+                    self.event_in_prefix, on_event.src_port_name))
+                lines.extend(self._transition_lines(on_event, '        ',
+                                                    after_step=False))
+                lines.append('    }')
+            lines.extend(self._store_lines('    '))
+            lines.append('}')
+            lines.append('')
+        # Integrate time derivatives and check triggers
+        lines.append(signature.format('step', ', double dt'))
+        lines.append('{')
+        lines.extend(self._load_lines('    '))
+        lines.append('    const double t_next = t + dt;')
+        # Subexpressions shared between the time derivatives (and between
+        # the triggers) are evaluated once into temporaries
+        td_plan = EvaluationPlan(
+            ((td.variable, td.rhs) for td in sorted(
+                regime.time_derivatives, key=lambda td: td.variable)),
+            temporary_prefix='dcse_')
+        lines.extend(self._temporary_lines(td_plan, '    '))
+        for variable, rhs in td_plan.outputs.items():
+            lines.append('    const double d_{} = {};'.format(
+                variable, self.cexpr(rhs)))
+        # Triggers only fire on the transition from false to true, so their
+        # values are recorded before the state variables are updated
+        on_conditions = sorted(regime.on_conditions,
+                               key=lambda oc: oc.sort_key)
+        pre_trigger_plan = EvaluationPlan(
+            ((oc.sort_key, oc.trigger.rhs) for oc in on_conditions),
+            temporary_prefix='pcse_')
+        lines.extend(self._temporary_lines(pre_trigger_plan, '    '))
+        for index, on_condition in enumerate(on_conditions):
+            lines.append('    const int was_triggered_{} = ({});'.format(
+                index, self.cexpr(
+                    pre_trigger_plan.outputs[on_condition.sort_key])))
+        for variable in td_plan.outputs:
+            lines.append('    {p}{n} += dt * d_{n};'.format(
+                p=self.state_prefix, n=variable))
+        trigger_plan = EvaluationPlan(
+            ((oc.sort_key, oc.trigger.rhs) for oc in on_conditions),
+            temporary_prefix='tcse_')
+        lines.extend(self._temporary_lines(trigger_plan, '    ',
+                                           after_step=True))
+        keyword = 'if'
+        for index, on_condition in enumerate(on_conditions):
+            lines.append('    {} (!was_triggered_{} && ({})) {{'.format(
+                keyword, index, self.cexpr(
+                    trigger_plan.outputs[on_condition.sort_key],
+                    after_step=True)))
+            lines.extend(self._transition_lines(on_condition, '        ',
+                                                after_step=True))
+            lines.append('    }')
+            keyword = 'else if'
+        for name in self.output_names:
+            try:
+                alias = regime.alias(name)
+            except NineMLNameError:
+                alias = self._dynamics.alias(name)
+            lines.append('    s->{}{}[i] = {};'.format(
+                self.output_prefix, name, self.cexpr(alias, after_step=True)))
+        lines.extend(self._store_lines('    '))
+        lines.append('    (void)t_next;')
+        lines.append('}')
+        return lines
+
+    def _update_function(self):
+        lines = [
+            'void {}({} *s, size_t n, double t, double dt)'.format(
+                self.update_function_name, self.struct_name),
+            '{',
+            '    size_t i;',
+            '    for (i = 0; i < n; ++i) {']
+        for port_name in self.event_send_port_names:
+            lines.append('        s->{}{}[i] = 0;'.format(
+                self.event_out_prefix, port_name))
+        if self.event_receive_port_names:
+            lines.append('        switch (s->regime[i]) {')
+            for index, regime_name in enumerate(self.regime_names):
+                lines.append('            case {}: {}_receive_{}(s, i, t); '
+                             'break;'.format(index, self.name, regime_name))
+            lines.append('        }')
+            for port_name in self.event_receive_port_names:
+                lines.append('        s->{}{}[i] = 0;'.format(
+                    self.event_in_prefix, port_name))
+        lines.append('        switch (s->regime[i]) {')
+        for index, regime_name in enumerate(self.regime_names):
+            lines.append('            case {}: {}_step_{}(s, i, t, dt); '
+                         'break;'.format(index, self.name, regime_name))
+        lines.extend([
+            '        }',
+            '    }',
+            '}'])
+        return lines
+
+
+class CompiledDynamics(object):
+    """
+    A Dynamics class compiled into a native update kernel, which is loaded via
+    ctypes. Compiled libraries are cached on disk, keyed by a hash of the
+    generated source, the compiler and the compiler flags, so that
+    equivalent classes are only compiled once.
+
+    Parameters
+    ----------
+    dynamics : Dynamics
+        The dynamics class to compile
+    cache_dir : str | None
+        The directory in which compiled kernels are cached. If None, the
+        'NINEML_KERNEL_CACHE' environment variable is used if set, otherwise
+        a 'nineml_kernels' directory in the temporary directory.
+    compiler : str | None
+        The C compiler to use. If None, the 'CC' environment variable is used
+        if set, otherwise 'cc'.
+    cflags : list(str) | None
+        The flags passed to the compiler. If None 'default_cflags' is used.
+    """
+
+    default_cflags = ('-O3', '-std=c99', '-fPIC', '-shared')
+    _loaded = {}  # Libraries already loaded in this process by path
+
+    def __init__(self, dynamics, cache_dir=None, compiler=None, cflags=None):
+        self._generator = DynamicsCCodeGenerator(dynamics)
+        if cache_dir is None:
+            cache_dir = os.environ.get(
+                'NINEML_KERNEL_CACHE',
+                os.path.join(tempfile.gettempdir(), 'nineml_kernels'))
+        if compiler is None:
+            compiler = os.environ.get('CC', 'cc')
+        if cflags is None:
+            cflags = self.default_cflags
+        self._cache_dir = cache_dir
+        self._compiler = compiler
+        self._cflags = list(cflags)
+        source = self._generator.source
+        digest = hashlib.sha1(
+            '\n'.join([source, compiler, ' '.join(self._cflags),
+                       sys.platform]).encode('utf-8')).hexdigest()
+        basename = '{}_{}'.format(self._generator.name, digest[:16])
+        self._source_path = os.path.join(cache_dir, basename + '.c')
+        self._library_path = os.path.join(cache_dir, basename + '.so')
+        self._from_cache = os.path.exists(self._library_path)
+        if not self._from_cache:
+            self._compile(source)
+        try:
+            library = self._loaded[self._library_path]
+        except KeyError:
+            library = self._loaded[self._library_path] = ctypes.CDLL(
+                self._library_path)
+        self._struct_cls = type(
+            str(self._generator.struct_name), (ctypes.Structure,),
+            {'_fields_': [
+                (str(f), ctypes.POINTER(ctypes.c_double if c == 'double'
+                                        else ctypes.c_int))
+                for f, c in self._generator.struct_fields]})
+        self._update = getattr(library, self._generator.update_function_name)
+        self._update.argtypes = [ctypes.POINTER(self._struct_cls),
+                                 ctypes.c_size_t, ctypes.c_double,
+                                 ctypes.c_double]
+        self._update.restype = None
+
+    @property
+    def generator(self):
+        return self._generator
+
+    @property
+    def source(self):
+        return self._generator.source
+
+    @property
+    def library_path(self):
+        return self._library_path
+
+    @property
+    def from_cache(self):
+        """Whether the kernel was loaded from the cache without compiling"""
+        return self._from_cache
+
+    def _compile(self, source):
+        if not os.path.exists(self._cache_dir):
+            try:
+                os.makedirs(self._cache_dir)
+            except OSError:
+                if not os.path.isdir(self._cache_dir):
+                    raise
+        # Write to temporary paths first and then rename them so that
+        # concurrent builds of the same kernel don't clobber each other
+        tmp_suffix = '.{}.tmp'.format(os.getpid())
+        with open(self._source_path + tmp_suffix, 'w') as f:
+            f.write(source)
+        os.rename(self._source_path + tmp_suffix, self._source_path)
+        cmd = ([self._compiler] + self._cflags +
+               ['-o', self._library_path + tmp_suffix, self._source_path,
+                '-lm'])
+        try:
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE)
+        except OSError as e:
+            raise NineMLCodeGenerationError(
+                "Could not run C compiler '{}' ({})".format(self._compiler,
+                                                            e))
+        _, stderr = process.communicate()
+        if process.returncode:
+            raise NineMLCodeGenerationError(
+                "Compilation of '{}' failed ('{}'):\n{}".format(
+                    self._source_path, ' '.join(cmd),
+                    stderr.decode('utf-8', 'replace')))
+        os.rename(self._library_path + tmp_suffix, self._library_path)
+
+    def regime_index(self, name):
+        return self._generator.regime_index(name)
+
+    def state(self, size, regime=None):
+        """
+        Allocates the arrays holding the state of a population of instances
+        of the dynamics class
+
+        Parameters
+        ----------
+        size : int
+            The number of instances in the population
+        regime : str | None
+            The name of the initial regime of the instances. If None, the
+            first regime (alphabetically) is used
+        """
+        state = DynamicsKernelState(self._generator, size)
+        if regime is not None:
+            state.regime[:] = self.regime_index(regime)
+        return state
+
+    def update(self, state, t, dt):
+        """
+        Advances the state of every instance in the population from t to t + dt
+
+        Parameters
+        ----------
+        state : DynamicsKernelState
+            The state of the population (as returned by the 'state' method),
+            which is updated in place
+        t : float
+            The time at the start of the step
+        dt : float
+            The time step
+        """
+        self._update(ctypes.byref(state._struct(self._struct_cls)),
+                     state.size, t, dt)
+
+
+class DynamicsKernelState(object):
+    """
+    The struct-of-arrays state of a population updated by a CompiledDynamics
+    kernel. Each group of arrays is held in an OrderedDict keyed by the name
+    of the state variable, parameter, port, etc... they correspond to, and the
+    arrays can be modified in place between updates.
+    """
+
+    def __init__(self, generator, size):
+        self._generator = generator
+        self._size = int(size)
+        self.regime = numpy.zeros(self._size, dtype=numpy.intc)
+        self.state_variables = self._arrays(generator.state_variable_names,
+                                            numpy.float64)
+        self.parameters = self._arrays(generator.parameter_names,
+                                       numpy.float64)
+        self.inputs = self._arrays(generator.input_names, numpy.float64)
+        self.outputs = self._arrays(generator.output_names, numpy.float64)
+        self.events_in = self._arrays(generator.event_receive_port_names,
+                                      numpy.intc)
+        self.events_out = self._arrays(generator.event_send_port_names,
+                                       numpy.intc)
+
+    @property
+    def size(self):
+        return self._size
+
+    def _arrays(self, names, dtype):
+        return OrderedDict((n, numpy.zeros(self._size, dtype=dtype))
+                           for n in names)
+
+    def _struct(self, struct_cls):
+        gen = self._generator
+        groups = ((gen.state_prefix, self.state_variables, numpy.float64),
+                  (gen.parameter_prefix, self.parameters, numpy.float64),
+                  (gen.input_prefix, self.inputs, numpy.float64),
+                  (gen.output_prefix, self.outputs, numpy.float64),
+                  (gen.event_in_prefix, self.events_in, numpy.intc),
+                  (gen.event_out_prefix, self.events_out, numpy.intc))
+        fields = {'regime': self._pointer('regime', self.regime, numpy.intc)}
+        for prefix, arrays, dtype in groups:
+            for name, array in arrays.items():
+                fields[prefix + name] = self._pointer(name, array, dtype)
+        return struct_cls(**dict((str(k), v) for k, v in fields.items()))
+
+    def _pointer(self, name, array, dtype):
+        if (array.dtype != dtype or array.shape != (self._size,) or
+                not array.flags.c_contiguous):
+            raise NineMLCodeGenerationError(
+                "Array for '{}' must be a contiguous {} array of length {} "
+                "(found {} array of shape {})".format(
+                    name, numpy.dtype(dtype), self._size, array.dtype,
+                    array.shape))
+        ctype = ctypes.c_int if dtype is numpy.intc else ctypes.c_double
+        return array.ctypes.data_as(ctypes.POINTER(ctype))
@@ -0,0 +1,243 @@
+"""
+Common-subexpression elimination across the expressions of a Dynamics regime,
+producing reusable "evaluation plans" for evaluators and code generators.
+
+:copyright: Copyright 2010-2017 by the NineML Python team, see AUTHORS.
+:license: BSD-3, see LICENSE for details.
+"""
+from builtins import object
+from collections import OrderedDict
+from itertools import chain
+import sympy
+from nineml.abstraction.expressions import Expression
+from nineml.abstraction.expressions.utils import lambdify_modules
+from nineml.exceptions import NineMLUsageError
+
+
+class EvaluationPlan(object):
+    """
+    An ordered list of temporary assignments followed by a set of output
+    expressions written in terms of the temporaries, produced by running
+    Sympy's common-subexpression elimination jointly across a set of
+    expressions.
+
+    Parameters
+    ----------
+    expressions : OrderedDict(hashable, sympy.Basic | Expression) | list
+        The expressions to plan the evaluation of, keyed by the names they
+        are output as. A list of (key, expression) tuples is also accepted.
+    temporary_prefix : str
+        The prefix of the names of the temporary symbols introduced by the
+        elimination, which are suffixed with an increasing integer (skipping
+        any names that clash with symbols in the expressions)
+    """
+
+    def __init__(self, expressions, temporary_prefix='cse_'):
+        expressions = OrderedDict(
+            (k, sympy.sympify(e.rhs if isinstance(e, Expression) else e))
+            for k, e in (expressions.items()
+                         if isinstance(expressions, dict) else expressions))
+        used = set(str(s) for s in chain(*(e.free_symbols
+                                           for e in expressions.values())))
+        self._temporary_prefix = temporary_prefix
+        self._original = expressions
+        if expressions:
+            temporaries, reduced = sympy.cse(
+                list(expressions.values()),
+                symbols=self._temporary_symbols(temporary_prefix, used))
+        else:
+            temporaries, reduced = [], []
+        self._temporaries = temporaries
+        self._outputs = OrderedDict(zip(expressions.keys(), reduced))
+        temp_syms = set(s for s, _ in temporaries)
+        self._input_names = sorted(
+            str(s) for s in chain(*(e.free_symbols for e in chain(
+                (e for _, e in temporaries), reduced)))
+            if s not in temp_syms)
+        self._python_func = None
+
+    def __repr__(self):
+        return "{}({} temporaries, {} outputs)".format(
+            type(self).__name__, len(self._temporaries), len(self._outputs))
+
+    @classmethod
+    def _temporary_symbols(cls, prefix, used):
+        i = 0
+        while True:
+            name = prefix + str(i)
+            if name not in used:
+                yield sympy.Symbol(name)
+            i += 1
+
+    @property
+    def temporaries(self):
+        """
+        The temporary assignments as a list of (sympy.Symbol, sympy.Basic)
+        tuples, in the order they need to be evaluated
+        """
+        return list(self._temporaries)
+
+    @property
+    def outputs(self):
+        """
+        The output expressions, written in terms of the inputs and
+        temporaries, keyed by the names they were passed with
+        """
+        return OrderedDict(self._outputs)
+
+    @property
+    def original_outputs(self):
+        return OrderedDict(self._original)
+
+    @property
+    def input_names(self):
+        """The names of the symbols required to evaluate the plan"""
+        return list(self._input_names)
+
+    @property
+    def num_temporaries(self):
+        return len(self._temporaries)
+
+    @property
+    def num_operations(self):
+        """The number of operations required to evaluate the plan"""
+        return sum(sympy.count_ops(e)
+                   for e in chain((e for _, e in self._temporaries),
+                                  self._outputs.values()))
+
+    @property
+    def num_original_operations(self):
+        """
+        The number of operations required to evaluate the expressions
+        independently
+        """
+        return sum(sympy.count_ops(e) for e in self._original.values())
+
+    @property
+    def python_func(self):
+        """
+        Returns a python callable, which evaluates the plan in the namespace
+        provided as keyword arguments and returns an OrderedDict of the
+        outputs. Arguments can be NumPy arrays, in which case the outputs are
+        evaluated element-wise.
+        """
+        if self._python_func is None:
+            steps = []
+            for sym, expr in chain(self._temporaries,
+                                   self._outputs.items()):
+                args = sorted(expr.free_symbols, key=str)
+                steps.append((sym, [str(a) for a in args],
+                              sympy.lambdify(args, expr,
+                                             modules=lambdify_modules)))
+            num_temps = len(self._temporaries)
+
+            def nineml_evaluation_plan(**kwargs):
+                namespace = dict(kwargs)
+                outputs = OrderedDict()
+                for i, (key, arg_names, func) in enumerate(steps):
+                    try:
+                        value = func(*(namespace[a] for a in arg_names))
+                    except KeyError as e:
+                        raise NineMLUsageError(
+                            "Missing argument {} required to evaluate plan "
+                            "(expected '{}')".format(
+                                e, "', '".join(self._input_names)))
+                    if i < num_temps:
+                        namespace[str(key)] = value
+                    else:
+                        outputs[key] = value
+                return outputs
+
+            self._python_func = nineml_evaluation_plan
+        return self._python_func
+
+    @classmethod
+    def from_regime(cls, dynamics, regime_name, include=None, **kwargs):
+        """
+        Creates the evaluation plan of all expressions evaluated within a
+        regime of a Dynamics class. Aliases are substituted into the other
+        expressions before the elimination so that subexpressions shared via
+        aliases are also found.
+
+        The outputs of the plan are keyed by tuples of the form
+
+            ('Alias', <name>)
+            ('TimeDerivative', <variable>)
+            ('Trigger', <trigger-str>)
+            ('StateAssignment', <trigger-str | src-port-name>, <variable>)
+
+        Parameters
+        ----------
+        dynamics : Dynamics
+            The Dynamics class containing the regime
+        regime_name : str
+            The name of the regime to create the plan for
+        include : list(str) | None
+            The types of expressions to include, a subset of 'Alias',
+            'TimeDerivative', 'Trigger' and 'StateAssignment'. If None all
+            types are included.
+        """
+        valid_types = ('Alias', 'TimeDerivative', 'Trigger',
+                       'StateAssignment')
+        if include is None:
+            include = valid_types
+        elif any(i not in valid_types for i in include):
+            raise NineMLUsageError(
+                "Invalid expression type(s) '{}' included in evaluation plan "
+                "(can be '{}')".format(
+                    "', '".join(i for i in include if i not in valid_types),
+                    "', '".join(valid_types)))
+        regime = dynamics.regime(regime_name)
+        alias_map = dict((a.name, a.rhs) for a in dynamics.aliases)
+        alias_map.update((a.name, a.rhs) for a in regime.aliases)
+        substituted = {}
+
+        def substitute(expr):
+            return expr.xreplace(dict(
+                (s, resolve(str(s))) for s in expr.free_symbols
+                if str(s) in alias_map))
+
+        def resolve(name):
+            try:
+                return substituted[name]
+            except KeyError:
+                rhs = substituted[name] = substitute(alias_map[name])
+                return rhs
+
+        expressions = []
+        if 'Alias' in include:
+            expressions.extend((('Alias', n), resolve(n))
+                               for n in sorted(alias_map))
+        if 'TimeDerivative' in include:
+            expressions.extend(
+                (('TimeDerivative', td.variable), substitute(td.rhs))
+                for td in sorted(regime.time_derivatives,
+                                 key=lambda td: td.variable))
+        on_conditions = sorted(regime.on_conditions,
+                               key=lambda oc: oc.sort_key)
+        if 'Trigger' in include:
+            expressions.extend(
+                (('Trigger', oc.trigger.sort_key),
+                 substitute(oc.trigger.rhs)) for oc in on_conditions)
+        if 'StateAssignment' in include:
+            transitions = chain(
+                ((oc.trigger.sort_key, oc) for oc in on_conditions),
+                ((oe.src_port_name, oe) for oe in sorted(
+                    regime.on_events, key=lambda oe: oe.src_port_name)))
+            for transition_key, transition in transitions:
+                expressions.extend(
+                    (('StateAssignment', transition_key, sa.variable),
+                     substitute(sa.rhs))
+                    for sa in sorted(transition.state_assignments,
+                                     key=lambda sa: sa.variable))
+        return cls(expressions, **kwargs)
+
+    @classmethod
+    def from_dynamics(cls, dynamics, **kwargs):
+        """
+        Creates evaluation plans for every regime of the Dynamics class,
+        returned as an OrderedDict keyed by regime name. Keyword arguments
+        are passed on to 'from_regime'.
+        """
+        return OrderedDict((n, cls.from_regime(dynamics, n, **kwargs))
+                           for n in sorted(dynamics.regime_names))
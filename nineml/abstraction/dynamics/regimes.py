@@ -28,6 +28,8 @@ class StateVariable(BaseALObject):
     future, wrapping in into its own object may make the transition easier
     """
 
+    __slots__ = ('_annotations', '_name', '_dimension')
+
     nineml_type = 'StateVariable'
     nineml_attr = ('name',)
     nineml_child = {'dimension': Dimension}
@@ -100,6 +102,8 @@ class TimeDerivative(ODE, BaseALObject):
     For example, if our time derivative was:
     """
 
+    __slots__ = ()
+
     nineml_type = 'TimeDerivative'
     nineml_attr = ('variable',) + ODE.nineml_attr
 
@@ -5,6 +5,7 @@ This file contains the definitions for the Events
 :license: BSD-3, see LICENSE for details.
 """
 
+import re
 from past.builtins import basestring
 import sympy.solvers
 from sympy.logic.boolalg import BooleanTrue, BooleanFalse
@@ -34,6 +35,8 @@ class StateAssignment(BaseALObject, ExpressionWithSimpleLHS):
 
     """
 
+    __slots__ = ()
+
     nineml_type = 'StateAssignment'
     nineml_attr = ('variable', 'rhs')
 
@@ -484,6 +487,7 @@ class OnCondition(Transition):
 
     nineml_type = "OnCondition"
     nineml_child = {'trigger': Trigger}
+    _identifier_re = re.compile(r'\w+$')
 
     def __init__(self, trigger, state_assignments=None,
                  output_events=None, target_regime_name=None):
@@ -521,6 +525,22 @@ class OnCondition(Transition):
     def sort_key(self):
         return self.trigger.sort_key
 
+    @classmethod
+    def _index_key(cls, name):
+        """
+        Converts a condition string into the parsed trigger expression that
+        OnConditions are indexed under. Returns None if the name cannot be a
+        condition (i.e. it is a plain identifier or fails to parse).
+        """
+        if isinstance(name, sympy.Basic):
+            return name
+        if not isinstance(name, basestring) or cls._identifier_re.match(name):
+            return None
+        try:
+            return Trigger(name).rhs
+        except NineMLUsageError:
+            return None
+
     def serialize_node(self, node, **options):  # @UnusedVariable
         node.child(self.trigger, **options)
         super(OnCondition, self).serialize_node(node, **options)
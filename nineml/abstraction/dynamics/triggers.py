@@ -0,0 +1,272 @@
+"""
+Analysis of the triggers of OnConditions, classifying them into simple
+thresholds on a single state variable, time-based triggers and general
+triggers, and providing vectorised detection of their crossings over arrays
+of states.
+
+:copyright: Copyright 2010-2017 by the NineML Python team, see AUTHORS.
+:license: BSD-3, see LICENSE for details.
+"""
+from builtins import object
+from collections import OrderedDict
+import sympy
+import numpy
+from nineml.abstraction.expressions import t
+from nineml.abstraction.expressions.utils import lambdify_modules
+from nineml.exceptions import NineMLUsageError, NineMLNoSolutionException
+from .transitions import Trigger
+
+
+def _numpy_func(expr):
+    """
+    Returns a function that evaluates the sympy expression over a namespace
+    of scalars and/or NumPy arrays
+    """
+    args = sorted(expr.free_symbols, key=str)
+    arg_names = [str(a) for a in args]
+    func = sympy.lambdify(args, expr, modules=lambdify_modules)
+
+    def evaluate(namespace):
+        try:
+            return func(*(namespace[n] for n in arg_names))
+        except KeyError as e:
+            raise NineMLUsageError(
+                "Missing value for {} required to evaluate '{}' (expected "
+                "'{}')".format(e, expr, "', '".join(arg_names)))
+    return evaluate
+
+
+class TriggerAnalysis(object):
+    """
+    Classifies the trigger of an OnCondition as either
+
+        'threshold' : a strict inequality with a single state variable,
+                      integrated in the regime, on one side, e.g. 'v > theta'
+        'time'      : a trigger that depends on time and not on any state
+                      variable integrated in the regime, so the time it
+                      becomes true can be solved for analytically, e.g.
+                      't > t_spike + t_ref'
+        'general'   : any other trigger
+
+    and provides vectorised detection of crossings, i.e. instances in which
+    the trigger is false at the start of a time step and true at the end of
+    it, along with an estimate of the time of the crossing within the step.
+
+    Parameters
+    ----------
+    trigger : Trigger | OnCondition | str
+        The trigger to analyse
+    integrated : iterable(str)
+        The names of the state variables that are integrated (i.e. have a
+        time derivative) in the regime the trigger belongs to
+    """
+
+    THRESHOLD = 'threshold'
+    TIME = 'time'
+    GENERAL = 'general'
+
+    def __init__(self, trigger, integrated=()):
+        if hasattr(trigger, 'trigger'):
+            trigger = trigger.trigger  # OnCondition
+        elif not isinstance(trigger, Trigger):
+            trigger = Trigger(trigger)
+        self._trigger = trigger
+        integrated = set(integrated)
+        expr = trigger.rhs
+        free = set(str(s) for s in expr.free_symbols)
+        # The "margin" is an expression that is positive iff a relational
+        # trigger is true, and is used to interpolate crossing times
+        if isinstance(expr, sympy.StrictGreaterThan):
+            self._margin = expr.args[0] - expr.args[1]
+        elif isinstance(expr, sympy.StrictLessThan):
+            self._margin = expr.args[1] - expr.args[0]
+        else:
+            self._margin = None
+        self._kind = self.GENERAL
+        self._variable = None
+        self._threshold = None
+        self._direction = None
+        self._event_time = None
+        if str(t) in free and not (free & integrated):
+            try:
+                self._event_time = Trigger._becomes_true(expr)
+                self._kind = self.TIME
+            except NineMLNoSolutionException:
+                pass
+        elif (self._margin is not None and str(t) not in free and
+              len(free & integrated) == 1):
+            variable = sympy.Symbol(next(iter(free & integrated)))
+            slope = sympy.diff(self._margin, variable)
+            if slope.is_Number and slope != 0:
+                self._kind = self.THRESHOLD
+                self._variable = str(variable)
+                self._threshold = sympy.solve(self._margin, variable)[0]
+                self._direction = 1 if slope > 0 else -1
+        self._is_true = _numpy_func(expr)
+        self._funcs = {}
+
+    def __repr__(self):
+        return "{}('{}', kind='{}')".format(type(self).__name__,
+                                            self._trigger.rhs, self._kind)
+
+    @property
+    def trigger(self):
+        return self._trigger
+
+    @property
+    def kind(self):
+        return self._kind
+
+    @property
+    def variable(self):
+        """The state variable of a threshold trigger"""
+        return self._variable
+
+    @property
+    def threshold(self):
+        """The expression for the threshold of a threshold trigger"""
+        return self._threshold
+
+    @property
+    def direction(self):
+        """
+        +1 if a threshold trigger becomes true when its variable rises above
+        the threshold and -1 if when it falls below it
+        """
+        return self._direction
+
+    @property
+    def event_time(self):
+        """
+        The expression for the time a time-based trigger becomes true
+        """
+        return self._event_time
+
+    def _func(self, name, expr):
+        try:
+            return self._funcs[name]
+        except KeyError:
+            func = self._funcs[name] = _numpy_func(expr)
+            return func
+
+    def is_true(self, t, namespace):
+        """
+        Evaluates the trigger
+
+        Parameters
+        ----------
+        t : float
+            The time to evaluate the trigger at
+        namespace : dict(str, float | numpy.ndarray)
+            The values of the state variables, parameters and analog inputs
+            the trigger depends on
+        """
+        namespace = dict(namespace)
+        namespace['t'] = t
+        return numpy.asarray(self._is_true(namespace), dtype=bool)
+
+    def next_event_time(self, namespace):
+        """
+        Returns the time at which a time-based trigger becomes true, which
+        simulators can use to skip steps in which it can't be crossed.
+
+        Parameters
+        ----------
+        namespace : dict(str, float | numpy.ndarray)
+            The values of the state variables and parameters the event time
+            depends on
+        """
+        if self._kind != self.TIME:
+            raise NineMLUsageError(
+                "Can only calculate the next event time of time-based "
+                "triggers ('{}' is a {} trigger)".format(self._trigger.rhs,
+                                                         self._kind))
+        return numpy.asarray(self._func('event_time', self._event_time)(
+            namespace), dtype=float)
+
+    def detect(self, t, dt, before, after, namespace=None):
+        """
+        Detects the crossings of the trigger over a time step, i.e. where it
+        is false at the start of the step and true at the end of it, and
+        estimates the times of the crossings
+
+        Parameters
+        ----------
+        t : float
+            The time at the start of the step
+        dt : float
+            The length of the time step
+        before : dict(str, numpy.ndarray)
+            The values of the state variables at the start of the step
+        after : dict(str, numpy.ndarray)
+            The values of the state variables at the end of the step
+        namespace : dict(str, float | numpy.ndarray)
+            The values of the parameters, constants and analog inputs
+
+        Returns
+        -------
+        crossed : numpy.ndarray(bool)
+            Whether the trigger was crossed within the time step
+        crossing_times : numpy.ndarray(float)
+            The estimated times of the crossings, NaN where the trigger wasn't
+            crossed. Threshold and general relational triggers are linearly
+            interpolated, time-based triggers are solved exactly and other
+            triggers are assumed to be crossed at the end of the step.
+        """
+        ns_before = dict(namespace) if namespace is not None else {}
+        ns_before.update(before)
+        ns_before['t'] = t
+        ns_after = dict(namespace) if namespace is not None else {}
+        ns_after.update(after)
+        ns_after['t'] = t + dt
+        if self._kind == self.THRESHOLD:
+            threshold = self._func('threshold', self._threshold)(ns_before)
+            x0 = numpy.asarray(before[self._variable], dtype=float)
+            x1 = numpy.asarray(after[self._variable], dtype=float)
+            if self._direction > 0:
+                crossed = (x0 <= threshold) & (x1 > threshold)
+            else:
+                crossed = (x0 >= threshold) & (x1 < threshold)
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                fraction = (threshold - x0) / (x1 - x0)
+        else:
+            crossed = (
+                ~numpy.asarray(self._is_true(ns_before), dtype=bool) &
+                numpy.asarray(self._is_true(ns_after), dtype=bool))
+            if self._kind == self.TIME:
+                fraction = (self.next_event_time(ns_before) - t) / dt
+            elif self._margin is not None:
+                margin = self._func('margin', self._margin)
+                m0 = numpy.asarray(margin(ns_before), dtype=float)
+                m1 = numpy.asarray(margin(ns_after), dtype=float)
+                with numpy.errstate(divide='ignore', invalid='ignore'):
+                    fraction = m0 / (m0 - m1)
+            else:
+                fraction = 1.0
+        crossed, fraction = numpy.broadcast_arrays(crossed, fraction)
+        times = numpy.where(crossed,
+                            t + numpy.clip(fraction, 0.0, 1.0) * dt, numpy.nan)
+        return crossed, times
+
+    @classmethod
+    def from_regime(cls, dynamics, regime_name):
+        """
+        Analyses the triggers of all on-conditions in a regime
+
+        Parameters
+        ----------
+        dynamics : Dynamics
+            The Dynamics class containing the regime
+        regime_name : str
+            The name of the regime
+
+        Returns
+        -------
+        analyses : OrderedDict(str, TriggerAnalysis)
+            The analyses of the triggers keyed by their string representation
+        """
+        regime = dynamics.regime(regime_name)
+        integrated = list(regime.time_derivative_variables)
+        return OrderedDict(
+            (oc.trigger.sort_key, cls(oc.trigger, integrated))
+            for oc in sorted(regime.on_conditions, key=lambda oc: oc.sort_key))
@@ -47,6 +47,8 @@ class Expression(AnnotatedNineMLObject):
         The expression in string or Sympy_ form
     """
 
+    __slots__ = ('_annotations', '_rhs')
+
     nineml_type = '_Expression'
     nineml_attr = ('rhs',)
 
@@ -401,6 +403,8 @@ class ExpressionSymbol(object):
     Base class for all NineML objects that can be treated like Sympy symbols
     """
 
+    __slots__ = ()
+
     def _sympy_(self):
         return sympy.Symbol(self.name)
 
@@ -443,6 +447,8 @@ class ExpressionWithLHS(Expression):
     # Sub-classes should override this, to allow
     # proper-prefixing:
 
+    __slots__ = ()
+
     def __init__(self, rhs):
         Expression.__init__(self, rhs)
 
@@ -471,6 +477,8 @@ class ExpressionWithSimpleLHS(ExpressionSymbol, ExpressionWithLHS):
     That is, a single symbol, for example 's = t+1'
     """
 
+    __slots__ = ('_name',)
+
     nineml_attr = ('name', 'rhs')
 
     def __init__(self, lhs, rhs, assign_to_reserved=False):
@@ -516,6 +524,8 @@ class ODE(ExpressionWithLHS):
         used as base class for ``TimeDerivative``
     """
 
+    __slots__ = ('_dependent_variable', '_independent_variable')
+
     def __init__(self, dependent_variable, independent_variable, rhs):
         ExpressionWithLHS.__init__(self, rhs)
 
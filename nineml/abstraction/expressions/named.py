@@ -48,6 +48,8 @@ class Alias(BaseALObject, ExpressionWithSimpleLHS):
 
 
     """
+    __slots__ = ()
+
     nineml_type = 'Alias'
     nineml_attr = ('name', 'rhs')
 
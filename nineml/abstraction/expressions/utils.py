@@ -39,6 +39,22 @@ str_to_npfunc_map = {
 }
 
 
+def _elementwise(ufunc):
+    # Sympy prints Min/Max as numpy.amin/amax of a tuple of the arguments,
+    # which reduces over all elements of array arguments
+    def reduce_args(args, **kwargs):  # @UnusedVariable
+        return ufunc.reduce(numpy.broadcast_arrays(*args))
+    return reduce_args
+
+
+# Modules to pass to sympy.lambdify to evaluate expressions element-wise over
+# NumPy arrays
+lambdify_modules = [dict(str_to_npfunc_map,
+                         amin=_elementwise(numpy.minimum),
+                         amax=_elementwise(numpy.maximum)),
+                    'numpy']
+
+
 def str_expr_replacement(frm, to, expr_string, func_ok=False):
     """ replaces all occurences of name 'frm' with 'to' in expr_string
     ('frm' may not occur as a function name on the rhs) ...
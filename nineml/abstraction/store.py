@@ -0,0 +1,211 @@
+"""
+A content-addressed store of component classes, which allows structurally
+identical component classes loaded from different documents to share a single
+object in memory
+
+:copyright: Copyright 2010-2017 by the NineML Python team, see AUTHORS.
+:license: BSD-3, see LICENSE for details.
+"""
+from builtins import object, zip
+from collections import OrderedDict, namedtuple
+from types import ModuleType, FunctionType
+import gc
+import hashlib
+import sys
+import weakref
+import sympy
+from nineml.base import DocumentLevelObject
+from nineml.visitors.equality import Fingerprinter
+from .componentclass import ComponentClass
+
+
+class Duplicate(namedtuple('Duplicate', ('name', 'url', 'size', 'ref'))):
+    """
+    A record of a duplicate of a shared component class and its estimated
+    size. The duplicate itself is only weakly referenced by the store so that
+    it (and the document it is in) can be freed once it is no longer in use
+    """
+
+    @property
+    def freed(self):
+        """Whether the duplicate has been freed"""
+        return self.ref() is None
+
+
+class ComponentClassStore(object):
+    """
+    Stores component classes (e.g. Dynamics, ConnectionRule and
+    RandomDistribution) by a digest of their structure, which excludes their
+    names and the documents they are in, so that identical component classes
+    that have been copied between libraries can be replaced by the first
+    copy that was added.
+
+    When a DocumentPool has a store, the component classes of the documents it
+    loads are added to it and references (e.g. definitions) to component
+    classes in other documents are resolved to the shared copy. NB: the
+    shared copy may have a different name or url to the component class that
+    was referenced, which is used if the referencing object is written.
+
+    Only the shared copies (and the documents they are in) are held by the
+    store, the duplicates are recorded by their name, url and size (and a weak
+    reference) so that documents that only contain duplicates can still be
+    evicted from a pool. Memory is only saved once the duplicates have been
+    freed, e.g. when their documents are evicted from a pool with a maximum
+    size.
+
+    Parameters
+    ----------
+    component_classes : list(ComponentClass)
+        Component classes to add to the store
+    """
+
+    def __init__(self, *component_classes):
+        self._classes = OrderedDict()  # Shared copies keyed by digest
+        # Records of the duplicates keyed by digest and their name and url
+        self._duplicates = OrderedDict()
+        for component_class in component_classes:
+            self.add(component_class)
+
+    def __repr__(self):
+        return "{}({} component classes, {} duplicates)".format(
+            type(self).__name__, len(self), self.num_duplicates)
+
+    def __len__(self):
+        return len(self._classes)
+
+    def __contains__(self, component_class):
+        return self.digest(component_class) in self._classes
+
+    def __iter__(self):
+        return iter(self._classes.values())
+
+    @property
+    def num_duplicates(self):
+        return sum(len(d) for d in self._duplicates.values())
+
+    @property
+    def num_freed(self):
+        """The number of duplicates that have been freed"""
+        return sum(d.freed for dups in self._duplicates.values()
+                   for d in dups.values())
+
+    @classmethod
+    def digest(cls, component_class):
+        """
+        Returns a digest of the structure of the component class (excluding
+        its name)
+        """
+        fingerprint = Fingerprinter().fingerprint(component_class)
+        nineml_type, nineml_cls, attrs = fingerprint[0]
+        attrs = tuple(None if n == 'name' else a
+                      for n, a in zip(nineml_cls.nineml_attr, attrs))
+        return hashlib.sha1(repr(
+            ((nineml_type, nineml_cls, attrs),) +
+            fingerprint[1:]).encode('utf-8')).hexdigest()
+
+    def add(self, component_class):
+        """
+        Adds a component class to the store if an identical component class
+        hasn't been added already
+
+        Parameters
+        ----------
+        component_class : ComponentClass
+            The component class to add. Other objects are returned unchanged
+
+        Returns
+        -------
+        shared : ComponentClass
+            The shared copy of the component class, i.e. the first identical
+            component class that was added to the store
+        """
+        if not isinstance(component_class, ComponentClass):
+            return component_class
+        digest = self.digest(component_class)
+        try:
+            shared = self._classes[digest]
+        except KeyError:
+            self._classes[digest] = shared = component_class
+        else:
+            duplicates = self._duplicates.setdefault(digest, OrderedDict())
+            # Reloaded duplicates replace the record of the previous copy
+            key = (component_class.name, component_class.url)
+            previous = duplicates.get(key)
+            if shared is not component_class and (
+                    previous is None or previous.ref() is not component_class):
+                duplicates[key] = Duplicate(
+                    component_class.name, component_class.url,
+                    _sizeof(component_class), weakref.ref(component_class))
+        return shared
+
+    def duplicates(self):
+        """
+        Returns the component classes that have duplicates
+
+        Returns
+        -------
+        duplicates : list((ComponentClass, list(Duplicate)))
+            The shared copies of component classes and the records (name,
+            url, size and weak reference) of the duplicates of them that were
+            added to the store
+        """
+        return [(self._classes[d], list(dups.values()))
+                for d, dups in self._duplicates.items() if dups]
+
+    def memory_saved(self):
+        """
+        Estimates the number of bytes saved by sharing the component classes
+        that have duplicates, i.e. the size of the duplicates (when they were
+        added to the store) that have since been freed. Duplicates that are
+        still held, e.g. by the documents of an unbounded pool, don't save any
+        memory.
+        """
+        return sum(d.size for _, dups in self.duplicates() for d in dups
+                   if d.freed)
+
+    def report(self):
+        """
+        Returns a report of the duplicate component classes in the store and
+        the estimated memory saved by sharing them
+        """
+        lines = []
+        for shared, duplicates in self.duplicates():
+            lines.append("{} '{}' ({})".format(
+                shared.nineml_type, shared.name, shared.url))
+            for duplicate in duplicates:
+                lines.append("    == '{}' ({}){}".format(
+                    duplicate.name, duplicate.url,
+                    '' if duplicate.freed else ' [still loaded]'))
+        lines.append(
+            "{} duplicate component classes ({} freed) of {} unique component "
+            "classes ({:.1f} KiB saved)".format(
+                self.num_duplicates, self.num_freed, len(self),
+                self.memory_saved() / 1024.0))
+        return '\n'.join(lines)
+
+
+def _sizeof(nineml_obj):
+    """
+    Estimates the memory used by a document-level object, excluding the
+    document it is in, objects shared between modules (e.g. classes) and
+    Sympy expressions, which Sympy caches and shares between equal expressions
+    """
+    size = 0
+    seen = set()
+    to_visit = [nineml_obj]
+    while to_visit:
+        obj = to_visit.pop()
+        if (id(obj) in seen or
+                isinstance(obj, (type, ModuleType, FunctionType,
+                                 sympy.Basic)) or
+                (isinstance(obj, DocumentLevelObject) and
+                 obj is not nineml_obj) or
+                isinstance(obj, nineml.Document)):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        to_visit.extend(gc.get_referents(obj))
+    return size
+
+
+import nineml  # @IgnorePep8
@@ -6,6 +6,10 @@ from nineml.utils.iterables import OrderedDefaultListDict
 from nineml.utils import validate_identifier
 from nineml.base import DocumentLevelObject, ContainerObject
 import re
+try:
+    from types import MappingProxyType
+except ImportError:
+    MappingProxyType = dict  # Python 2 falls back to returning a copy
 from nineml.exceptions import (
     NineMLAnnotationsError, NineMLUsageError, NineMLNameError)
 
@@ -19,6 +23,10 @@ class classproperty(object):
         return self.getter(owner)
 
 
+# Cached in the path index of annotations for attributes that are not present
+_MISSING = object()
+
+
 def sort_key(branch):
     return branch.key
 
@@ -37,10 +45,23 @@ class BaseAnnotations(ContainerObject):
         """
         return (_AnnotationsBranch,)
 
+    # Branches are stored in a dictionary of lists keyed by name/namespace
+    index_elements = False
+
+    # Cache of the values returned by 'get' keyed by their path, which is
+    # created on the first lookup and cleared whenever the branch or any of
+    # its sub-branches are modified
+    _path_index = None
+
     def __init__(self, branches=None):
         ContainerObject.__init__(self)
+        # The branch containing this branch, which has its path index
+        # invalidated along with this one
+        self._container = None
         if isinstance(branches, OrderedDefaultListDict):
             self._branches = branches
+            for branch in chain(*iter(branches.values())):
+                branch._container = self
         else:
             self._branches = OrderedDefaultListDict()
             if branches is not None:
@@ -48,6 +69,7 @@ class BaseAnnotations(ContainerObject):
                     branch._abs_index = i
                     branch._rel_index = len(self._branches[(branch.name,
                                                             branch.ns)])
+                    branch._container = self
                     self._branches[(branch.name, branch.ns)].append(branch)
 
     def _members_iter(self, child_type):
@@ -70,8 +92,9 @@ class BaseAnnotations(ContainerObject):
         except:
             raise
         try:
-            return self._branches[(name, ns)][index]
-        except (KeyError, IndexError):
+            # Use 'get' as indexing the default dict would add the key
+            return self._branches.get((name, ns), [])[index]
+        except IndexError:
             raise NineMLNameError(
                 "{} branch not present in annotations ({})"
                 .format('{}-{}-{}'.format(*key_index),
@@ -140,10 +163,11 @@ class BaseAnnotations(ContainerObject):
             added implicitly.
         """
         key = self._parse_key(key)
+        self._invalidate_path_index()
         key_branches = self._branches[key]
         if not key_branches or not args:
             name, ns = key
-            branch = _AnnotationsBranch(name, ns, rel_index=len(key_branches))
+            branch = self._new_branch(name, ns, rel_index=len(key_branches))
             key_branches.append(branch)
         if args:
             if len(key_branches) > 1:
@@ -166,6 +190,7 @@ class BaseAnnotations(ContainerObject):
             a namespace, provided as a tuple (key, namespace). If the namespace
             is not provided it is taken to be the same as the containing branch
         """
+        self._invalidate_path_index()
         try:
             return self._branches.pop(self._parse_key(key))
         except KeyError:
@@ -187,13 +212,14 @@ class BaseAnnotations(ContainerObject):
             attribute name and a value
         """
         key = self._parse_key(key)
+        self._invalidate_path_index()
         # Recurse into branches while there are remaining args
         key_branches = self._branches[key]
         if len(key_branches) == 1:
             branch = key_branches[0]
         elif not key_branches:
             name, ns = key
-            branch = _AnnotationsBranch(name, ns, rel_index=len(key_branches))
+            branch = self._new_branch(name, ns, rel_index=len(key_branches))
             key_branches.append(branch)
         else:
             raise NineMLNameError(
@@ -224,25 +250,42 @@ class BaseAnnotations(ContainerObject):
         val : (int|float|str)
             The value of the annotation attribute
         """
-        key = self._parse_key(key)
-        if key in self._branches:
-            key_branches = self._branches[key]
-            if len(key_branches) == 1:
-                # Recurse into branches while there are remaining args
-                val = key_branches[0].get(*args, **kwargs)
-            else:
-                raise NineMLNameError(
-                    "Multiple branches found for key '{}' in annoations "
-                    "branch '{}', cannot use 'get' method".format(
-                        key, self._name))
-        else:
+        path = (key,) + args
+        if self._path_index is None:
+            self._path_index = {}
+        try:
+            val = self._path_index[path]
+        except KeyError:
+            val = self._path_index[path] = self._lookup(key, *args)
+        if val is _MISSING:
             if 'default' in kwargs:
                 return kwargs['default']
-            else:
-                raise NineMLNameError(
-                    "No annotation at path '{}'".format("', '".join(args)))
+            raise NineMLNameError(
+                "No annotation at path '{}' in annotations branch '{}'"
+                .format("', '".join(str(k) for k in path), self._name))
         return val
 
+    def _lookup(self, key, *args):
+        """
+        Walks the branches along the path to the leaf and returns the value of
+        the attribute, or _MISSING if it is not present
+        """
+        if not args:
+            raise NineMLUsageError(
+                "No attribute name provided to get from '{}' branch of "
+                "annotations branch '{}'".format(key, self._name))
+        key = self._parse_key(key)
+        if key not in self._branches:
+            return _MISSING
+        key_branches = self._branches[key]
+        if len(key_branches) != 1:
+            raise NineMLNameError(
+                "Multiple branches found for key '{}' in annoations "
+                "branch '{}', cannot use 'get' method".format(
+                    key, self._name))
+        # Recurse into branches while there are remaining args
+        return key_branches[0]._lookup(*args)
+
     def delete(self, key, *args, **kwargs):
         """
         Gets the attribute of an annotations "leaf"
@@ -259,6 +302,7 @@ class BaseAnnotations(ContainerObject):
         """
         key = self._parse_key(key)
         if key in self._branches:
+            self._invalidate_path_index()
             key_branches = self._branches[key]
             if len(key_branches) == 1:
                 # Recurse into branches while there are remaining args
@@ -271,6 +315,20 @@ class BaseAnnotations(ContainerObject):
                     "branch '{}', cannot use 'delete' method".format(
                         key, self._name))
 
+    def _new_branch(self, name, ns, rel_index):
+        branch = _AnnotationsBranch(name, ns, rel_index=rel_index)
+        branch._container = self
+        return branch
+
+    def _invalidate_path_index(self):
+        """
+        Clears the cached paths of the branch and the branches that contain it
+        """
+        annotations = self
+        while annotations is not None:
+            annotations._path_index = None
+            annotations = annotations._container
+
     def _sub_branches_serialize(self, **kwargs):
         members = []
         for key_branches in self._branches.values():
@@ -378,6 +436,37 @@ class Annotations(BaseAnnotations, DocumentLevelObject):
                                   **kwargs)
 
 
+class _EmptyAnnotations(Annotations):
+    """
+    The annotations of objects that have not been annotated, a single instance
+    of which (EMPTY_ANNOTATIONS) is shared between all of them. It cannot be
+    modified, instead AnnotatedNineMLObject.annotations replaces it with a new
+    Annotations object when it is accessed.
+    """
+
+    def __reduce__(self):
+        # Unpickle/copy to the shared instance
+        return 'EMPTY_ANNOTATIONS'
+
+    def add(self, key, *args):
+        self._raise_immutable()
+
+    def set(self, key, *args):
+        self._raise_immutable()
+
+    def pop(self, key):
+        self._raise_immutable()
+
+    def delete(self, key, *args, **kwargs):
+        self._raise_immutable()
+
+    def _raise_immutable(self):
+        raise NineMLUsageError(
+            "Cannot modify the empty annotations shared between objects that "
+            "have not been annotated, access them via the 'annotations' "
+            "property of the object instead")
+
+
 class _AnnotationsBranch(BaseAnnotations):
     """
     Represents a branch of an annotations tree (i.e. a tag in XML, dict in
@@ -411,8 +500,7 @@ class _AnnotationsBranch(BaseAnnotations):
     def __init__(self, name, ns, rel_index=None, abs_index=None, attr=None,
                  branches=None, body=None):
         super(_AnnotationsBranch, self).__init__(branches)
-        if attr is None:
-            attr = {}
+        attr = dict(attr) if attr is not None else {}
         self._name = validate_identifier(name)
         self._ns = ns
         self._abs_index = abs_index
@@ -429,7 +517,7 @@ class _AnnotationsBranch(BaseAnnotations):
         return 'branch_keys'
 
     def empty(self):
-        return super(_AnnotationsBranch, self).empty() and not self.attr
+        return super(_AnnotationsBranch, self).empty() and not self._attr
 
     @property
     def name(self):
@@ -453,7 +541,11 @@ class _AnnotationsBranch(BaseAnnotations):
 
     @property
     def attr(self):
-        return self._attr
+        """
+        A read-only view of the attributes of the branch. Use 'set' and
+        'delete' to modify them so that the cached paths are invalidated
+        """
+        return MappingProxyType(self._attr)
 
     @property
     def key(self):
@@ -502,6 +594,7 @@ class _AnnotationsBranch(BaseAnnotations):
             attribute name and a value
         """
         if len(args) == 1:
+            self._invalidate_path_index()
             self._attr[key] = str(args[0])
         elif not args:
             raise NineMLUsageError("No value was provided to set of '{}' "
@@ -510,41 +603,10 @@ class _AnnotationsBranch(BaseAnnotations):
         else:
             super(_AnnotationsBranch, self).set(key, *args)
 
-    def get(self, key, *args, **kwargs):
-        """
-        Gets the attribute of an annotations "leaf"
-
-        Parameters
-        ----------
-        key : str | tuple(str, str)
-            Name of the next branch in the annotations tree, optionally with
-            a namespace, provided as a tuple (key, namespace). If the namespace
-            is not provided it is taken to be the same as the containing branch
-        *args : list(str) + (int|float|str)
-            A list of subsequent branches to the leaf node followed by the
-            attribute name to return the value of
-        default: (int|float|str)
-            The default value to return if the specified annotation has not
-            been set
-
-        Returns
-        -------
-        val : (int|float|str)
-            The value of the annotation attribute
-        """
+    def _lookup(self, key, *args):
         if not args:
-            if 'default' in kwargs:
-                val = self._attr.get(key, kwargs['default'])
-            else:
-                try:
-                    val = self._attr[key]
-                except KeyError:
-                    raise NineMLNameError(
-                        "Annotations branch {{{}}}{} does not contain '{}' "
-                        "attribute".format(self.ns, self.name, key))
-        else:
-            val = super(_AnnotationsBranch, self).get(key, *args, **kwargs)
-        return val
+            return self._attr.get(key, _MISSING)
+        return super(_AnnotationsBranch, self)._lookup(key, *args)
 
     def delete(self, key, *args, **kwargs):
         """
@@ -561,8 +623,9 @@ class _AnnotationsBranch(BaseAnnotations):
             attribute name to delete
         """
         if not args:
+            self._invalidate_path_index()
             try:
-                del self.attr[key]
+                del self._attr[key]
             except KeyError:
                 raise NineMLNameError(
                     "Annotations branch {{{}}}{} does not contain '{}' "
@@ -586,6 +649,10 @@ class _AnnotationsBranch(BaseAnnotations):
                    body=node.body(allow_empty=True))
 
 
+# Shared by all objects that have not been annotated
+EMPTY_ANNOTATIONS = _EmptyAnnotations()
+
+
 # Python-9ML library specific annotations
 PY9ML_NS = 'http://github.com/INCF/nineml-python'
 
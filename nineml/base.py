@@ -24,6 +24,7 @@ def hash_non_str(key):
 
 
 camel_caps_re = re.compile(r'([a-z])([A-Z])')
+_children_dict_names = {}
 
 
 class BaseNineMLObject(object):
@@ -31,6 +32,11 @@ class BaseNineMLObject(object):
     Base class for all 9ML-type classes
     """
 
+    # Sub-classes that are instantiated in large numbers (e.g. parameters,
+    # aliases, properties) define __slots__ to avoid the overhead of a
+    # __dict__, which requires all of their base classes to define them too
+    __slots__ = ()
+
     nineml_type_v1 = None
     nineml_attr = ()
     nineml_child = {}
@@ -226,7 +232,12 @@ class BaseNineMLObject(object):
 
     @classmethod
     def _children_dict_name(cls):
-        return '_' + cls._children_iter_name()
+        # Cached as it is looked up for every child type on each index access
+        try:
+            return _children_dict_names[cls]
+        except KeyError:
+            name = _children_dict_names[cls] = '_' + cls._children_iter_name()
+            return name
 
     @classmethod
     def _num_children_name(cls):
@@ -240,17 +251,42 @@ class BaseNineMLObject(object):
 
 class AnnotatedNineMLObject(BaseNineMLObject):
 
+    # '_annotations' is included in the __slots__ of the sub-classes that
+    # define them, as a slot here would conflict with the layout of builtin
+    # bases (e.g. Document's dict)
+    __slots__ = ()
+
     def __init__(self, annotations=None):
         if annotations is None:
-            annotations = nineml.annotations.Annotations()
+            # Objects without annotations share a single empty instance
+            annotations = nineml.annotations.EMPTY_ANNOTATIONS
         else:
             assert isinstance(annotations, nineml.annotations.Annotations)
         self._annotations = annotations
 
     @property
     def annotations(self):
+        """
+        The annotations of the object. If the object has not been annotated,
+        they are created on first access so they can be modified (use
+        'has_annotations' or 'get_annotation' to check annotations without
+        creating them).
+        """
+        if self._annotations is nineml.annotations.EMPTY_ANNOTATIONS:
+            self._annotations = nineml.annotations.Annotations()
         return self._annotations
 
+    @property
+    def has_annotations(self):
+        return not self._annotations.empty()
+
+    def get_annotation(self, key, *args, **kwargs):
+        """
+        Gets the attribute of an annotations "leaf" (see Annotations.get)
+        without creating the annotations of objects that have none
+        """
+        return self._annotations.get(key, *args, **kwargs)
+
     def annotations_equal(self, other, annotations_ns=[], **kwargs):  # @UnusedVariable @IgnorePep8
         """
         Check for equality between annotations within specified namespaces of
@@ -266,13 +302,13 @@ class AnnotatedNineMLObject(BaseNineMLObject):
         equality : bool
             Whether the annotations of the two 9ML objects are equal
         """
-        if not hasattr(self, 'annotations'):
+        if not hasattr(self, '_annotations'):
             return True
-        for name, ns in self.annotations:
+        for name, ns in self._annotations:
             if ns in annotations_ns:
                 try:
-                    if self.annotations[(name, ns)] != other.annotations[(name,
-                                                                          ns)]:
+                    if (self._annotations[(name, ns)] !=
+                            other._annotations[(name, ns)]):
                         return False
                 except NineMLNameError:
                     return False
@@ -454,13 +490,27 @@ class ContainerObject(BaseNineMLObject):
 
     Deriving classes are expected to have the 'nineml_children' class
     attribute listing the classes of the children in the container.
+
+    Lookups of elements by name and of the positions of elements amongst
+    those of the same type are served from indices, which are maintained by
+    the 'add', 'remove' and '_update_member_key' methods. Deriving classes
+    whose accessors don't simply look up the member dictionaries (e.g. ones
+    that fall back to a prototype or generate elements on the fly) should
+    set 'index_elements' to False.
     """
 
+    index_elements = True
+    _element_index = None  # name -> [(child_type, element), ...]
+    _element_index_size = 0
+    _position_index = None  # child_type -> ([key, ...], {key: position})
+
     def __init__(self):
         for children_type in self.nineml_children:
             setattr(self, children_type._children_dict_name(), OrderedDict())
 
         self._parent = None  # Used to link up the the containing document
+        self._element_index = None
+        self._position_index = None
 
     def add(self, *elements):
         add_to_doc_visitor = nineml.document.AddToDocumentVisitor(
@@ -473,6 +523,7 @@ class ContainerObject(BaseNineMLObject):
                     "with an existing element with the same key"
                     .format(element.key, type(element).__name__))
             dct[element.key] = element
+            self._index_add(element)
             # Set parent if a property of the child element to add
             if hasattr(element, 'parent'):
                 element._parent = self
@@ -490,6 +541,7 @@ class ContainerObject(BaseNineMLObject):
                     "Could not remove '{}' from container as it was not "
                     "found in member dictionary (use 'ignore_missing' option "
                     "to ignore)".format(element.key))
+            self._index_remove(element)
             # Remove reference to parent if present
             try:
                 if element.parent is self:
@@ -507,6 +559,8 @@ class ContainerObject(BaseNineMLObject):
                 member_dict[new_key] = member_dict.pop(old_key)
             except KeyError:
                 pass
+            else:
+                self._index_rekey(child_type, old_key, new_key)
 
     def elements(self, child_types=None):
         """
@@ -542,6 +596,26 @@ class ContainerObject(BaseNineMLObject):
         """
         if child_types is None:
             child_types = self.nineml_children
+        if self.index_elements and all(ct in self.nineml_children
+                                       for ct in child_types):
+            elem = self._indexed_element(name, child_types,
+                                         include_send_ports)
+            if elem is not None:
+                return elem
+            # Child types that are keyed by something other than a plain
+            # name (e.g. the parsed trigger of an OnCondition) convert the
+            # name into their key before it is looked up again
+            for child_type in child_types:
+                index_key = getattr(child_type, '_index_key', None)
+                key = index_key(name) if index_key is not None else None
+                if key is not None and key != name:
+                    elem = self._indexed_element(key, (child_type,),
+                                                 include_send_ports)
+                    if elem is not None:
+                        return elem
+            raise NineMLNameError(
+                "'{}' was not found in '{}' {} object"
+                .format(name, self.key, self.__class__.__name__))
         send_port = None
         for child_type in child_types:
             try:
@@ -596,14 +670,144 @@ class ContainerObject(BaseNineMLObject):
         name of an element can be replaced with a unique integer value (and
         referenced elsewhere in the code).
         """
-        return list(self._member_keys_iter(element)).index(element.key)
+        if not self.index_elements:
+            return list(self._member_keys_iter(element)).index(element.key)
+        keys, positions = self._positions(self._child_type_of(element))
+        try:
+            return positions[element.key]
+        except KeyError:
+            raise ValueError("{} is not in list".format(element.key))
 
     def from_index(self, index, child_type):
         """
         The inverse of the index_of method for retrieving an object from its
         index
         """
-        return list(self._members_iter(child_type))[index]
+        if not self.index_elements:
+            return list(self._members_iter(child_type))[index]
+        child_type = self._child_type_of(child_type)
+        keys, _ = self._positions(child_type)
+        return self._member_dict(child_type)[keys[index]]
+
+    def _child_type_of(self, element):
+        """
+        Returns the entry in 'nineml_children' an element (or element type)
+        is stored under
+        """
+        for child_type in self.nineml_children:
+            if isinstance(element, child_type) or element is child_type:
+                return child_type
+        for child_type in self.nineml_children:
+            if (isinstance(element, type) and
+                    issubclass(element, child_type)):
+                return child_type
+        raise NineMLInvalidElementTypeException(
+            "{} does not have children of type {}".format(self, element))
+
+    def _indexed_element(self, name, child_types, include_send_ports):
+        """
+        Looks up an element in the name index, rebuilding the index if it has
+        gone out of sync with the member dictionaries (i.e. they have been
+        modified directly instead of via 'add'/'remove'). Returns None if no
+        matching element is found.
+        """
+        index = self._element_index
+        if index is None:
+            index = self._build_element_index()
+        try:
+            entries = index[name]
+        except (KeyError, TypeError):
+            entries = ()
+        if any(self._member_dict(ct).get(name) is not e for ct, e in entries):
+            entries = self._build_element_index().get(name, ())
+        elif not entries and (self._element_index_size !=
+                              self._num_dict_members()):
+            entries = self._build_element_index().get(name, ())
+        send_port = None
+        for child_type, elem in entries:
+            if child_type in child_types:
+                # Send ports are ignored as they otherwise mask aliases/state
+                # variables
+                if not isinstance(elem, SendPortBase):
+                    return elem
+                send_port = elem
+        if include_send_ports:
+            return send_port
+        return None
+
+    def _build_element_index(self):
+        index = {}
+        for child_type in self.nineml_children:
+            for key, elem in self._member_dict(child_type).items():
+                index.setdefault(key, []).append((child_type, elem))
+        self._element_index = index
+        self._element_index_size = sum(len(e) for e in index.values())
+        self._position_index = None
+        return index
+
+    def _num_dict_members(self):
+        return sum(len(self._member_dict(ct)) for ct in self.nineml_children)
+
+    def _positions(self, child_type):
+        """
+        Returns the list of keys of the members of the given type and a
+        dictionary mapping them to their position in it
+        """
+        if self._position_index is None:
+            self._position_index = {}
+        try:
+            keys, positions = self._position_index[child_type]
+        except KeyError:
+            keys = positions = None
+        if keys is None or len(keys) != len(self._member_dict(child_type)):
+            keys = list(self._member_keys_iter(child_type))
+            positions = dict((k, i) for i, k in enumerate(keys))
+            self._position_index[child_type] = (keys, positions)
+        return keys, positions
+
+    def _index_add(self, element):
+        if self._element_index is not None:
+            child_type = self._child_type_of(element)
+            self._element_index.setdefault(element.key, []).append(
+                (child_type, element))
+            self._element_index_size += 1
+            if self._position_index is not None:
+                try:
+                    keys, positions = self._position_index[child_type]
+                except KeyError:
+                    pass
+                else:
+                    positions[element.key] = len(keys)
+                    keys.append(element.key)
+
+    def _index_remove(self, element):
+        if self._element_index is not None:
+            entries = self._element_index.get(element.key, [])
+            for i, (_, elem) in enumerate(entries):
+                if elem is element:
+                    del entries[i]
+                    self._element_index_size -= 1
+                    break
+            if not entries:
+                self._element_index.pop(element.key, None)
+        # Positions of the following elements are shifted so the position
+        # index of the type is rebuilt on its next use
+        if self._position_index is not None:
+            self._position_index.pop(self._child_type_of(element), None)
+
+    def _index_rekey(self, child_type, old_key, new_key):
+        if self._element_index is not None:
+            entries = self._element_index.get(old_key, [])
+            for i, (ct, elem) in enumerate(entries):
+                if ct is child_type:
+                    del entries[i]
+                    self._element_index.setdefault(new_key, []).append(
+                        (ct, elem))
+                    break
+            if not entries:
+                self._element_index.pop(old_key, None)
+        if self._position_index is not None:
+            self._position_index.pop(child_type, None)
 
     def _member_accessor(self, child_type):
         try:
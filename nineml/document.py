@@ -57,9 +57,7 @@ class Document(AnnotatedNineMLObject, dict):
             self, annotations=kwargs.pop('annotations', None))
         self._url = kwargs.pop('url', None)
         self._unserializer = kwargs.pop('unserializer', None)
-        # Stores the list of elements that are being loaded to check for
-        # circular references
-        self._loading = []
+        self._pool = kwargs.pop('pool', None)
         cloner = kwargs.pop('cloner', Cloner(document=self, **kwargs))
         for nineml_obj in nineml_objects:
             self.add(nineml_obj, cloner=cloner, **kwargs)
@@ -174,7 +172,7 @@ class Document(AnnotatedNineMLObject, dict):
         elif self._unserializer is None:
             return False
         else:
-            return name in list(self._unserializer.keys())
+            return name in self._unserializer
 
     @property
     def elements(self):
@@ -258,6 +256,14 @@ class Document(AnnotatedNineMLObject, dict):
     def url(self):
         return self._url
 
+    @property
+    def pool(self):
+        """
+        The DocumentPool the document was loaded from, through which its
+        references to other documents are resolved (if any)
+        """
+        return self._pool
+
 
 class AddToDocumentVisitor(BaseVisitorWithContext):
     """
@@ -99,6 +99,10 @@ class NineMLIOError(NineMLUsageError):
     pass
 
 
+class NineMLCodeGenerationError(NineMLUsageError):
+    pass
+
+
 class NineMLReloadDocumentException(NineMLException):
     pass
 
@@ -56,10 +56,19 @@ class BaseReference(AnnotatedNineMLObject):
                                                   url)) == document_url):
                     remote_doc = document
                 else:
-                    remote_doc = nineml.read(url, relative_to=relative_to)
+                    remote_doc = nineml.read(
+                        url, relative_to=relative_to,
+                        pool=(document.pool if document is not None
+                              else None))
             else:
                 remote_doc = document
             self._target = remote_doc[name]
+            if (remote_doc is not document and document is not None and
+                    document.pool is not None and
+                    document.pool.store is not None):
+                # Share identical component classes loaded from different
+                # documents
+                self._target = document.pool.store.add(self._target)
 
     @property
     def name(self):
@@ -3,10 +3,13 @@ standard_library.install_aliases()
 from past.builtins import basestring  # @IgnorePep8
 import os.path  # @IgnorePep8
 import re  # @IgnorePep8
+from json import dump as dump_json, load as load_json  # @IgnorePep8
+import hashlib  # @IgnorePep8
 import time  # @IgnorePep8
 import weakref  # @IgnorePep8
 from urllib.request import urlopen  # @IgnorePep8
 import contextlib  # @IgnorePep8
+import sympy  # @IgnorePep8
 from nineml.exceptions import (  # @IgnorePep8
     NineMLSerializationError, NineMLIOError, NineMLReloadDocumentException,
     NineMLSerializerNotImportedError)
@@ -40,6 +43,14 @@ try:
     from .hdf5 import HDF5Serializer, HDF5Unserializer
 except ImportError:
     HDF5Serializer = HDF5Unserializer = None
+from .pool import DocumentPool  # @IgnorePep8
+from nineml.visitors.equality import Fingerprinter  # @IgnorePep8
+from .remote import UrlCache  # @IgnorePep8
+
+
+# The version of the format of the files the digests of incrementally written
+# elements are stored in (see '_digests_path')
+DIGESTS_FORMAT_VERSION = 1
 
 
 ext_to_format = {
@@ -64,7 +75,8 @@ format_to_unserializer = {
     'hdf5': HDF5Unserializer}
 
 
-def read(url, relative_to=None, reload=False, register=True, **kwargs):  # @ReservedAssignment @IgnorePep8
+def read(url, relative_to=None, reload=False, register=True, pool=None,  # @ReservedAssignment @IgnorePep8
+         prefetch=False, only=None, **kwargs):
     """
     Reads a NineML document from the given url or file system path and returns
     a Document object.
@@ -84,6 +96,22 @@ def read(url, relative_to=None, reload=False, register=True, **kwargs):  # @Rese
         or not.
     register : bool
         Whether to store the document in the cache after it is read
+    pool : DocumentPool | None
+        A pool of documents to load the document from (and resolve its
+        references to other documents through) instead of the cache
+    prefetch : bool
+        Whether to fetch the remote documents and data files referenced by the
+        document (directly or indirectly) concurrently before it is
+        unserialized. If a pool is not provided, one is created for the
+        document with a UrlCache in the default cache directory.
+    only : list(str) | None
+        The names of the elements to load from the document. If provided, a
+        partial document containing only the requested elements and the
+        elements they reference (directly or indirectly) is returned. Partial
+        documents are not stored in the cache or the pool, although their
+        references to other documents are resolved through the pool. The XML
+        format is parsed incrementally so that the other elements are
+        discarded as they are parsed.
     """
     if not isinstance(url, basestring):
         raise NineMLIOError(
@@ -98,46 +126,37 @@ def read(url, relative_to=None, reload=False, register=True, **kwargs):  # @Rese
             if relative_to is None:
                 relative_to = os.getcwd()
             url = os.path.abspath(os.path.join(relative_to, url))
-        mtime = time.ctime(os.path.getmtime(url))
-    elif url_re.match(url) is not None:
-        mtime = None  # Cannot load mtime of a general URL
-    else:
+    elif url_re.match(url) is None:
         raise NineMLIOError(
             "{} is not a valid URL or file path (NB: relative file paths must "
             "start with './')".format(url))
-    if reload:
-        nineml.Document.registry.pop(url, None)
-    try:  # Try to use cached document in registry
-        doc_ref, loaded_mtime = nineml.Document.registry[url]
-        if loaded_mtime != mtime or doc_ref() is None or not register:
-            raise NineMLReloadDocumentException()
-        doc = doc_ref()
-    except (KeyError, NineMLReloadDocumentException):  # Reload from file
-        # Get the unserializer based on the url extension
-        format = format_from_url(url)  # @ReservedAssignment
-        try:
-            Unserializer = format_to_unserializer[format]
-        except KeyError:
-            raise NineMLSerializationError(
-                "Unrecognised format '{}' in url '{}', can be one of '{}'"
-                .format(format, url,
-                        "', '".join(list(format_to_unserializer.keys()))))
-        if Unserializer is None:
-            raise NineMLSerializerNotImportedError(
-                "Cannot write to '{}' as {} serializer cannot be imported. "
-                "Please check the required dependencies are correctly "
-                "installed".format(url, format))
+    if prefetch and pool is None:
+        pool = DocumentPool(cache=UrlCache())
+    if prefetch:
+        pool.prefetch(url, reload=reload, **kwargs)
+        reload = False
+    if only is not None:
+        # Partial documents aren't cached as they don't contain all the
+        # elements of the document at the url
+        doc = _read_url(url, pool=pool, only=only, **kwargs)
+    elif pool is not None:
+        doc = pool.document(url, reload=reload, **kwargs)
+    else:
         if file_path_re.match(url) is not None:
-            file = open(url)  # @ReservedAssignment
-        elif url_re.match(url) is not None:
-            file = urlopen(url)  # @ReservedAssignment
+            mtime = time.ctime(os.path.getmtime(url))
         else:
-            raise NineMLIOError(
-                "Unrecognised url '{}'".format(url))
-        with contextlib.closing(file):
-            doc = Unserializer(root=file, url=url, **kwargs).unserialize()
-        if register:
-            nineml.Document.registry[url] = weakref.ref(doc), mtime
+            mtime = None  # Cannot load mtime of a general URL
+        if reload:
+            nineml.Document.registry.pop(url, None)
+        try:  # Try to use cached document in registry
+            doc_ref, loaded_mtime = nineml.Document.registry[url]
+            if loaded_mtime != mtime or doc_ref() is None or not register:
+                raise NineMLReloadDocumentException()
+            doc = doc_ref()
+        except (KeyError, NineMLReloadDocumentException):  # Reload from file
+            doc = _read_url(url, **kwargs)
+            if register:
+                nineml.Document.registry[url] = weakref.ref(doc), mtime
     if name is not None:
         nineml_obj = doc[name]
     else:
@@ -145,6 +164,48 @@ def read(url, relative_to=None, reload=False, register=True, **kwargs):  # @Rese
     return nineml_obj
 
 
+def _read_url(url, **kwargs):
+    """
+    Unserializes the document at the (absolute) url with the unserializer
+    corresponding to its extension
+    """
+    return _url_unserializer(url, **kwargs).unserialize()
+
+
+def _url_unserializer(url, pool=None, **kwargs):
+    """
+    Parses the document at the (absolute) url with the unserializer
+    corresponding to its extension and returns the unserializer, ready to
+    unserialize the elements of the document. Remote urls are opened through
+    the cache of the pool, if provided.
+    """
+    format = format_from_url(url)  # @ReservedAssignment
+    try:
+        Unserializer = format_to_unserializer[format]
+    except KeyError:
+        raise NineMLSerializationError(
+            "Unrecognised format '{}' in url '{}', can be one of '{}'"
+            .format(format, url,
+                    "', '".join(list(format_to_unserializer.keys()))))
+    if Unserializer is None:
+        raise NineMLSerializerNotImportedError(
+            "Cannot write to '{}' as {} serializer cannot be imported. "
+            "Please check the required dependencies are correctly "
+            "installed".format(url, format))
+    if file_path_re.match(url) is not None:
+        file = open(url)  # @ReservedAssignment
+    elif url_re.match(url) is not None:
+        if pool is not None and pool.cache is not None:
+            file = pool.cache.open(url)  # @ReservedAssignment
+        else:
+            file = urlopen(url)  # @ReservedAssignment
+    else:
+        raise NineMLIOError(
+            "Unrecognised url '{}'".format(url))
+    with contextlib.closing(file):
+        return Unserializer(root=file, url=url, pool=pool, **kwargs)
+
+
 def write(url, *nineml_objects, **kwargs):
     """
     Writes NineML objects or single document to file given by a path
@@ -159,8 +220,35 @@ def write(url, *nineml_objects, **kwargs):
         Whether to store the document in the cache after writing
     version : str | float | int
         The version to serialize the NineML objects to
+    incremental : bool
+        Whether to only serialize the document-level elements that have
+        changed since the document was last written incrementally to the url
+        and reuse the serializations of the unchanged elements in the
+        existing file. Changes are detected by comparing digests of the
+        elements taken when they were written, which are stored in a hidden
+        file next to the written file ('.<file-name>.nineml-digests') so that
+        they can be used by other processes. Falls back to a full write if the
+        format doesn't support incremental writes or the file has been
+        modified since.
+    num_processes : int | None
+        The number of worker processes to serialize the document-level
+        elements in. The output is identical to that of a sequential write.
+        Formats that don't support serializing elements into separate
+        fragments (e.g. HDF5) are written sequentially.
+    stream : bool
+        Whether to write each document-level element to file as soon as it
+        is serialized instead of serializing the complete document first,
+        which reduces the memory used to write large documents. The output is
+        identical to that of a normal write. Formats that don't support
+        streaming (currently all but JSON) are written normally.
+    array_encoding : str | None
+        How the values of ArrayValues are serialized, either 'rows' (the
+        default) or 'base64', which writes the bytes of each array as a
+        compact base64 string in a versioned python-nineml extension
     """
     register = kwargs.pop('register', True)
+    incremental = kwargs.pop('incremental', False)
+    stream = kwargs.pop('stream', False)
     # Encapsulate the NineML element in a document if it is not already
     if len(nineml_objects) == 1 and isinstance(nineml_objects[0],
                                                nineml.Document):
@@ -182,18 +270,94 @@ def write(url, *nineml_objects, **kwargs):
             "Cannot write to '{}' as {} serializer cannot be "
             "imported. Please check the required dependencies are correctly "
             "installed".format(url, format))
+    reuse = None
+    if incremental:
+        fingerprinter = Fingerprinter(document=document)
+        digests = {e.name: _fingerprint_digest(fingerprinter.fingerprint(e))
+                   for e in document.elements}
+        if Serializer.supports_incremental:
+            reuse = _reusable_elems(url, Serializer, digests, kwargs)
     with Serializer.open_file(url) as file:  # @ReservedAssignment
         # file is passed to the serializer for serializations that store
         # elements dynamically, such as HDF5
-        serializer = Serializer(document=document, fname=file, **kwargs)
-        serializer.serialize()
-        serializer.to_file(serializer.root, file, **kwargs)
+        serializer = Serializer(document=document, fname=file, reuse=reuse,
+                                **kwargs)
+        if stream and serializer.supports_streaming and not reuse:
+            serializer.stream(file, **kwargs)
+        else:
+            serializer.serialize()
+            serializer.to_file(serializer.root, file, **kwargs)
+    digests_path = _digests_path(url)
+    if incremental and Serializer.supports_incremental:
+        stat = os.stat(url)
+        with open(digests_path, 'w') as f:
+            dump_json({'version': DIGESTS_FORMAT_VERSION,
+                       'mtime': stat.st_mtime, 'size': stat.st_size,
+                       'options': _options_repr(kwargs),
+                       'digests': digests}, f, sort_keys=True)
+    elif os.path.exists(digests_path):
+        os.remove(digests_path)
     if register:
         document._url = url
         nineml.Document.registry[url] = (weakref.ref(document),
                                          time.ctime(os.path.getmtime(url)))
 
 
+def _reusable_elems(url, Serializer, digests, options):
+    """
+    Returns the serial elements in the existing file at the url of the
+    document-level elements whose digests match those taken when they were
+    last written there, or None if there are none
+    """
+    try:
+        with open(_digests_path(url)) as f:
+            written = load_json(f)
+        stat = os.stat(url)
+    except (IOError, OSError, ValueError):
+        return None  # No (readable) digests of a previous incremental write
+    if (written.get('version') != DIGESTS_FORMAT_VERSION or
+            written.get('mtime') != stat.st_mtime or
+            written.get('size') != stat.st_size or
+            written.get('options') != _options_repr(options)):
+        return None  # File has been modified or was written differently
+    written = written.get('digests', {})
+    unchanged = [n for n, d in digests.items() if written.get(n) == d]
+    if not unchanged:
+        return None
+    elems = Serializer.reusable_elems(url)
+    return {n: elems[n] for n in unchanged if n in elems}
+
+
+def _digests_path(url):
+    """
+    The path of the file that the digests of the elements written
+    incrementally to the url are stored in
+    """
+    directory, fname = os.path.split(url)
+    return os.path.join(directory, '.{}.nineml-digests'.format(fname))
+
+
+def _fingerprint_digest(fingerprint):
+    """
+    A digest of a fingerprint that is the same in every process, so it can be
+    stored and compared with fingerprints taken in other processes
+    """
+    return hashlib.sha1(_stable_repr(fingerprint).encode('utf-8')).hexdigest()
+
+
+def _stable_repr(obj):
+    if isinstance(obj, tuple):
+        return '(' + ', '.join(_stable_repr(o) for o in obj) + ')'
+    elif isinstance(obj, sympy.Basic):
+        # The string representations of Sympy floats are rounded
+        return sympy.srepr(obj)
+    return repr(obj)
+
+
+def _options_repr(options):
+    return repr(sorted(options.items()))
+
+
 def serialize(nineml_object, format=DEFAULT_FORMAT, version=DEFAULT_VERSION,  # @ReservedAssignment @IgnorePep8
               document=None, to_str=False, **kwargs):
     """
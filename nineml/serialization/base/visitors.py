@@ -5,14 +5,17 @@ from builtins import object
 from future.utils import with_metaclass
 import os.path
 import re
+import multiprocessing
 from abc import ABCMeta, abstractmethod
 from nineml.exceptions import (
-    NineMLSerializationError, NineMLMissingSerializationError, NineMLNameError)
+    NineMLSerializationError, NineMLMissingSerializationError, NineMLNameError,
+    NineMLSerializationNotSupportedError)
 import nineml
 from nineml.reference import Reference
 from nineml.base import DocumentLevelObject
+from nineml.document import write_order_key
 from nineml.annotations import (
-    Annotations, PY9ML_NS, VALIDATION, DIMENSIONALITY)
+    Annotations, EMPTY_ANNOTATIONS, PY9ML_NS, VALIDATION, DIMENSIONALITY)
 from .. import DEFAULT_VERSION, NINEML_BASE_NS
 from nineml.serialization.base.nodes import NodeToSerialize, NodeToUnserialize
 from nineml.utils import is_file_handle
@@ -134,13 +137,62 @@ class BaseSerializer(with_metaclass(ABCMeta, BaseVisitor)):
     document : nineml.Document
         Document to serialize or use as a reference when serializing members
         of it
+    reuse : dict(str, <serial-element>) | None
+        Serial elements of document-level objects, keyed by name, to insert
+        in place of serializing the objects (e.g. the elements of an existing
+        serialization of the document that haven't changed). Only supported
+        by serializers that support incremental writes.
+    num_processes : int | None
+        The number of worker processes the document-level elements are
+        serialized in by 'serialize'. The elements are split into contiguous
+        chunks, which are serialized into separate fragments that are stitched
+        into the root in order, so the serialization is identical to the
+        sequential one. Ignored by serializers that don't support fragments.
+    array_encoding : str | None
+        How the values of ArrayValues are serialized, either 'rows' (the
+        default), which writes an ArrayValueRow element for each value, or
+        'base64', which writes the bytes of the array as a base64 string in
+        a versioned python-nineml extension element (in the python-nineml
+        namespace) that is more compact and faster to read for large arrays
     """
 
+    # Whether the serializer can reuse the elements of an existing
+    # serialization of a document (see 'reusable_elems')
+    supports_incremental = False
+
+    # Whether the document-level elements can be serialized into separate
+    # fragments and stitched together (see 'to_fragment' and 'add_fragment')
+    supports_fragments = False
+
+    # Whether the document can be written to file one element at a time (see
+    # 'stream')
+    supports_streaming = False
+
+    array_encodings = ('rows', 'base64')
+
+    # The number of chunks the elements are split into per worker process so
+    # that the load is balanced between the processes
+    CHUNKS_PER_PROCESS = 4
+
     def __init__(self, version=DEFAULT_VERSION, document=None,
-                 preserve_order=False, **kwargs):  # @UnusedVariable @IgnorePep8
+                 preserve_order=False, reuse=None, num_processes=None,
+                 array_encoding=None, **kwargs):  # @UnusedVariable
         if document is None:
             document = nineml.Document()
+        if reuse and not self.supports_incremental:
+            raise NineMLSerializationNotSupportedError(
+                "{} does not support reusing serial elements"
+                .format(type(self).__name__))
+        if array_encoding is None:
+            array_encoding = 'rows'
+        elif array_encoding not in self.array_encodings:
+            raise NineMLSerializationError(
+                "Unrecognised array encoding '{}', can be one of '{}'"
+                .format(array_encoding, "', '".join(self.array_encodings)))
         self.preserve_order = preserve_order
+        self.array_encoding = array_encoding
+        self._reuse = reuse
+        self._num_processes = num_processes
         super(BaseSerializer, self).__init__(version, document)
         self._root = self.create_root()
 
@@ -153,11 +205,69 @@ class BaseSerializer(with_metaclass(ABCMeta, BaseVisitor)):
         options : dict(str, object)
             Serialization format-specific options for the method
         """
-        self.document.serialize_node(
-            NodeToSerialize(self, self.root), **options)
+        if (self.supports_fragments and not self._reuse and
+                self._num_processes is not None and
+                self._num_processes > 1 and len(self.document) > 1):
+            self._serialize_in_parallel(**options)
+        else:
+            self.document.serialize_node(
+                NodeToSerialize(self, self.root), **options)
         serialized = self.root
         return serialized
 
+    def _serialize_in_parallel(self, **options):
+        """
+        Serializes contiguous chunks of the document-level elements into
+        fragments in a pool of worker processes and adds them to the root in
+        order
+        """
+        elements = self._ordered_elements()
+        num_processes = min(self._num_processes, len(elements))
+        chunk_size = -(-len(elements) //
+                       (num_processes * self.CHUNKS_PER_PROCESS))
+        chunks = [(start, start + chunk_size, options)
+                  for start in range(0, len(elements), chunk_size)]
+        # The elements are passed to the workers when they are started, which
+        # doesn't require them to be pickled where processes are forked
+        pool = multiprocessing.Pool(
+            num_processes, initializer=_init_fragment_worker,
+            initargs=(type(self), self.version, self.document,
+                      self.preserve_order, self.array_encoding, elements))
+        try:
+            for fragment in pool.imap(_serialize_fragment, chunks):
+                self.add_fragment(fragment)
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def _ordered_elements(self):
+        """
+        Returns the document-level elements in the order they are written in
+        by Document.serialize_node (and NodeToSerialize.children)
+        """
+        elements = sorted(self.document.elements, key=write_order_key)
+        if not self.preserve_order:
+            elements = sorted(elements, key=lambda o: str(o.key))
+        return elements
+
+    def stream(self, file, **options):  # @ReservedAssignment
+        """
+        Serializes the document provided to the __init__ method to file one
+        document-level element at a time, writing each element to the file
+        as it is serialized instead of building the complete serialization
+        of the document first
+
+        Parameters
+        ----------
+        file : file-handle
+            File handle in which to write serialized elements
+        options : dict(str, object)
+            Serialization format-specific options for the method
+        """
+        raise NineMLSerializationNotSupportedError(
+            "{} does not support streaming serialization"
+            .format(type(self).__name__))
+
     def visit(self, nineml_object, parent=None, reference=None,
               multiple=False, **options):
         """
@@ -184,6 +294,11 @@ class BaseSerializer(with_metaclass(ABCMeta, BaseVisitor)):
             Serialization format-specific options for the method
         """
         is_doc_level = isinstance(nineml_object, DocumentLevelObject)
+        if (self._reuse and is_doc_level and parent is self.root and
+                nineml_object.name in self._reuse):
+            serial_elem = self._reuse[nineml_object.name]
+            self.reuse_elem(serial_elem, parent, multiple=multiple, **options)
+            return serial_elem
         if not is_doc_level:
             assert reference is None, (
                 "'reference' kwarg can only be used with DocumentLevelObjects "
@@ -215,7 +330,7 @@ class BaseSerializer(with_metaclass(ABCMeta, BaseVisitor)):
                 nineml_object.serialize_node(node, **options)
             # Append annotations and indices to serialized elem if required
             try:
-                save_annotations = (nineml_object.annotations and
+                save_annotations = (nineml_object.has_annotations and
                                     not options.get('no_annotations', False))
             except AttributeError:
                 save_annotations = False
@@ -325,6 +440,81 @@ class BaseSerializer(with_metaclass(ABCMeta, BaseVisitor)):
             Serialization format-specific options for the method
         """
 
+    @classmethod
+    def reusable_elems(cls, url):
+        """
+        Parses an existing serialization of a document and returns its
+        document-level serial elements so that they can be reused when the
+        document is written again (see 'reuse')
+
+        Parameters
+        ----------
+        url : str
+            The path to the existing serialization
+
+        Returns
+        -------
+        elems : dict(str, <serial-element>)
+            The document-level serial elements keyed by name
+        """
+        raise NineMLSerializationNotSupportedError(
+            "{} does not support incremental writes".format(cls.__name__))
+
+    def reuse_elem(self, serial_elem, parent, **options):
+        """
+        Inserts a serial element returned by 'reusable_elems' into the parent
+        element
+
+        Parameters
+        ----------
+        serial_elem : <serial-element>
+            The serial element to insert
+        parent : <serial-element>
+            The element to insert it into
+        options : dict(str, object)
+            Serialization format-specific options for the method
+        """
+        raise NineMLSerializationNotSupportedError(
+            "{} does not support incremental writes"
+            .format(type(self).__name__))
+
+    def to_fragment(self, serial_elem, **options):
+        """
+        Converts a root serial element containing serialized document-level
+        elements into a fragment that can be passed between processes
+
+        Parameters
+        ----------
+        serial_elem : <serial-element>
+            The root element the document-level elements were serialized into
+        options : dict(str, object)
+            Serialization format-specific options for the method
+
+        Returns
+        -------
+        fragment : object
+            A picklable representation of the serialized elements
+        """
+        raise NineMLSerializationNotSupportedError(
+            "{} does not support serializing fragments"
+            .format(type(self).__name__))
+
+    def add_fragment(self, fragment, **options):
+        """
+        Appends the document-level elements in a fragment returned by
+        'to_fragment' to the root element
+
+        Parameters
+        ----------
+        fragment : object
+            A fragment returned by 'to_fragment'
+        options : dict(str, object)
+            Serialization format-specific options for the method
+        """
+        raise NineMLSerializationNotSupportedError(
+            "{} does not support serializing fragments"
+            .format(type(self).__name__))
+
     def _get_reference_url(self, nineml_object, reference=None,
                            ref_style='prefer', absolute_refs=False, **options):  # @UnusedVariable @IgnorePep8
         """
@@ -404,6 +594,30 @@ class BaseSerializer(with_metaclass(ABCMeta, BaseVisitor)):
         return open(url, 'wb')
 
 
+# The serializer and elements of the document being serialized in a worker
+# process of BaseSerializer._serialize_in_parallel
+_fragment_worker = None
+
+
+def _init_fragment_worker(serializer_cls, version, document, preserve_order,
+                          array_encoding, elements):
+    global _fragment_worker
+    _fragment_worker = (
+        serializer_cls(version=version, document=document,
+                       preserve_order=preserve_order,
+                       array_encoding=array_encoding), elements)
+
+
+def _serialize_fragment(chunk):
+    start, stop, options = chunk
+    serializer, elements = _fragment_worker
+    root = serializer.create_root()
+    for nineml_object in elements[start:stop]:
+        serializer.visit(nineml_object, parent=root, reference=False,
+                         multiple=True, **options)
+    return serializer.to_fragment(root, **options)
+
+
 class BaseUnserializer(with_metaclass(ABCMeta, BaseVisitor)):
     """
     Abstract base class for all unserializer classes
@@ -425,15 +639,30 @@ class BaseUnserializer(with_metaclass(ABCMeta, BaseVisitor)):
     document : nineml.Document
         Document to serialize or use as a reference when unserializing elements
         of it
+    pool : DocumentPool | None
+        The pool of documents that references to other documents are resolved
+        through
+    only : list(str) | None
+        The names of the document-level elements to load. If provided, only
+        the requested elements and the elements they reference (directly or
+        indirectly) are loaded by 'unserialize', and unserializers that
+        support streaming don't keep the serial elements of the other
+        elements in memory.
     """
 
+    # The load states of document-level elements
+    UNLOADED = 0
+    LOADING = 1
+    LOADED = 2
+
     def __init__(self, root, version=None, url=None, class_map=None, # @ReservedAssignment @IgnorePep8
-                 document=None):
+                 document=None, pool=None, only=None):
         if class_map is None:
             class_map = {}
         if document is None:
-            document = Document(unserializer=self, url=url)
+            document = Document(unserializer=self, url=url, pool=pool)
         self._url = url
+        self._only = list(only) if only is not None else None
         # Get root elem either from kwarg or file handle
         if hasattr(root, 'url'):
             self._root = self.from_urlfile(root)
@@ -481,22 +710,49 @@ class BaseUnserializer(with_metaclass(ABCMeta, BaseVisitor)):
                 try:
                     elem_cls = class_map[nineml_type]
                 except KeyError:
-                    elem_cls = self.get_nineml_class(nineml_type, elem)
+                    if self.major_version == 1 and nineml_type == 'Component':
+                        # The class of a v1 component depends on that of its
+                        # definition, which can be in another document, so it
+                        # is determined when the component is loaded
+                        elem_cls = None
+                    else:
+                        elem_cls = self.get_nineml_class(nineml_type, elem)
                 self._doc_elems[name] = (elem, elem_cls)
-        self._loaded_elems = []  # keeps track of loaded doc elements
+        # The load state of each document-level element (see 'load_state')
+        self._load_states = dict.fromkeys(self._doc_elems, self.UNLOADED)
 
     def unserialize(self):
         """
-        Unserializes the root element and all elements underneath it
+        Unserializes the root element and all elements underneath it (or
+        only the elements requested by 'only' and the elements they
+        reference)
         """
-        for name in self._doc_elems:
+        names = self._doc_elems if self._only is None else self._only
+        for name in names:
             # If a doc element is referenced in another it will be loaded and
             # added to the document so we need to check whether it still needs
             # to be loaded.
-            if name not in self._loaded_elems:
+            if self.load_state(name) == self.UNLOADED:
                 self.load_element(name)
+        if self._only is not None:
+            # Detach the document from the unserializer so that it only
+            # contains the elements that have been loaded
+            self.document._unserializer = None
         return self.document
 
+    def load_state(self, name):
+        """
+        Returns the load state of the document-level element named, one of
+        UNLOADED, LOADING (i.e. it or elements it references are being
+        loaded) or LOADED
+        """
+        try:
+            return self._load_states[name]
+        except KeyError:
+            raise NineMLNameError(
+                "'{}' was not found in the NineML document {}".format(
+                    name, self.url or ''))
+
     def load_element(self, name, **options):
         """
         Lazily loads the document-level object named and all elements it
@@ -515,10 +771,23 @@ class BaseUnserializer(with_metaclass(ABCMeta, BaseVisitor)):
                 "the document were '{}').".format(
                     name, self.url or '',
                     "', '".join(iter(self._doc_elems.keys()))))
-        nineml_object = self.visit(serial_elem, nineml_cls, **options)
-        AddToDocumentVisitor(self.document, **options).visit(nineml_object,
-                                                             **options)
-        self._loaded_elems.append(name)
+        if self._load_states[name] == self.LOADING:
+            raise NineMLSerializationError(
+                "Circular reference to '{}' found while loading it from the "
+                "NineML document {}".format(name, self.url or ''))
+        self._load_states[name] = self.LOADING
+        try:
+            if nineml_cls is None:
+                nineml_cls = self._get_v1_component_type(serial_elem)
+            nineml_object = self.visit(serial_elem, nineml_cls, **options)
+            AddToDocumentVisitor(self.document, **options).visit(
+                nineml_object, **options)
+        except:
+            # Allow the element to be loaded again (e.g. after the error has
+            # been fixed in a referenced document)
+            self._load_states[name] = self.UNLOADED
+            raise
+        self._load_states[name] = self.LOADED
         return nineml_object
 
     def visit(self, serial_elem, nineml_cls, allow_ref=False, **options):  # @UnusedVariable @IgnorePep8
@@ -574,6 +843,37 @@ class BaseUnserializer(with_metaclass(ABCMeta, BaseVisitor)):
         nineml_object._annotations = annotations
         return nineml_object
 
+    def referenced_urls(self, serial_elem=None):
+        """
+        Iterates over the urls of the documents and external data files
+        referenced by the document (or a serial element of it) without
+        unserializing it, so they can be fetched before they are needed
+
+        Parameters
+        ----------
+        serial_elem : <serial-element> | None
+            The serial element to search for references in. If None the root
+            of the document is searched
+
+        Returns
+        -------
+        urls : iterator((str, str))
+            An iterator over the nineml types of the elements containing the
+            references and the (absolute) urls they reference
+        """
+        if serial_elem is None:
+            serial_elem = self.root
+        for nineml_type, elem in self.get_all_children(serial_elem):
+            if 'url' in self.get_attr_keys(elem):
+                url = self.get_attr(elem, 'url')
+                if url.startswith('.') and self.url is not None:
+                    url = os.path.abspath(
+                        os.path.join(os.path.dirname(self.url), url))
+                if url != self.url:
+                    yield nineml_type, url
+            for ref in self.referenced_urls(elem):
+                yield ref
+
     @property
     def url(self):
         return self._url
@@ -581,6 +881,9 @@ class BaseUnserializer(with_metaclass(ABCMeta, BaseVisitor)):
     def keys(self):
         return iter(self._doc_elems.keys())
 
+    def __contains__(self, name):
+        return name in self._doc_elems
+
     @property
     def root(self):
         return self._root
@@ -849,7 +1152,7 @@ class BaseUnserializer(with_metaclass(ABCMeta, BaseVisitor)):
                                            check_unprocessed=False)
             annotations = Annotations.unserialize_node(annot_node, **options)
         except NineMLMissingSerializationError:
-            annotations = Annotations()  # No annotations found
+            annotations = EMPTY_ANNOTATIONS  # No annotations found
         return annotations
 
     def _set_load_options_from_annotations(self, options, annotations):
@@ -899,7 +1202,7 @@ class BaseUnserializer(with_metaclass(ABCMeta, BaseVisitor)):
             url = None
         if url is not None and url != self.url:
             defn_cls = type(
-                Reference(name, self.document, url=url).target)
+                Reference(name=name, document=self.document, url=url).target)
         else:
             try:
                 elem_type, doc_elem = next(
@@ -1,6 +1,6 @@
 from builtins import zip
 from nineml.exceptions import NineMLSerializationNotSupportedError
-from itertools import repeat, chain
+from itertools import repeat
 from . import NINEML_BASE_NS
 from collections import OrderedDict
 from nineml.document import Document
@@ -16,6 +16,8 @@ class DictSerializer(BaseSerializer):
     Is used as the base class for the Pickle, JSON and YAML serializers
     """
 
+    supports_fragments = True
+
     def create_elem(self, name, parent, namespace=None, multiple=False,  # @UnusedVariable @IgnorePep8
                     **options):  # @UnusedVariable
         elem = OrderedDict()
@@ -57,6 +59,15 @@ class DictSerializer(BaseSerializer):
             nineml_type = Document.nineml_type
         return {nineml_type: serial_elem}
 
+    def to_fragment(self, serial_elem, **options):  # @UnusedVariable
+        return serial_elem
+
+    def add_fragment(self, fragment, **options):  # @UnusedVariable
+        # Document-level elements are always serialized into lists
+        for name, elems in fragment.items():
+            if name != self.NS_ATTR:
+                self.root.setdefault(name, []).extend(elems)
+
 
 class DictUnserializer(BaseUnserializer):
     """
@@ -65,6 +76,12 @@ class DictUnserializer(BaseUnserializer):
     unserializers
     """
 
+    def __init__(self, *args, **kwargs):
+        # The attribute names and children of each serial element that has
+        # been visited, keyed by the id of the element (see '_index')
+        self._indices = {}
+        super(DictUnserializer, self).__init__(*args, **kwargs)
+
     def get_child(self, parent, nineml_type, **options):  # @UnusedVariable
         try:
             child = parent[nineml_type]
@@ -89,10 +106,7 @@ class DictUnserializer(BaseUnserializer):
         return iter(children)
 
     def get_all_children(self, parent, **options):  # @UnusedVariable
-        return chain(
-            ((n, e) for n, e in parent.items() if isinstance(e, dict)),
-            *(zip(repeat(n), e) for n, e in parent.items()
-              if isinstance(e, list)))
+        return iter(self._index(parent)[2])
 
     def get_attr(self, serial_elem, name, **options):  # @UnusedVariable
         try:
@@ -117,9 +131,7 @@ class DictUnserializer(BaseUnserializer):
         return body
 
     def get_attr_keys(self, serial_elem, **options):  # @UnusedVariable
-        return (n for n, e in serial_elem.items()
-                if not self._is_child(e) and n not in (self.BODY_ATTR,
-                                                       self.NS_ATTR))
+        return iter(self._index(serial_elem)[1])
 
     def get_namespace(self, serial_elem, **options):  # @UnusedVariable
         try:
@@ -146,3 +158,28 @@ class DictUnserializer(BaseUnserializer):
     @classmethod
     def _is_child(cls, elem):
         return isinstance(elem, (dict, list))
+
+    def _index(self, serial_elem):
+        """
+        Splits the entries of a serial element into attribute names and
+        (nineml_type, child) pairs the first time the element is visited, so
+        the entries aren't scanned each time they are requested. Singleton
+        children precede the children in lists.
+        """
+        try:
+            return self._indices[id(serial_elem)]
+        except KeyError:
+            attr_keys = []
+            children = []
+            multiple = []
+            for name, value in serial_elem.items():
+                if isinstance(value, dict):
+                    children.append((name, value))
+                elif isinstance(value, list):
+                    multiple.extend(zip(repeat(name), value))
+                elif name not in (self.BODY_ATTR, self.NS_ATTR):
+                    attr_keys.append(name)
+            # The element is stored in the index so that its id isn't reused
+            index = self._indices[id(serial_elem)] = (
+                serial_elem, attr_keys, children + multiple)
+            return index
@@ -1,34 +1,221 @@
 from __future__ import absolute_import
+from collections import OrderedDict
+import math
 import json
 from .dict import DictSerializer, DictUnserializer
+# Faster JSON encoders/decoders are used if they are installed. Their output
+# is only used where it is equivalent to that of the standard library
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+# The fast encoders write JSON without whitespace so the standard library
+# encoder uses the same separators when it falls back
+if orjson is not None or ujson is not None:
+    SEPARATORS = (',', ':')
+else:
+    SEPARATORS = (', ', ': ')
+
+
+def dumps(obj):
+    """
+    Encodes an object as JSON with the fastest encoder available. Falls back
+    to the standard library for objects the fast encoders don't encode the
+    same way (e.g. orjson encodes NaN as null and doesn't escape non-ASCII
+    characters)
+    """
+    encoded = _fast_dumps(obj)
+    if encoded is None:
+        encoded = _std_dumps(obj)
+    return encoded
+
+
+def _fast_dumps(obj):
+    """
+    Encodes an object as JSON with orjson or ujson, returning None if neither
+    is installed or they don't encode the object the same way as the standard
+    library
+    """
+    try:
+        if orjson is not None:
+            encoded = orjson.dumps(obj)
+            # orjson encodes NaN and infinity as null, so the object is only
+            # searched for them if the encoding contains null
+            if b'null' not in encoded or not _has_non_finite(obj):
+                return encoded.decode('ascii')
+        elif ujson is not None:
+            # ujson encodes infinity as Inf instead of Infinity
+            encoded = ujson.dumps(obj, ensure_ascii=True,
+                                  escape_forward_slashes=False)
+            if 'Inf' not in encoded or not _has_non_finite(obj):
+                return encoded
+    except (TypeError, ValueError, OverflowError):
+        pass  # UnicodeDecodeError is a subclass of ValueError
+    return None
+
+
+def _std_dumps(obj):
+    return json.dumps(obj, separators=SEPARATORS)
+
+
+def _has_non_finite(obj):
+    """
+    Whether the object or the lists and dicts it contains contain a NaN or
+    infinite float
+    """
+    to_check = [obj]
+    while to_check:
+        obj = to_check.pop()
+        if isinstance(obj, float):
+            if math.isnan(obj) or math.isinf(obj):
+                return True
+        elif isinstance(obj, dict):
+            to_check.extend(obj.values())
+        elif isinstance(obj, (list, tuple)):
+            to_check.extend(obj)
+    return False
+
+
+def loads(string):
+    """
+    Decodes JSON with the fastest decoder available. Falls back to the
+    standard library for JSON the fast decoders reject (e.g. NaN and
+    Infinity) or to report errors
+    """
+    try:
+        if orjson is not None:
+            return orjson.loads(string)
+        elif ujson is not None:
+            return ujson.loads(string)
+    except ValueError:  # orjson.JSONDecodeError is a subclass of ValueError
+        pass
+    return json.loads(string)
 
 
 class JSONSerializer(DictSerializer):
     """
-    A Serializer class that serializes to JSON
+    A Serializer class that serializes to JSON. If orjson or ujson are
+    installed they are used to encode the JSON unless non-default options are
+    passed to the standard library encoder.
     """
 
+    supports_streaming = True
+
     def to_file(self, serial_elem, file, skipkeys=False, ensure_ascii=True, #   @IgnorePep8 @ReservedAssignment
                 check_circular=True, allow_nan=True, cls=None, indent=None,
                 separators=None, default=None,
                 sort_keys=False, **options):  # @UnusedVariable
-        json.dump(self.to_elem(serial_elem, **options), file,
-                  skipkeys=skipkeys,
-                  ensure_ascii=ensure_ascii, check_circular=check_circular,
-                  allow_nan=allow_nan, cls=cls, indent=indent,
-                  separators=separators, default=default,
-                  sort_keys=sort_keys)
+        if self._default_options(skipkeys, ensure_ascii, check_circular,
+                                 allow_nan, cls, indent, separators, default,
+                                 sort_keys):
+            file.write(dumps(self.to_elem(serial_elem, **options)))
+        else:
+            json.dump(self.to_elem(serial_elem, **options), file,
+                      skipkeys=skipkeys,
+                      ensure_ascii=ensure_ascii, check_circular=check_circular,
+                      allow_nan=allow_nan, cls=cls, indent=indent,
+                      separators=separators, default=default,
+                      sort_keys=sort_keys)
 
     def to_str(self, serial_elem, skipkeys=False, ensure_ascii=True,
                 check_circular=True, allow_nan=True, cls=None, indent=None,
                 separators=None, default=None,
                 sort_keys=False, **options):  # @UnusedVariable  @IgnorePep8
+        if self._default_options(skipkeys, ensure_ascii, check_circular,
+                                 allow_nan, cls, indent, separators, default,
+                                 sort_keys):
+            return dumps(self.to_elem(serial_elem, **options))
         return json.dumps(self.to_elem(serial_elem, **options),
                           skipkeys=skipkeys, ensure_ascii=ensure_ascii,
                           check_circular=check_circular, allow_nan=allow_nan,
                           cls=cls, indent=indent, separators=separators,
                           default=default, sort_keys=sort_keys)
 
+    def stream(self, file, skipkeys=False, ensure_ascii=True, #   @IgnorePep8 @ReservedAssignment
+               check_circular=True, allow_nan=True, cls=None, indent=None,
+               separators=None, default=None, sort_keys=False, **options):
+        """
+        Writes the document to file one document-level element at a time,
+        encoding each element as soon as it is serialized so that the
+        serialization of the complete document is never held in memory. The
+        output is identical to that of 'serialize' followed by 'to_file'.
+        Falls back to writing the complete document if non-default options
+        are passed to the JSON encoder or the file isn't seekable (as the
+        document is rewritten if the fast encoder can't encode an element).
+        """
+        if not (self._default_options(skipkeys, ensure_ascii, check_circular,
+                                      allow_nan, cls, indent, separators,
+                                      default, sort_keys) and
+                file.seekable()):
+            self.serialize(**options)
+            self.to_file(self.root, file, skipkeys=skipkeys,
+                         ensure_ascii=ensure_ascii,
+                         check_circular=check_circular, allow_nan=allow_nan,
+                         cls=cls, indent=indent, separators=separators,
+                         default=default, sort_keys=sort_keys)
+            return
+        # The encoder is chosen for the whole document so the output is the
+        # same as that of 'to_file'. If an element can't be encoded by the
+        # fast encoder the document is rewritten with the standard library
+        start = file.tell()
+        if ((orjson is None and ujson is None) or
+                not self._stream(file, _fast_dumps, **options)):
+            file.seek(start)
+            file.truncate()
+            self._stream(file, _std_dumps, **options)
+
+    def _stream(self, file, encode, **options):
+        """
+        Writes the document to file one document-level element at a time
+        using the given encoder, returning False if the encoder can't encode
+        an element
+        """
+        item_sep, key_sep = SEPARATORS
+        # Elements are grouped into lists by type in the order each type
+        # first appears, as they are in the root element by 'serialize'
+        by_type = OrderedDict()
+        for element in self._ordered_elements():
+            by_type.setdefault(self.node_name(type(element)),
+                               []).append(element)
+        # The encoded document without any elements, minus the closing braces
+        header = encode(self.to_elem(self.create_root()))
+        if header is None:
+            return False
+        file.write(header[:-2])
+        for node_name, elements in by_type.items():
+            file.write(item_sep + _std_dumps(node_name) + key_sep + '[')
+            for i, element in enumerate(elements):
+                root = self.create_root()
+                self.visit(element, parent=root, reference=False,
+                           multiple=True, **options)
+                encoded = encode(root[node_name][0])
+                if encoded is None:
+                    return False
+                if i:
+                    file.write(item_sep)
+                file.write(encoded)
+            file.write(']')
+        file.write('}}')
+        return True
+
+    @classmethod
+    def _default_options(cls, skipkeys, ensure_ascii, check_circular,
+                         allow_nan, json_cls, indent, separators, default,
+                         sort_keys):
+        """
+        Whether the options passed to the JSON encoder are the defaults, in
+        which case the fastest available encoder can be used
+        """
+        return (not skipkeys and ensure_ascii and check_circular and
+                allow_nan and json_cls is None and indent is None and
+                separators is None and default is None and not sort_keys)
+
     @classmethod
     def open_file(cls, url):
         return open(url, 'w')
@@ -36,11 +223,16 @@ class JSONSerializer(DictSerializer):
 
 class JSONUnserializer(DictUnserializer):
     """
-    A Unserializer class that unserializes JSON
+    A Unserializer class that unserializes JSON. If orjson or ujson are
+    installed they are used to decode the JSON.
     """
 
     def from_file(self, file, encoding=None, **options):  # @ReservedAssignment @UnusedVariable @IgnorePep8
+        if encoding is None:
+            return self.from_elem(loads(file.read()), **options)
         return self.from_elem(json.load(file, encoding=encoding), **options)
 
     def from_str(self, string, encoding=None, **options):  # @UnusedVariable
+        if encoding is None:
+            return self.from_elem(loads(string), **options)
         return self.from_elem(json.loads(string, encoding=encoding), **options)
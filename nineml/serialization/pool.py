@@ -0,0 +1,328 @@
+"""
+A bounded pool of loaded documents, which is used to resolve references
+between documents so that each document is only loaded once
+
+:copyright: Copyright 2010-2017 by the NineML Python team, see AUTHORS.
+:license: BSD-3, see LICENSE for details.
+"""
+from builtins import object
+from collections import OrderedDict, defaultdict
+import os.path
+import threading
+from nineml.exceptions import NineMLUsageError
+
+
+class DocumentPool(object):
+    """
+    Holds strong references to the documents it loads, keyed by url, and
+    resolves the references of the documents it loads to other documents
+    through itself. A model that references a library of documents therefore
+    loads each document in the library once, however many times it is
+    referenced.
+
+    The documents each document references (its dependencies) are recorded as
+    it is loaded, so that when a document changes it and the documents that
+    depend on it (directly or indirectly) can be invalidated and reloaded
+    without reloading the rest of the pool.
+
+    Unlike the document registry used by ``nineml.read``, the modification
+    times of files are not checked each time a document is requested unless
+    'check_modified' is set. Modified files can be detected on demand with
+    'refresh'.
+
+    If the pool has a UrlCache, remote documents are opened through it and
+    the documents and data files referenced by a document can be fetched
+    concurrently before it is loaded with 'prefetch'.
+
+    If the pool has a ComponentClassStore, the component classes of the
+    documents it loads are added to the store and references to component
+    classes in other documents are resolved to the copies shared by the
+    store, so identical component classes copied between documents are only
+    held once by the objects that reference them. The duplicates themselves
+    are only freed once their documents are evicted from the pool (see
+    'max_size').
+
+    Parameters
+    ----------
+    max_size : int | None
+        The maximum number of documents held in the pool, beyond which the
+        least recently used documents are evicted. If None the size of the
+        pool is unbounded.
+    check_modified : bool
+        Whether to check the modification times of files each time they are
+        requested and reload them if they have changed
+    cache : UrlCache | None
+        The cache remote documents and data files are fetched through
+    store : ComponentClassStore | None
+        The store used to share identical component classes between documents
+    """
+
+    def __init__(self, max_size=None, check_modified=False, cache=None,
+                 store=None):
+        if max_size is not None and max_size < 1:
+            raise NineMLUsageError(
+                "Maximum size of document pool must be at least 1 ({} "
+                "provided)".format(max_size))
+        self._max_size = max_size
+        self._check_modified = check_modified
+        self._cache = cache
+        self._store = store
+        # Documents in order of least to most recently used
+        self._documents = OrderedDict()
+        self._mtimes = {}
+        self._dependencies = defaultdict(set)
+        # Unserializers of prefetched documents, which have been parsed but
+        # not unserialized
+        self._parsed = {}
+        # The urls of the documents that are being loaded, the last of which
+        # depends on the documents requested while it is loaded
+        self._loading = []
+        self._lock = threading.RLock()
+        self._num_loads = 0
+
+    def __repr__(self):
+        return "{}({} documents, max_size={})".format(
+            type(self).__name__, len(self), self._max_size)
+
+    def __getstate__(self):
+        # Locks (and parsed documents) cannot be pickled
+        state = self.__dict__.copy()
+        del state['_lock']
+        state['_parsed'] = {}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._documents)
+
+    def __contains__(self, url):
+        return url in self._documents
+
+    def __iter__(self):
+        return iter(list(self._documents))
+
+    @property
+    def max_size(self):
+        return self._max_size
+
+    @property
+    def cache(self):
+        return self._cache
+
+    @property
+    def store(self):
+        return self._store
+
+    @property
+    def num_loads(self):
+        """The number of documents that have been loaded by the pool"""
+        return self._num_loads
+
+    def document(self, url, reload=False, **kwargs):
+        """
+        Returns the document at the url, loading it if it isn't in the pool.
+
+        Parameters
+        ----------
+        url : str
+            The absolute path or url of the document
+        reload : bool
+            Whether to invalidate the document (and the documents that depend
+            on it) and load it again
+        kwargs : dict
+            Keyword arguments passed to the unserializer if the document is
+            loaded
+        """
+        with self._lock:
+            if reload or (self._check_modified and url in self._documents and
+                          self._modified(url)):
+                self.invalidate(url)
+            if self._loading:
+                self._dependencies[self._loading[-1]].add(url)
+            try:
+                doc = self._documents.pop(url)
+            except KeyError:
+                if url in self._loading:
+                    raise NineMLUsageError(
+                        "Circular reference to '{}' found while loading "
+                        "documents ('{}')".format(
+                            url, "' -> '".join(self._loading)))
+                self._loading.append(url)
+                try:
+                    try:
+                        unserializer = self._parsed.pop(url)
+                    except KeyError:
+                        unserializer = nineml.serialization._url_unserializer(
+                            url, pool=self, **kwargs)
+                    doc = unserializer.unserialize()
+                finally:
+                    self._loading.pop()
+                if self._store is not None:
+                    for element in doc.elements:
+                        self._store.add(element)
+                self._num_loads += 1
+                self._mtimes[url] = self._mtime(url)
+            # (Re)insert at the most recently used end
+            self._documents[url] = doc
+            self._evict()
+            return doc
+
+    def prefetch(self, url, reload=False, **kwargs):
+        """
+        Fetches the remote documents and data files referenced by the document
+        at the url, and by the documents they reference in turn, into the
+        cache of the pool. The references of each level of the reference
+        tree are fetched concurrently and the fetched documents are parsed
+        (but not unserialized), so that loading the document doesn't wait on
+        each reference in turn.
+
+        Parameters
+        ----------
+        url : str
+            The absolute path or url of the document
+        reload : bool
+            Whether to invalidate the document (and the documents that depend
+            on it) before it is prefetched
+        kwargs : dict
+            Keyword arguments passed to the unserializer of the documents
+
+        Returns
+        -------
+        fetched : list(str)
+            The remote urls that were fetched (or revalidated)
+        """
+        if self._cache is None:
+            raise NineMLUsageError(
+                "Cannot prefetch references of '{}' as the document pool does "
+                "not have a UrlCache".format(url))
+        with self._lock:
+            if reload:
+                self.invalidate(url)
+            fetched = []
+            found = set([url])
+            doc_urls = [url]
+            array_urls = []
+            while doc_urls or array_urls:
+                fetched.extend(self._cache.fetch_all(doc_urls + array_urls,
+                                                     ignore_errors=True))
+                to_parse = doc_urls
+                doc_urls = []
+                array_urls = []
+                for doc_url in to_parse:
+                    # The references of loaded documents are already loaded
+                    if doc_url in self._documents or doc_url in self._parsed:
+                        continue
+                    try:
+                        unserializer = nineml.serialization._url_unserializer(
+                            doc_url, pool=self, **kwargs)
+                    except (NineMLUsageError, IOError):
+                        continue  # Errors are raised when it is loaded
+                    self._parsed[doc_url] = unserializer
+                    for nineml_type, ref_url in unserializer.referenced_urls():
+                        if ref_url not in found:
+                            found.add(ref_url)
+                            if nineml_type == 'ExternalArrayValue':
+                                array_urls.append(ref_url)
+                            else:
+                                doc_urls.append(ref_url)
+            return fetched
+
+    def dependencies(self, url):
+        """
+        Returns the urls of the documents the document at the url references
+        directly
+        """
+        return set(self._dependencies.get(url, ()))
+
+    def dependents(self, url):
+        """
+        Returns the urls of the documents in the pool that depend on the
+        document at the url, either directly or indirectly
+        """
+        dependents = set()
+        to_check = [url]
+        while to_check:
+            checking = to_check.pop()
+            for dependent, dependencies in self._dependencies.items():
+                if checking in dependencies and dependent not in dependents:
+                    dependents.add(dependent)
+                    to_check.append(dependent)
+        dependents.discard(url)
+        return dependents
+
+    def invalidate(self, url):
+        """
+        Removes the document at the url and the documents that depend on it
+        from the pool, so they are reloaded the next time they are requested
+
+        Returns
+        -------
+        invalidated : list(str)
+            The urls of the documents that were removed from the pool
+        """
+        with self._lock:
+            invalidated = []
+            for to_remove in [url] + sorted(self.dependents(url)):
+                if self._remove(to_remove):
+                    invalidated.append(to_remove)
+            return invalidated
+
+    def refresh(self):
+        """
+        Invalidates the documents loaded from files that have been modified
+        since they were loaded (and the documents that depend on them)
+
+        Returns
+        -------
+        invalidated : list(str)
+            The urls of the documents that were removed from the pool
+        """
+        with self._lock:
+            invalidated = []
+            for url in [u for u in self._documents if self._modified(u)]:
+                invalidated.extend(self.invalidate(url))
+            return invalidated
+
+    def clear(self):
+        with self._lock:
+            self._documents.clear()
+            self._parsed.clear()
+            self._mtimes.clear()
+            self._dependencies.clear()
+
+    def _remove(self, url):
+        self._parsed.pop(url, None)
+        self._mtimes.pop(url, None)
+        self._dependencies.pop(url, None)
+        return self._documents.pop(url, None) is not None
+
+    def _evict(self):
+        """
+        Evicts the least recently used documents that aren't being loaded
+        until the pool is within its maximum size
+        """
+        if self._max_size is None:
+            return
+        for url in list(self._documents):
+            if len(self._documents) <= self._max_size:
+                break
+            if url not in self._loading:
+                self._remove(url)
+
+    def _modified(self, url):
+        return self._mtime(url) != self._mtimes.get(url)
+
+    @classmethod
+    def _mtime(cls, url):
+        if nineml.serialization.file_path_re.match(url) is None:
+            return None  # Cannot load mtime of a general URL
+        try:
+            return os.path.getmtime(url)
+        except OSError:
+            return None
+
+
+import nineml.serialization  # @IgnorePep8
@@ -0,0 +1,293 @@
+"""
+A disk cache of remote documents and data files that validates its entries
+with the ETag and Last-Modified headers returned by the server, and fetches
+multiple urls concurrently
+
+:copyright: Copyright 2010-2017 by the NineML Python team, see AUTHORS.
+:license: BSD-3, see LICENSE for details.
+"""
+from future import standard_library
+standard_library.install_aliases()
+from builtins import object  # @IgnorePep8
+from urllib.request import urlopen, Request  # @IgnorePep8
+from urllib.error import HTTPError  # @IgnorePep8
+from multiprocessing.pool import ThreadPool  # @IgnorePep8
+import contextlib  # @IgnorePep8
+import hashlib  # @IgnorePep8
+import json  # @IgnorePep8
+import os.path  # @IgnorePep8
+import shutil  # @IgnorePep8
+import tempfile  # @IgnorePep8
+import threading  # @IgnorePep8
+import time  # @IgnorePep8
+from nineml.exceptions import NineMLIOError  # @IgnorePep8
+try:
+    from os import replace as replace_file
+except ImportError:
+    from os import rename as replace_file  # Python 2 (POSIX only)
+
+
+def _default_cache_dir():
+    """
+    The per-user directory remote urls are cached in by default, i.e.
+    '$XDG_CACHE_HOME/nineml/urls' ('~/.cache/nineml/urls' if it isn't set), or
+    a directory suffixed with the user's id in the system temporary directory
+    if the home directory can't be determined
+    """
+    cache_home = os.environ.get('XDG_CACHE_HOME')
+    if not cache_home:
+        home = os.path.expanduser('~')
+        if home == '~':
+            try:
+                user = str(os.getuid())
+            except AttributeError:  # Windows
+                user = os.environ.get('USERNAME', 'default')
+            return os.path.join(tempfile.gettempdir(),
+                                'nineml-url-cache-{}'.format(user))
+        cache_home = os.path.join(home, '.cache')
+    return os.path.join(cache_home, 'nineml', 'urls')
+
+
+DEFAULT_CACHE_DIR = _default_cache_dir()
+
+
+class UrlCache(object):
+    """
+    Stores the contents of remote urls on the local disk, along with the ETag
+    and Last-Modified headers returned by the server. Cached entries are
+    revalidated with conditional requests (If-None-Match/If-Modified-Since)
+    the first time they are requested by the cache object, so unchanged
+    urls are not downloaded again. Once validated, entries are trusted for
+    'max_age' seconds so that urls that have been prefetched can be opened
+    without another round trip.
+
+    Local file paths are not cached and are returned unchanged.
+
+    Parameters
+    ----------
+    cache_dir : str | None
+        The directory the cached files are stored in, which is created (only
+        accessible by the user) if it doesn't exist. If None a per-user
+        directory shared between processes is used (see DEFAULT_CACHE_DIR)
+    num_threads : int
+        The maximum number of urls that are fetched concurrently
+    timeout : float | None
+        The timeout (in seconds) of each request
+    max_age : float | None
+        The number of seconds a validated entry is trusted for before it is
+        revalidated. If None entries are only validated once by the cache
+        object
+    """
+
+    def __init__(self, cache_dir=None, num_threads=8, timeout=None,
+                 max_age=None):
+        if cache_dir is None:
+            cache_dir = DEFAULT_CACHE_DIR
+        if not os.path.exists(cache_dir):
+            try:
+                os.makedirs(cache_dir, 0o700)
+            except OSError:
+                if not os.path.isdir(cache_dir):  # Created by another process
+                    raise
+        self._cache_dir = cache_dir
+        self._num_threads = num_threads
+        self._timeout = timeout
+        self._max_age = max_age
+        # The times the urls were last validated
+        self._validated = {}
+        self._lock = threading.Lock()
+        self._num_requests = 0
+        self._num_downloads = 0
+
+    def __repr__(self):
+        return "{}('{}')".format(type(self).__name__, self._cache_dir)
+
+    @property
+    def cache_dir(self):
+        return self._cache_dir
+
+    @property
+    def num_requests(self):
+        """The number of requests made to servers (including revalidations)"""
+        return self._num_requests
+
+    @property
+    def num_downloads(self):
+        """The number of requests that downloaded the contents of a url"""
+        return self._num_downloads
+
+    def is_remote(self, url):
+        return nineml.serialization.url_re.match(url) is not None
+
+    def is_valid(self, url):
+        """
+        Whether the cached entry for the url has been validated within
+        'max_age' seconds
+        """
+        try:
+            validated = self._validated[url]
+        except KeyError:
+            return False
+        return self._max_age is None or time.time() - validated < self._max_age
+
+    def path(self, url):
+        """
+        Returns the path to a local copy of the url, fetching or revalidating
+        it if required
+        """
+        if not self.is_remote(url):
+            return url
+        if not self.is_valid(url):
+            self.fetch(url)
+        return self._body_path(url)
+
+    def open(self, url):  # @ReservedAssignment
+        """
+        Opens a local copy of the url, fetching or revalidating it if required
+        """
+        return open(self.path(url), 'rb')
+
+    def fetch(self, url):
+        """
+        Fetches the url, or revalidates the cached copy of it if present
+
+        Parameters
+        ----------
+        url : str
+            The remote url to fetch
+
+        Returns
+        -------
+        path : str
+            The path to the local copy of the url
+        """
+        body_path = self._body_path(url)
+        headers = {}
+        metadata = self._metadata(url)
+        if metadata is not None and os.path.exists(body_path):
+            if metadata.get('etag') is not None:
+                headers['If-None-Match'] = metadata['etag']
+            if metadata.get('last_modified') is not None:
+                headers['If-Modified-Since'] = metadata['last_modified']
+        kwargs = {}
+        if self._timeout is not None:
+            kwargs['timeout'] = self._timeout
+        with self._lock:
+            self._num_requests += 1
+        try:
+            response = urlopen(Request(url, headers=headers), **kwargs)
+        except HTTPError as e:
+            if e.code != 304 or not headers:
+                raise NineMLIOError(
+                    "Could not fetch '{}' ({})".format(url, e))
+            # Not modified so the cached copy is still valid
+            e.close()
+        except IOError as e:
+            raise NineMLIOError("Could not fetch '{}' ({})".format(url, e))
+        else:
+            with contextlib.closing(response):
+                # Write to a temporary file and then move it into place so
+                # other threads/processes never see a partially written file
+                fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir)
+                with os.fdopen(fd, 'wb') as f:
+                    shutil.copyfileobj(response, f)
+                replace_file(tmp_path, body_path)
+                metadata = {'url': url,
+                            'etag': response.headers.get('ETag'),
+                            'last_modified': response.headers.get(
+                                'Last-Modified')}
+                fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir)
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(metadata, f)
+                replace_file(tmp_path, self._metadata_path(url))
+            with self._lock:
+                self._num_downloads += 1
+        self._validated[url] = time.time()
+        return body_path
+
+    def fetch_all(self, urls, ignore_errors=False):
+        """
+        Fetches the remote urls that haven't been validated concurrently
+
+        Parameters
+        ----------
+        urls : iterable(str)
+            The urls to fetch. Local file paths are skipped
+        ignore_errors : bool
+            Whether to skip urls that cannot be fetched instead of raising an
+            error (e.g. when prefetching urls that may not be required)
+
+        Returns
+        -------
+        fetched : list(str)
+            The urls that were fetched (or revalidated)
+        """
+        to_fetch = sorted(set(u for u in urls
+                              if self.is_remote(u) and not self.is_valid(u)))
+        if not to_fetch:
+            return []
+
+        def fetch(url):
+            try:
+                self.fetch(url)
+            except NineMLIOError as e:
+                return e
+            return None
+
+        if len(to_fetch) == 1:
+            errors = [fetch(to_fetch[0])]
+        else:
+            pool = ThreadPool(min(self._num_threads, len(to_fetch)))
+            try:
+                errors = pool.map(fetch, to_fetch)
+            finally:
+                pool.close()
+                pool.join()
+        failed = [(u, e) for u, e in zip(to_fetch, errors) if e is not None]
+        if failed and not ignore_errors:
+            raise NineMLIOError(
+                "Could not fetch the following urls:\n{}".format(
+                    '\n'.join(str(e) for _, e in failed)))
+        return [u for u, e in zip(to_fetch, errors) if e is None]
+
+    def invalidate(self, url):
+        """
+        Removes the cached copy of the url
+        """
+        self._validated.pop(url, None)
+        for path in (self._body_path(url), self._metadata_path(url)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def clear(self):
+        """
+        Removes all entries from the cache
+        """
+        self._validated.clear()
+        for fname in os.listdir(self._cache_dir):
+            os.remove(os.path.join(self._cache_dir, fname))
+
+    def _metadata(self, url):
+        try:
+            with open(self._metadata_path(url)) as f:
+                metadata = json.load(f)
+        except (IOError, ValueError):
+            return None
+        # Guard against (extremely unlikely) hash collisions
+        return metadata if metadata.get('url') == url else None
+
+    def _body_path(self, url):
+        # Keep the extension of the url so the format of the cached copy can
+        # be determined from its path
+        return self._entry_path(url) + os.path.splitext(
+            url.split('?')[0].split('#')[0])[1]
+
+    def _metadata_path(self, url):
+        return self._entry_path(url) + '.meta'
+
+    def _entry_path(self, url):
+        return os.path.join(self._cache_dir,
+                            hashlib.sha1(url.encode('utf-8')).hexdigest())
+
+
+import nineml.serialization  # @IgnorePep8
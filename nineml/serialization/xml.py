@@ -1,4 +1,6 @@
 import re
+import io
+from past.builtins import basestring
 from future.utils import native_str_to_bytes, bytes_to_native_str
 from lxml import etree
 from lxml.builder import ElementMaker
@@ -30,6 +32,8 @@ class XMLSerializer(BaseSerializer):
     "Serializer class for the XML format"
 
     supports_bodies = True
+    supports_incremental = True
+    supports_fragments = True
 
     def __init__(self, version=DEFAULT_VERSION, document=None, **kwargs):  # @UnusedVariable @IgnorePep8
         super(XMLSerializer, self).__init__(version=version, document=document,
@@ -72,6 +76,35 @@ class XMLSerializer(BaseSerializer):
     def to_elem(self, serial_elem, **options):  # @UnusedVariable
         return serial_elem
 
+    @classmethod
+    def reusable_elems(cls, url):
+        # Blank text is removed so reused elements are indented the same as
+        # new ones when pretty printed
+        parser = etree.XMLParser(remove_blank_text=True)
+        try:
+            root = etree.parse(url, parser).getroot()
+        except (etree.LxmlError, IOError) as e:
+            raise NineMLSerializationError(
+                "Could not parse existing file '{}': \n{}".format(url, e))
+        elems = {}
+        for elem in root.iterchildren(tag=etree.Element):
+            name = elem.get('name', elem.get('symbol'))
+            if name is not None:
+                elems[name] = elem
+        return elems
+
+    def reuse_elem(self, serial_elem, parent, **options):  # @UnusedVariable
+        parent.append(serial_elem)
+
+    def to_fragment(self, serial_elem, **options):  # @UnusedVariable
+        # Serialized without whitespace so the elements are indented the same
+        # as ones serialized in the root when pretty printed
+        return etree.tostring(serial_elem)
+
+    def add_fragment(self, fragment, **options):  # @UnusedVariable
+        for elem in list(etree.fromstring(fragment)):
+            self.root.append(elem)
+
 
 class XMLUnserializer(BaseUnserializer):
     "Unserializer class for the XML format"
@@ -130,6 +163,8 @@ class XMLUnserializer(BaseUnserializer):
 
     def from_file(self, file):  # @ReservedAssignment
         try:
+            if self._only is not None:
+                return self._parse_closure(file)
             xml = etree.parse(file)
         except (etree.LxmlError, IOError) as e:
             try:
@@ -141,6 +176,70 @@ class XMLUnserializer(BaseUnserializer):
                 .format(name, e))
         return xml.getroot()
 
+    def _parse_closure(self, file):  # @ReservedAssignment
+        """
+        Parses the file incrementally, discarding the document-level elements
+        that cannot be referenced by the requested elements (see 'only') as
+        they are parsed.
+
+        Any attribute value or text of a kept element that matches the name
+        of a document-level element is treated as a possible reference to it,
+        which can only overestimate the elements that need to be kept.
+        Elements are typically written after the elements that reference them
+        so a single pass is usually enough, otherwise the file is parsed again
+        to pick up the referenced elements that were discarded.
+        """
+        if isinstance(file, io.TextIOBase):
+            file = file.name  # lxml can only parse files opened in bytes mode
+        elif not isinstance(file, basestring):
+            # Buffer streams (e.g. url responses) so they can be reparsed
+            file = io.BytesIO(file.read())
+        required = set(self._only)
+        discarded = {}  # Possible references of the discarded elements
+        root = None
+        for event, elem in etree.iterparse(file, events=('start', 'end'),
+                                           remove_comments=True):
+            if root is None:
+                root = elem
+            if event == 'start' or elem.getparent() is not root:
+                continue
+            name = elem.get('name', elem.get('symbol'))
+            if name is None or name in required:
+                # Document annotations are always kept
+                required.update(self._possible_refs(elem))
+            else:
+                discarded[name] = self._possible_refs(elem)
+                elem.clear()
+                root.remove(elem)
+        # Add the discarded elements that are referenced by the kept elements
+        # and the elements those reference in turn
+        to_add = set()
+        to_check = required.intersection(discarded)
+        while to_check:
+            name = to_check.pop()
+            to_add.add(name)
+            to_check.update(discarded[name].intersection(discarded) - to_add)
+        if to_add:
+            if not isinstance(file, basestring):
+                file.seek(0)
+            for _, elem in etree.iterparse(file, remove_comments=True):
+                parent = elem.getparent()
+                if parent is not None and parent.getparent() is None:
+                    if elem.get('name', elem.get('symbol')) in to_add:
+                        root.append(elem)
+                    else:
+                        elem.clear()
+        return root
+
+    @classmethod
+    def _possible_refs(cls, elem):
+        refs = set()
+        for e in elem.iter(tag=etree.Element):
+            refs.update(e.attrib.values())
+            if e.text is not None:
+                refs.add(e.text.strip())
+        return refs
+
     def from_str(self, string, **options):  # @UnusedVariable
         try:
             return etree.fromstring(native_str_to_bytes(string))
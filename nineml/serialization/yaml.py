@@ -5,6 +5,8 @@ from collections import OrderedDict
 from nineml.document import Document
 import yaml
 try:
+    # Use the libyaml bindings if PyYAML was built with them, which parse and
+    # emit several times faster than the pure Python implementations
     from yaml import CLoader as Loader, CDumper as Dumper
 except ImportError:
     from yaml import Loader, Dumper  # @UnusedImport
@@ -28,31 +30,13 @@ class YAMLSerializer(DictSerializer):
     """
 
     def to_file(self, serial_elem, file, **options):
-        yaml.dump(self._prepare_dict(serial_elem, **options), stream=file,
+        yaml.dump(self.to_elem(serial_elem, **options), stream=file,
                   Dumper=Dumper)
 
     def to_str(self, serial_elem, **options):
         return yaml.dump(self.to_elem(serial_elem, **options),
                          Dumper=Dumper)
 
-    def _prepare_dict(self, elem_dict, **options):
-        elem_dict = self.to_elem(elem_dict, **options)
-        if PY3:
-            elem_dict = self.convert_to_bytes(elem_dict)
-        return elem_dict
-
-    @classmethod
-    def convert_to_bytes(cls, elem):
-        if isinstance(elem, str):
-            elem = native_str_to_bytes(elem)
-        elif isinstance(elem, list):
-            elem = [cls.convert_to_bytes(e) for e in elem]
-        elif isinstance(elem, dict):
-            elem = OrderedDict(
-                (native_str_to_bytes(n), cls.convert_to_bytes(e))
-                for n, e in elem.items())
-        return elem
-
     @classmethod
     def open_file(cls, url):
         return open(url, 'w')
@@ -72,12 +56,11 @@ class YAMLUnserializer(DictUnserializer):
     def _finalise_dict(self, elem_dict, nineml_type=None, **options):
         if nineml_type is None:
             nineml_type = Document.nineml_type
-        nineml_type = native_str_to_bytes(nineml_type)
-        elem_dict = self.from_elem(elem_dict, nineml_type=nineml_type,
-                                   **options)
-        if PY3:
+        if PY3 and native_str_to_bytes(nineml_type) in elem_dict:
+            # Files written under Python 3 by earlier versions store all
+            # strings as binary
             elem_dict = self.convert_from_bytes(elem_dict)
-        return elem_dict
+        return self.from_elem(elem_dict, nineml_type=nineml_type, **options)
 
     @classmethod
     def convert_from_bytes(cls, elem):
@@ -7,6 +7,7 @@ import operator
 from sympy import Symbol
 import sympy
 import math
+import numpy
 from nineml.base import AnnotatedNineMLObject, DocumentLevelObject
 from nineml.exceptions import (
     NineMLUsageError, NineMLDimensionError, NineMLValueError,
@@ -15,6 +16,20 @@ from nineml.utils import validate_identifier
 from functools import reduce
 
 
+# Canonical copies of the keys that determine the equality of dimensions and
+# units (their powers and offsets but not their names), so that the keys of
+# equal dimensions/units are the same object and can be compared by identity
+_intern_table = {}
+
+
+def intern_key(key):
+    """
+    Returns the canonical copy of the key of a dimension or unit, adding it
+    to the intern table if it isn't already present
+    """
+    return _intern_table.setdefault(key, key)
+
+
 class Dimension(AnnotatedNineMLObject, DocumentLevelObject):
     """
     Defines the dimension used for quantity units
@@ -41,10 +56,33 @@ class Dimension(AnnotatedNineMLObject, DocumentLevelObject):
             self._dims = tuple(kwargs.pop(d, 0)
                                for d in self.dimension_symbols)
         assert not len(kwargs), "Unrecognised kwargs ({})".format(kwargs)
+        self._dims = intern_key(self._dims)
+
+    @property
+    def intern_key(self):
+        """
+        Key that is the same object for all dimensions that are equal (i.e.
+        have the same powers of the base dimensions)
+        """
+        return self._dims
+
+    def __eq__(self, other):
+        if isinstance(other, Dimension):
+            return self._dims is other._dims
+        return super(Dimension, self).__eq__(other)
 
     def __ne__(self, other):
         return not (self == other)
 
+    def __hash__(self):
+        return hash(self._dims)
+
+    def __setstate__(self, state):
+        # Intern keys are only canonical within a process so are looked up
+        # again when unpickled
+        self.__dict__.update(state)
+        self._dims = intern_key(self._dims)
+
     def __repr__(self):
         return ("Dimension(name='{}'{})".format(
             self.name, ''.join(' {}={}'.format(n, p) if p != 0 else ''
@@ -286,10 +324,39 @@ class Unit(AnnotatedNineMLObject, DocumentLevelObject):
         self._dimension = dimension
         self._power = power
         self._offset = offset
+        self._intern_key = intern_key((dimension.intern_key, power, offset))
+
+    @property
+    def intern_key(self):
+        """
+        Key that is the same object for all units that are equal (i.e. have
+        the same dimension, power and offset)
+        """
+        return self._intern_key
+
+    def __eq__(self, other):
+        if isinstance(other, Unit):
+            return self._intern_key is other._intern_key
+        return super(Unit, self).__eq__(other)
 
     def __ne__(self, other):
         return not (self == other)
 
+    def __hash__(self):
+        return hash(self._intern_key)
+
+    def __getstate__(self):
+        # Intern keys are only canonical within a process so are looked up
+        # again when unpickled
+        state = self.__dict__.copy()
+        del state['_intern_key']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._intern_key = intern_key((self._dimension.intern_key,
+                                       self._power, self._offset))
+
     def __repr__(self):
         return ("Unit(name='{}', dimension='{}', power={}{})"
                 .format(self.name, self.dimension.name, self.power,
@@ -414,12 +481,16 @@ class Quantity(AnnotatedNineMLObject):
     Numerical values may either be numbers, or a component_class that generates
     numbers, e.g. a RandomDistribution instance.
     """
+    __slots__ = ('_annotations', '_value', '_units')
+
     nineml_type = 'Quantity'
     nineml_child = {'value': None,
                     'units': Unit}
 
     def __init__(self, value, units=None):
         super(Quantity, self).__init__()
+        if isinstance(value, QuantityArray):
+            value = value.to_quantity()
         if isinstance(value, Quantity):
             if units is not None:
                 value = value.in_units(units)
@@ -597,7 +668,9 @@ class Quantity(AnnotatedNineMLObject):
         Parses ints and floats as dimensionless quantities and
         python-quantities Quantity objects into 9ML Quantity objects
         """
-        if not isinstance(qty, cls):
+        if isinstance(qty, QuantityArray):
+            qty = qty.to_quantity()
+        elif not isinstance(qty, cls):
             # Assume it is a python quantities quantity and convert to
             # 9ML quantity
             try:
@@ -633,6 +706,276 @@ class Quantity(AnnotatedNineMLObject):
                      'UnitCurrent': 'i', 'UnitLuminousIntensity': 'j',
                      'UnitSubstance': 'n', 'UnitTemperature': 'k'}
 
+
+class QuantityArray(object):
+    """
+    An array of numerical values of any shape that share a single unit,
+    stored in a NumPy array so that arithmetic, unit conversions,
+    comparisons and reductions are performed as vectorised operations.
+
+    Operations between quantity arrays (or Quantity objects) with different
+    units of the same dimension convert the second operand into the units of
+    the first, and NumPy broadcasting rules apply to their shapes.
+
+    Parameters
+    ----------
+    values : numpy.ndarray | list(float) | ArrayValue | SingleValue |
+             Quantity | Property | QuantityArray
+        The values of the array. Float arrays (including the arrays of
+        ArrayValues) are used without copying. The units of quantities and
+        properties are used if 'units' is not provided.
+    units : Unit | None
+        The units of the values. If 'values' has units of its own it is
+        converted into these units. If None the units of 'values' are used, or
+        'unitless' if it doesn't have any.
+    """
+
+    # Make NumPy arrays defer to the reflected operators of this class when
+    # they are the left operand, so the units are preserved
+    __array_ufunc__ = None
+
+    def __init__(self, values, units=None):
+        values = getattr(values, 'quantity', values)  # Unwrap properties
+        if isinstance(values, Quantity):
+            values = QuantityArray(values.value, values.units)
+        if isinstance(values, QuantityArray):
+            if units is not None:
+                values = values._value_in_units(units)
+            else:
+                units = values.units
+                values = values.value
+        if isinstance(values, SingleValue):
+            values = values.value
+        elif isinstance(values, ArrayValue):
+            values = values.values
+        elif isinstance(values, RandomDistributionValue):
+            raise NineMLUsageError(
+                "Cannot create a quantity array from a random distribution "
+                "value, sample it first")
+        if units is None:
+            units = unitless
+        elif not isinstance(units, Unit):
+            raise NineMLUsageError(
+                "Units ({}) must be of type <Unit>".format(units))
+        self._values = numpy.asarray(values, dtype=float)
+        self._units = units
+
+    def __repr__(self):
+        return "QuantityArray({}, units='{}')".format(self._values,
+                                                      self._units.name)
+
+    @property
+    def value(self):
+        return self._values
+
+    @property
+    def values(self):
+        return self._values
+
+    @property
+    def units(self):
+        return self._units
+
+    @property
+    def dimension(self):
+        return self._units.dimension
+
+    @property
+    def shape(self):
+        return self._values.shape
+
+    @property
+    def ndim(self):
+        return self._values.ndim
+
+    @property
+    def size(self):
+        return self._values.size
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return (QuantityArray(v, self._units) for v in self._values)
+
+    def __getitem__(self, index):
+        return QuantityArray(self._values[index], self._units)
+
+    def __float__(self):
+        return float(self._values)
+
+    def in_units(self, units):
+        """
+        Returns the values as a NumPy array in terms of the given units
+        (dimensions must be equivalent). The array is not copied if the units
+        have the same power.
+        """
+        return self._value_in_units(units)
+
+    def set_units(self, units):
+        self._values = self._value_in_units(units)
+        self._units = units
+
+    def _value_in_units(self, units):
+        if units.dimension != self._units.dimension:
+            raise NineMLDimensionError(
+                "Can't convert quantity array dimension from '{}' to '{}'"
+                .format(self._units.dimension.name, units.dimension.name))
+        if units.power == self._units.power:
+            return self._values
+        return self._values * 10 ** (self._units.power - units.power)
+
+    def _scaled_value(self, qty):
+        """
+        Returns the values of the other operand of an addition, subtraction
+        or comparison in the units of this array
+        """
+        if isinstance(qty, (Quantity, QuantityArray)):
+            qty = QuantityArray(qty)
+            if qty.units.dimension != self._units.dimension:
+                raise NineMLDimensionError(
+                    "Cannot scale value as dimensions do not match ('{}' and "
+                    "'{}')".format(self._units.dimension.name,
+                                   qty.units.dimension.name))
+            return qty._value_in_units(self._units)
+        if self._units.dimension != dimensionless:
+            raise NineMLDimensionError(
+                "Can only add/subtract/compare numbers with dimensionless "
+                "quantity arrays")
+        # Plain numbers have a power of 0
+        return numpy.asarray(qty, dtype=float) * 10 ** -self._units.power
+
+    def _operand(self, qty):
+        """
+        Returns the values and units of the other operand of a
+        multiplication or division
+        """
+        if isinstance(qty, Unit):
+            return 1.0, qty
+        elif isinstance(qty, (Quantity, QuantityArray)):
+            qty = QuantityArray(qty)
+            return qty.values, qty.units
+        return numpy.asarray(qty, dtype=float), None
+
+    def __add__(self, qty):
+        return QuantityArray(self._values + self._scaled_value(qty),
+                             self._units)
+
+    def __sub__(self, qty):
+        return QuantityArray(self._values - self._scaled_value(qty),
+                             self._units)
+
+    def __radd__(self, qty):
+        return self.__add__(qty)
+
+    def __rsub__(self, qty):
+        return QuantityArray(self._scaled_value(qty) - self._values,
+                             self._units)
+
+    def __mul__(self, qty):
+        values, units = self._operand(qty)
+        return QuantityArray(
+            self._values * values,
+            self._units if units is None else self._units * units)
+
+    def __rmul__(self, qty):
+        return self.__mul__(qty)
+
+    def __truediv__(self, qty):
+        values, units = self._operand(qty)
+        return QuantityArray(
+            self._values / values,
+            self._units if units is None else self._units / units)
+
+    def __rtruediv__(self, qty):
+        values, units = self._operand(qty)
+        return QuantityArray(
+            values / self._values,
+            (unitless if units is None else units) / self._units)
+
+    def __div__(self, qty):
+        return self.__truediv__(qty)
+
+    def __rdiv__(self, qty):
+        return self.__rtruediv__(qty)
+
+    def __pow__(self, power):
+        return QuantityArray(self._values ** power, self._units ** power)
+
+    def __neg__(self):
+        return QuantityArray(-self._values, self._units)
+
+    def __abs__(self):
+        return QuantityArray(numpy.abs(self._values), self._units)
+
+    def __lt__(self, qty):
+        return self._values < self._scaled_value(qty)
+
+    def __le__(self, qty):
+        return self._values <= self._scaled_value(qty)
+
+    def __gt__(self, qty):
+        return self._values > self._scaled_value(qty)
+
+    def __ge__(self, qty):
+        return self._values >= self._scaled_value(qty)
+
+    def __eq__(self, qty):
+        return self._values == self._scaled_value(qty)
+
+    def __ne__(self, qty):
+        return self._values != self._scaled_value(qty)
+
+    # Element-wise equality means quantity arrays can't be hashed
+    __hash__ = None
+
+    def sum(self, axis=None):
+        return QuantityArray(self._values.sum(axis=axis), self._units)
+
+    def mean(self, axis=None):
+        return QuantityArray(self._values.mean(axis=axis), self._units)
+
+    def min(self, axis=None):
+        return QuantityArray(self._values.min(axis=axis), self._units)
+
+    def max(self, axis=None):
+        return QuantityArray(self._values.max(axis=axis), self._units)
+
+    def std(self, axis=None, ddof=0):
+        return QuantityArray(self._values.std(axis=axis, ddof=ddof),
+                             self._units)
+
+    def var(self, axis=None, ddof=0):
+        return QuantityArray(self._values.var(axis=axis, ddof=ddof),
+                             self._units ** 2)
+
+    def to_value(self):
+        """
+        Returns the values as an ArrayValue (or a SingleValue if the array is
+        0-dimensional) sharing the same NumPy array
+        """
+        if self.ndim == 0:
+            return SingleValue(float(self._values))
+        elif self.ndim > 1:
+            raise NineMLUsageError(
+                "Only 1-dimensional quantity arrays can be converted to "
+                "ArrayValues ({} dimensions)".format(self.ndim))
+        return ArrayValue(self._values)
+
+    def to_quantity(self):
+        """
+        Returns the quantity array as a Quantity sharing the same NumPy array
+        """
+        return Quantity(self.to_value(), self._units)
+
+    def to_property(self, name):
+        """
+        Returns a Property with the given name whose quantity shares the same
+        NumPy array
+        """
+        return nineml.user.Property(name, self.to_quantity())
+
+
 # ----------------- #
 # Common dimensions #
 # ----------------- #
@@ -755,3 +1098,4 @@ pF_per_nA = Unit(name='pF_per_nA', dimension=voltage / time, power=-6)
 
 from nineml.values import (  # @IgnorePep8
     SingleValue, ArrayValue, RandomDistributionValue)
+import nineml  # @IgnorePep8
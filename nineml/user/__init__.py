@@ -2,7 +2,8 @@
 from .base import BaseULObject
 from .component import (Property, Component, Definition,
                         Prototype)
-from .randomdistribution import RandomDistributionProperties
+from .randomdistribution import (
+    RandomDistributionProperties, RandomDistributionSampler)
 from .population import Population
 from .dynamics import Initial, DynamicsProperties
 from .connectionrule import (
@@ -11,7 +12,10 @@ from .multi import MultiDynamics, MultiDynamicsProperties, append_namespace
 from .port_connections import (
     AnalogPortConnection, EventPortConnection)
 from .component_array import ComponentArray
-from .selection import Selection, Concatenate
+from .selection import Selection, Concatenate, SelectionIndex
 from .projection import Projection
 from .connection_group import AnalogConnectionGroup, EventConnectionGroup
 from .network import Network
+from .partition import NetworkPartition
+from .shared import SharedNetwork, SharedNetworkDescriptor
+from .delays import DelayAnalysis
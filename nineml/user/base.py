@@ -9,6 +9,8 @@ class BaseULObject(AnnotatedNineMLObject):
     Base class for user layer classes
     """
 
+    __slots__ = ()
+
     layer = 'user'
 
     def __init__(self, **kwargs):
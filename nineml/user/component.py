@@ -53,6 +53,8 @@ class Property(BaseULObject):
     Numerical values may either be numbers, or a component_class that generates
     numbers, e.g. a RandomDistribution instance.
     """
+    __slots__ = ('_annotations', '_name', '_quantity')
+
     nineml_type = "Property"
     nineml_attr = ('name',)
     nineml_child = {'quantity': Quantity}
@@ -157,6 +159,8 @@ class Component(with_metaclass(
     nineml_attr = ('name',)
     nineml_children = (Property,)
     nineml_child = {'definition': None}
+    # Properties not set locally are looked up in the prototype
+    index_elements = False
 
     # initial_values is temporary, the idea longer-term is to use a separate
     # library such as SEDML
@@ -0,0 +1,162 @@
+"""
+Analysis of the delays of the projections of a network, as required by
+distributed simulators to set communication intervals (from the minimum
+delay) and to size spike ring buffers (from the maximum delay/histogram).
+
+:copyright: Copyright 2010-2017 by the NineML Python team, see AUTHORS.
+:license: BSD-3, see LICENSE for details.
+"""
+from builtins import object
+from collections import OrderedDict
+import math
+import numpy
+import nineml.units as un
+from nineml.exceptions import NineMLUsageError
+from .randomdistribution import RandomDistributionSampler
+
+
+class DelayAnalysis(object):
+    """
+    Computes the limits and a histogram of the delays of a set of
+    projections in a single pass over arrays of their delays.
+
+    Single-valued delays are weighted by the expected number of connections
+    of their projection and array delays count once per connection. Randomly
+    distributed delays are sampled (up to 'num_samples' samples per
+    projection, each weighted so that they sum to the expected number of
+    connections). Their limits are either taken from the samples ('sample')
+    or from the analytic support of the distribution ('bounds'), which are
+    guaranteed to contain all delays but may be infinite.
+
+    Parameters
+    ----------
+    projections : iterable(Projection)
+        The projections to analyse
+    units : Unit
+        The time units the delays are returned in
+    bins : int | numpy.ndarray
+        The number of bins of the histogram or the edges of the bins
+    limits : str
+        How the limits of random delays are determined, either 'sample' or
+        'bounds'
+    num_samples : int
+        The maximum number of samples drawn from each random delay
+    random_seed : int | RandomDistributionSampler | None
+        The seed used to sample random delays
+    num_connections : dict(str, int) | None
+        The numbers of connections of the projections, keyed by projection
+        name. Projections not in the dictionary use their expected number of
+        connections.
+    """
+
+    SAMPLE = 'sample'
+    BOUNDS = 'bounds'
+
+    def __init__(self, projections, units=un.ms, bins=10, limits=SAMPLE,
+                 num_samples=10000, random_seed=None, num_connections=None):
+        if units.dimension != un.time:
+            raise NineMLUsageError(
+                "Delays can only be expressed in units of time, not '{}'"
+                .format(units.name))
+        if limits not in (self.SAMPLE, self.BOUNDS):
+            raise NineMLUsageError(
+                "Unrecognised method for the limits of random delays '{}' "
+                "(can be '{}' or '{}')".format(limits, self.SAMPLE,
+                                               self.BOUNDS))
+        if num_connections is None:
+            num_connections = {}
+        if not isinstance(random_seed, RandomDistributionSampler):
+            random_seed = RandomDistributionSampler(random_seed)
+        self._units = units
+        self._projection_limits = OrderedDict()
+        all_delays = []
+        all_weights = []
+        for projection in sorted(projections, key=lambda p: p.name):
+            value = projection.delay.value
+            scale = 10 ** (projection.delay.units.power - units.power)
+            if projection.name in num_connections:
+                num_conns = num_connections[projection.name]
+            else:
+                num_conns = projection.expected_num_connections()
+            if value.is_single():
+                delays = numpy.array([float(value)])
+                weights = numpy.array([float(num_conns)])
+            elif value.is_array():
+                delays = numpy.asarray(value.values, dtype=float)
+                weights = numpy.ones(len(delays))
+            else:
+                num = int(min(num_samples, max(math.ceil(num_conns), 1)))
+                delays = projection.delay_array(num_connections=num,
+                                                random_seed=random_seed)
+                weights = numpy.full(num, float(num_conns) / num)
+            delays = delays * scale
+            if value.is_random() and limits == self.BOUNDS:
+                lower, upper = value.distribution.support()
+                proj_limits = (lower * scale, upper * scale)
+            elif len(delays):
+                proj_limits = (float(delays.min()), float(delays.max()))
+            else:
+                continue
+            self._projection_limits[projection.name] = proj_limits
+            all_delays.append(delays)
+            all_weights.append(weights)
+        if self._projection_limits:
+            limits = numpy.array(list(self._projection_limits.values()))
+            self._min_delay = float(limits[:, 0].min())
+            self._max_delay = float(limits[:, 1].max())
+            delays = numpy.concatenate(all_delays)
+            self._counts, self._bin_edges = numpy.histogram(
+                delays, bins=bins, weights=numpy.concatenate(all_weights),
+                range=(float(delays.min()), float(delays.max())))
+        else:
+            self._min_delay = self._max_delay = 0.0
+            self._counts, self._bin_edges = numpy.histogram([], bins=bins,
+                                                            range=(0.0, 0.0))
+
+    def __repr__(self):
+        return "{}(min_delay={}, max_delay={}, units='{}')".format(
+            type(self).__name__, self._min_delay, self._max_delay,
+            self._units.name)
+
+    @property
+    def units(self):
+        return self._units
+
+    @property
+    def min_delay(self):
+        return self._min_delay
+
+    @property
+    def max_delay(self):
+        return self._max_delay
+
+    @property
+    def projection_limits(self):
+        """
+        The minimum and maximum delays of each projection, keyed by projection
+        name
+        """
+        return OrderedDict(self._projection_limits)
+
+    @property
+    def histogram(self):
+        """
+        The (weighted) number of connections in each bin of the histogram and
+        the edges of the bins
+        """
+        return self._counts, self._bin_edges
+
+    def ring_buffer_size(self, dt):
+        """
+        Returns the number of time steps a ring buffer needs to hold to
+        deliver events with all the delays
+
+        Parameters
+        ----------
+        dt : float
+            The time step (in the units of the analysis)
+        """
+        if math.isinf(self._max_delay):
+            raise NineMLUsageError(
+                "Cannot size ring buffer as the maximum delay is unbounded")
+        return int(math.ceil(self._max_delay / dt)) + 1
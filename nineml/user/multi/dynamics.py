@@ -269,6 +269,8 @@ class MultiDynamics(Dynamics):
                        AnalogSendPortExposure, AnalogReceivePortExposure,
                        AnalogReducePortExposure, EventSendPortExposure,
                        EventReceivePortExposure)
+    # Elements are generated from the sub-components on the fly
+    index_elements = False
 
     def __init__(self, name, sub_components, port_connections=None,
                  analog_port_connections=None, event_port_connections=None,
@@ -853,6 +855,7 @@ class MultiDynamics(Dynamics):
 class _MultiRegime(Regime):
 
     temporary = True
+    index_elements = False
 
     def __init__(self, sub_regimes, parent):
         """
@@ -1329,6 +1332,7 @@ class _MultiTransition(BaseALObject, ContainerObject):
     """
 
     temporary = True
+    index_elements = False
 
     def __init__(self, sub_transitions, parent):
         BaseALObject.__init__(self)
@@ -113,6 +113,13 @@ class _NamespaceObject(BaseNineMLObject):
     def annotations(self):
         return self._object.annotations
 
+    @property
+    def has_annotations(self):
+        return self._object.has_annotations
+
+    def get_annotation(self, key, *args, **kwargs):
+        return self._object.get_annotation(key, *args, **kwargs)
+
 
 class _NamespaceNamed(_NamespaceObject):
     """
@@ -6,6 +6,9 @@ import nineml.units as un
 from .population import Population
 from .projection import Projection
 from .selection import Selection
+from .partition import NetworkPartition
+from .shared import SharedNetwork
+from .delays import DelayAnalysis
 from . import BaseULObject
 from nineml.exceptions import name_error
 from nineml.base import DocumentLevelObject, ContainerObject
@@ -121,6 +124,36 @@ class Network(BaseULObject, DocumentLevelObject, ContainerObject):
     def connectivity_has_been_sampled(self):
         return any(p.connectivity.has_been_sampled() for p in self.projections)
 
+    def partition(self, num_ranks, strategy='round_robin', **kwargs):
+        """
+        Partitions the cells of the network across a number of ranks (see
+        NetworkPartition)
+
+        Parameters
+        ----------
+        num_ranks : int
+            The number of ranks to partition the cells across
+        strategy : str
+            Either 'round_robin' or 'balanced' (by expected synaptic load)
+        """
+        return NetworkPartition(self, num_ranks, strategy=strategy, **kwargs)
+
+    def export_shared(self, min_bytes=4096, name=None):
+        """
+        Flattens the network and exports it to shared memory so that worker
+        processes can attach zero-copy views of its large arrays (see
+        SharedNetwork)
+
+        Parameters
+        ----------
+        min_bytes : int
+            The size in bytes above which arrays are placed in shared memory
+        name : str | None
+            The name of the shared memory block. If None a unique name is
+            generated
+        """
+        return SharedNetwork(*self.flatten(), min_bytes=min_bytes, name=name)
+
     def delay_limits(self):
         """
         Returns the minimum delay and the maximum delay of projections in the
@@ -144,6 +177,19 @@ class Network(BaseULObject, DocumentLevelObject, ContainerObject):
                     min_delay = delay
         return {'min_delay': min_delay, 'max_delay': max_delay}
 
+    def delay_analysis(self, units=un.ms, **kwargs):
+        """
+        Returns the minimum/maximum and a histogram of the delays across all
+        projections of the network, handling randomly distributed delays by
+        sampling or their analytic bounds (see DelayAnalysis)
+
+        Parameters
+        ----------
+        units : Unit
+            The time units to return the delays in
+        """
+        return DelayAnalysis(self.projections, units=units, **kwargs)
+
     def serialize_node(self, node, **options):  # @UnusedVariable
         node.attr('name', self.name, **options)
         node.children(self.populations, **options)
@@ -0,0 +1,338 @@
+"""
+Partitioning of the cells of a Network across the ranks of a distributed
+simulation, and deterministic sampling of the connectivity owned by each rank
+(i.e. the incoming connections of its local cells).
+
+:copyright: Copyright 2010-2017 by the NineML Python team, see AUTHORS.
+:license: BSD-3, see LICENSE for details.
+"""
+from builtins import object, range
+from collections import OrderedDict
+import numpy
+from nineml.exceptions import NineMLUsageError
+from .selection import SelectionIndex
+from .randomdistribution import RandomDistributionSampler
+
+
+class NetworkPartition(object):
+    """
+    Assigns the cells of the populations of a network to a number of ranks
+    (e.g. MPI processes). The populations are concatenated in alphabetical
+    order of name and the cells of the concatenation are either dealt out to
+    the ranks in turn ('round_robin') or divided into contiguous ranges
+    with approximately equal expected synaptic load ('balanced'), where the
+    load of a cell is 'cell_weight' plus its expected number of incoming
+    connections.
+
+    The connections of a projection are sampled per destination cell (per
+    block of source cells for 'RandomFanOut' rules) from random streams
+    derived from a common seed, so each rank can sample the incoming
+    connections of its local cells without generating the global connection
+    list, and the sampled connectivity doesn't depend on the number of ranks.
+    Note that the sampled connectivity is therefore not the same as that
+    generated by Connectivity.connections.
+
+    Parameters
+    ----------
+    network : Network
+        The network to partition
+    num_ranks : int
+        The number of ranks to partition the cells across
+    strategy : str
+        Either 'round_robin' or 'balanced'
+    cell_weight : float
+        The load of a cell relative to that of an incoming connection, used
+        by the 'balanced' strategy
+    """
+
+    ROUND_ROBIN = 'round_robin'
+    BALANCED = 'balanced'
+    strategies = (ROUND_ROBIN, BALANCED)
+
+    def __init__(self, network, num_ranks, strategy=ROUND_ROBIN,
+                 cell_weight=1.0):
+        num_ranks = int(num_ranks)
+        if num_ranks < 1:
+            raise NineMLUsageError(
+                "Number of ranks must be at least 1 ({} provided)"
+                .format(num_ranks))
+        if strategy not in self.strategies:
+            raise NineMLUsageError(
+                "Unrecognised partitioning strategy '{}' (can be '{}')"
+                .format(strategy, "', '".join(self.strategies)))
+        self._network = network
+        self._num_ranks = num_ranks
+        self._strategy = strategy
+        self._populations = sorted(network.populations, key=lambda p: p.name)
+        sizes = [p.size for p in self._populations]
+        self._offsets = OrderedDict(
+            (p.name, o) for p, o in zip(self._populations,
+                                        numpy.cumsum([0] + sizes[:-1])))
+        self._num_cells = sum(sizes)
+        if strategy == self.BALANCED:
+            loads = self.expected_loads() + cell_weight
+            cumulative = numpy.cumsum(loads)
+            targets = (cumulative[-1] * numpy.arange(1, num_ranks) /
+                       num_ranks if len(cumulative) else numpy.zeros(
+                           num_ranks - 1))
+            self._boundaries = numpy.concatenate((
+                [0], numpy.searchsorted(cumulative, targets, side='right'),
+                [self._num_cells])).astype(numpy.int64)
+        else:
+            self._boundaries = None
+
+    def __repr__(self):
+        return "{}('{}', num_ranks={}, strategy='{}')".format(
+            type(self).__name__, self._network.name, self._num_ranks,
+            self._strategy)
+
+    @property
+    def network(self):
+        return self._network
+
+    @property
+    def num_ranks(self):
+        return self._num_ranks
+
+    @property
+    def strategy(self):
+        return self._strategy
+
+    @property
+    def num_cells(self):
+        return self._num_cells
+
+    def global_indices(self, population):
+        """
+        Returns the indices of the cells of a population or selection in the
+        concatenation of all populations of the network
+
+        Parameters
+        ----------
+        population : Population | Selection | str
+            The population/selection or its name
+        """
+        population = self._resolve(population)
+        index = SelectionIndex([population])
+        pop_indices, local_indices = index.to_local(numpy.arange(len(index)))
+        offsets = numpy.array([self._offsets[p.name]
+                               for p in index.populations], dtype=numpy.int64)
+        return offsets[pop_indices] + local_indices
+
+    def rank_of(self, population, indices=None):
+        """
+        Returns the ranks the cells of a population or selection are assigned
+        to
+
+        Parameters
+        ----------
+        population : Population | Selection | str
+            The population/selection or its name
+        indices : numpy.ndarray(int) | None
+            The indices of the cells within the population/selection. If None
+            the ranks of all cells are returned
+        """
+        global_indices = self.global_indices(population)
+        if indices is not None:
+            global_indices = global_indices[numpy.asarray(indices)]
+        if self._strategy == self.ROUND_ROBIN:
+            return global_indices % self._num_ranks
+        return numpy.searchsorted(self._boundaries, global_indices,
+                                  side='right') - 1
+
+    def local_cells(self, rank):
+        """
+        Returns the cells assigned to a rank
+
+        Parameters
+        ----------
+        rank : int
+            The rank to return the cells of
+
+        Returns
+        -------
+        cells : OrderedDict(str, range)
+            The indices of the local cells of each population (with any) keyed
+            by population name
+        """
+        self._check_rank(rank)
+        cells = OrderedDict()
+        for pop in self._populations:
+            offset = int(self._offsets[pop.name])
+            if self._strategy == self.ROUND_ROBIN:
+                local = range((rank - offset) % self._num_ranks, pop.size,
+                              self._num_ranks)
+            else:
+                local = range(
+                    min(max(int(self._boundaries[rank]) - offset, 0),
+                        pop.size),
+                    min(max(int(self._boundaries[rank + 1]) - offset, 0),
+                        pop.size))
+            if len(local):
+                cells[pop.name] = local
+        return cells
+
+    def local_indices(self, population, rank):
+        """
+        Returns the indices of the cells of a population or selection that
+        are assigned to a rank
+        """
+        self._check_rank(rank)
+        return numpy.flatnonzero(self.rank_of(population) == rank)
+
+    def expected_loads(self):
+        """
+        Returns the expected number of incoming connections of each cell of
+        the network, in the order of their global indices
+        """
+        loads = numpy.zeros(self._num_cells)
+        for projection in self._network.projections:
+            num_src = projection.pre.size
+            num_dest = projection.post.size
+            lib_type = projection.connectivity.lib_type
+            props = projection.connectivity.rule_properties
+            if lib_type == 'AllToAll':
+                incoming = numpy.full(num_dest, float(num_src))
+            elif lib_type == 'OneToOne':
+                incoming = numpy.ones(num_dest)
+            elif lib_type == 'Probabilistic':
+                incoming = numpy.full(
+                    num_dest,
+                    float(props.property('probability').value) * num_src)
+            elif lib_type == 'RandomFanIn':
+                incoming = numpy.full(num_dest,
+                                      float(props.property('number').value))
+            elif lib_type == 'RandomFanOut':
+                incoming = numpy.full(
+                    num_dest, (float(props.property('number').value) *
+                               num_src / num_dest))
+            elif lib_type == 'Explicit':
+                incoming = numpy.bincount(
+                    self._explicit_indices(props)[1],
+                    minlength=num_dest).astype(float)
+            else:
+                raise NineMLUsageError(
+                    "Unrecognised connection rule '{}'".format(lib_type))
+            numpy.add.at(loads, self.global_indices(projection.post),
+                         incoming)
+        return loads
+
+    def local_connections(self, projection, rank, random_seed):
+        """
+        Samples the connections of a projection whose destination cells are
+        assigned to the rank
+
+        Parameters
+        ----------
+        projection : Projection | str
+            The projection or its name
+        rank : int
+            The rank to sample the connections of
+        random_seed : int | RandomDistributionSampler
+            The root seed of the random streams the connectivity is sampled
+            from, which must be the same on all ranks
+
+        Returns
+        -------
+        sources : numpy.ndarray(int)
+            The indices of the source cells of the connections within the
+            pre-synaptic population/selection
+        destinations : numpy.ndarray(int)
+            The indices of the destination cells of the connections within the
+            post-synaptic population/selection, in ascending order
+        """
+        if isinstance(projection, str):
+            projection = self._network.projection(projection)
+        if random_seed is None:
+            raise NineMLUsageError(
+                "A random seed must be provided to sample the connectivity of "
+                "'{}' so it is consistent across ranks".format(
+                    projection.name))
+        if isinstance(random_seed, RandomDistributionSampler):
+            sampler = random_seed
+        else:
+            sampler = RandomDistributionSampler(random_seed)
+        num_src = projection.pre.size
+        num_dest = projection.post.size
+        local = self.local_indices(projection.post, rank)
+        lib_type = projection.connectivity.lib_type
+        props = projection.connectivity.rule_properties
+        if lib_type == 'AllToAll':
+            sources = numpy.tile(numpy.arange(num_src), len(local))
+            destinations = numpy.repeat(local, num_src)
+        elif lib_type == 'OneToOne':
+            sources = local.copy()
+            destinations = local
+        elif lib_type == 'Explicit':
+            sources, destinations = self._explicit_indices(props)
+            is_local = numpy.zeros(num_dest, dtype=bool)
+            is_local[local] = True
+            mask = is_local[destinations]
+            sources, destinations = sources[mask], destinations[mask]
+        elif lib_type == 'Probabilistic':
+            p = float(props.property('probability').value)
+            sources = [numpy.flatnonzero(
+                sampler.generator(projection.name, int(d)).random(num_src) < p)
+                for d in local]
+            destinations = numpy.repeat(local, [len(s) for s in sources])
+            sources = (numpy.concatenate(sources) if sources
+                       else numpy.empty(0, dtype=numpy.int64))
+        elif lib_type == 'RandomFanIn':
+            number = int(props.property('number').value)
+            sources = (numpy.concatenate([
+                sampler.generator(projection.name, int(d)).integers(
+                    0, num_src, number) for d in local]) if len(local)
+                else numpy.empty(0, dtype=numpy.int64))
+            destinations = numpy.repeat(local, number)
+        elif lib_type == 'RandomFanOut':
+            # The destinations of every source need to be sampled to find
+            # those that are local, which is done in blocks of sources to
+            # bound the memory used
+            number = int(props.property('number').value)
+            is_local = numpy.zeros(num_dest, dtype=bool)
+            is_local[local] = True
+            sources = []
+            destinations = []
+            for block_start in range(0, num_src, sampler.block_size):
+                block = numpy.arange(
+                    block_start, min(block_start + sampler.block_size,
+                                     num_src))
+                targets = sampler.generator(
+                    projection.name, 'fan_out',
+                    block_start // sampler.block_size).integers(
+                        0, num_dest, (len(block), number))
+                mask = is_local[targets]
+                sources.append(numpy.repeat(block, number)[mask.ravel()])
+                destinations.append(targets[mask])
+            sources = (numpy.concatenate(sources) if sources
+                       else numpy.empty(0, dtype=numpy.int64))
+            destinations = (numpy.concatenate(destinations) if destinations
+                            else numpy.empty(0, dtype=numpy.int64))
+        else:
+            raise NineMLUsageError(
+                "Unrecognised connection rule '{}'".format(lib_type))
+        order = numpy.argsort(destinations, kind='mergesort')
+        return (numpy.asarray(sources, dtype=numpy.int64)[order],
+                numpy.asarray(destinations, dtype=numpy.int64)[order])
+
+    def _resolve(self, population):
+        if isinstance(population, str):
+            try:
+                return self._network.population(population)
+            except KeyError:
+                return self._network.selection(population)
+        return population
+
+    def _check_rank(self, rank):
+        if not 0 <= rank < self._num_ranks:
+            raise NineMLUsageError(
+                "Rank {} is out of range for partition across {} ranks"
+                .format(rank, self._num_ranks))
+
+    @classmethod
+    def _explicit_indices(cls, props):
+        return (
+            numpy.asarray(props.property('sourceIndices').value.values,
+                          dtype=numpy.int64),
+            numpy.asarray(props.property('destinationIndices').value.values,
+                          dtype=numpy.int64))
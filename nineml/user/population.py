@@ -1,9 +1,12 @@
 from itertools import chain
+import numpy
 from . import BaseULObject
 from .dynamics import DynamicsProperties
 import nineml.user
 from nineml.base import DocumentLevelObject, DynamicPortsObject
 from nineml.utils import validate_identifier
+from nineml.exceptions import NineMLUsageError, NineMLValueError
+from .randomdistribution import RandomDistributionSampler
 
 
 class Population(BaseULObject, DocumentLevelObject, DynamicPortsObject):
@@ -88,6 +91,91 @@ class Population(BaseULObject, DocumentLevelObject, DynamicPortsObject):
     def attributes_with_units(self):
         return chain(*[c.attributes_with_units for c in self.all_components()])
 
+    def parameter_arrays(self, units=None, random_seed=None, rng=None,
+                         start=0, stop=None):
+        """
+        Returns the values of the properties and initial values of the cell
+        as arrays with one entry per cell in the population, so that they can
+        be consumed without looping over the cells in Python.
+
+        Single values are broadcast to the size of the population, array
+        values are checked against the size of the population (and returned
+        without copying where possible) and random distributions are sampled
+        for all cells in one call. The returned arrays are read-only.
+
+        Parameters
+        ----------
+        units : dict(str, Unit) | None
+            The units to express the values of given properties/initial values
+            in. Values not in the dictionary are returned in the units they
+            are specified in.
+        random_seed : int | RandomDistributionSampler | None
+            The root seed of the random streams used to sample random
+            distributions. Each property/initial value is sampled from its own
+            stream, keyed by the names of the population and property, so the
+            samples of a cell are the same whichever range of cells is
+            requested.
+        rng : numpy.random.Generator | None
+            A random number generator to sample random distributions with
+            directly (in alphabetical order of property name) instead of the
+            keyed streams of 'random_seed'
+        start : int
+            The index of the first cell to return the values of, e.g. the
+            first cell allocated to the local process
+        stop : int | None
+            The index after the last cell to return the values of. If None
+            the values up to the end of the population are returned
+
+        Returns
+        -------
+        arrays : dict(str, numpy.ndarray)
+            Arrays of length 'stop - start' keyed by property/initial value
+            name
+        """
+        if units is None:
+            units = {}
+        if stop is None:
+            stop = self.size
+        if rng is None:
+            if isinstance(random_seed, RandomDistributionSampler):
+                sampler = random_seed
+            else:
+                sampler = RandomDistributionSampler(random_seed)
+        quantities = dict((p.name, p.quantity) for p in chain(
+            self.cell.properties, self.cell.initial_values))
+        arrays = {}
+        # Iterate in sorted order so random samples are reproducible
+        for name, quantity in sorted(quantities.items()):
+            value = quantity.value
+            if value.is_single():
+                array = numpy.broadcast_to(numpy.float64(value.value),
+                                           (stop - start,))
+            elif value.is_array():
+                if len(value) != self.size:
+                    raise NineMLValueError(
+                        "Length of array value for '{}' ({}) does not match "
+                        "size of '{}' population ({})".format(
+                            name, len(value), self.name, self.size))
+                array = numpy.asarray(value.values,
+                                      dtype=numpy.float64)[start:stop]
+            elif rng is not None:
+                array = value.sample(self.size, rng=rng)[start:stop]
+            else:
+                array = sampler.sample(value, self.size, key=(self.name, name),
+                                       start=start, stop=stop)
+            if name in units:
+                if units[name].dimension != quantity.units.dimension:
+                    raise NineMLUsageError(
+                        "Cannot express '{}' in '{}' as its dimension is '{}'"
+                        .format(name, units[name].name,
+                                quantity.units.dimension.name))
+                array = array * 10 ** (quantity.units.power -
+                                       units[name].power)
+            array = array.view()
+            array.flags.writeable = False
+            arrays[name] = array
+        return arrays
+
     def serialize_node(self, node, **options):
         node.attr('name', self.name, **options)
         node.attr('Size', self.size, in_body=True, **options)
@@ -176,3 +264,4 @@ class Population(BaseULObject, DocumentLevelObject, DynamicPortsObject):
     @property
     def num_event_send_ports(self):
         return self.cell.num_event_send_ports
+
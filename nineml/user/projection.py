@@ -1,6 +1,7 @@
 # encoding: utf-8
 from past.builtins import basestring
 from itertools import chain
+import numpy
 from . import BaseULObject
 from nineml.exceptions import (
     NineMLMissingSerializationError, NineMLSerializationError)
@@ -9,13 +10,14 @@ from .dynamics import DynamicsProperties
 from .population import Population
 from .selection import Selection
 from .component import Quantity
+from .randomdistribution import RandomDistributionSampler
 from nineml.base import DocumentLevelObject, ContainerObject
 from nineml.utils import validate_identifier
 from nineml.abstraction.ports import EventReceivePort
 from .port_connections import (
     AnalogPortConnection, EventPortConnection, BasePortConnection)
 from nineml.values import SingleValue
-from nineml.exceptions import NineMLUsageError, name_error
+from nineml.exceptions import NineMLUsageError, NineMLValueError, name_error
 
 
 V1_DELAY_VALUE_TYPES = ('SingleValue', 'ArrayValue', 'ExternalArrayValue',
@@ -161,6 +163,110 @@ class Projection(BaseULObject, ContainerObject, DocumentLevelObject):
     def delay(self):
         return self._delay
 
+    def expected_num_connections(self):
+        """
+        Returns the expected number of connections of the projection, derived
+        from its connection rule without sampling the connectivity
+        """
+        num_src = self.pre.size
+        num_dest = self.post.size
+        lib_type = self.connectivity.lib_type
+        props = self.connection_rule_properties
+        if lib_type == 'AllToAll':
+            num = num_src * num_dest
+        elif lib_type == 'OneToOne':
+            num = num_dest
+        elif lib_type == 'Explicit':
+            num = len(props.property('sourceIndices').value)
+        elif lib_type == 'Probabilistic':
+            num = (float(self._single_rule_value('probability')) *
+                   num_src * num_dest)
+        elif lib_type == 'RandomFanIn':
+            num = int(self._single_rule_value('number')) * num_dest
+        elif lib_type == 'RandomFanOut':
+            num = int(self._single_rule_value('number')) * num_src
+        else:
+            raise NineMLUsageError(
+                "Unrecognised connection rule '{}'".format(lib_type))
+        return num
+
+    def _single_rule_value(self, name):
+        value = self.connection_rule_properties.property(name).value
+        if not value.is_single():
+            raise NineMLUsageError(
+                "Cannot derive the expected number of connections of '{}' "
+                "projection as its '{}' connection rule property is not a "
+                "single value ({}), so it must be supplied explicitly (e.g. "
+                "via the 'num_connections' argument of the delay analysis)"
+                .format(self.name, name, value))
+        return value
+
+    def delay_array(self, num_connections=None, units=None, random_seed=None,
+                    rng=None, start=0, stop=None):
+        """
+        Returns the delays of the connections of the projection as an array,
+        sampling random distributions for all connections in one call.
+
+        Parameters
+        ----------
+        num_connections : int | None
+            The number of connections in the projection. If None, the
+            connections of the connectivity are counted
+        units : Unit | None
+            The units to express the delays in. If None the units the delay is
+            specified in are used
+        random_seed : int | RandomDistributionSampler | None
+            The root seed of the random streams used to sample the delays if
+            they are randomly distributed. The delays are sampled from a
+            stream keyed by the name of the projection, so the delay of a
+            connection is the same whichever range of connections is requested
+        rng : numpy.random.Generator | None
+            A random number generator to sample the delays with directly
+            instead of the keyed stream of 'random_seed'
+        start : int
+            The index of the first connection to return the delay of
+        stop : int | None
+            The index after the last connection to return the delay of
+
+        Returns
+        -------
+        delays : numpy.ndarray(float)
+            The (read-only) delays of connections 'start' to 'stop'
+        """
+        if num_connections is None:
+            num_connections = sum(1 for _ in self.connections())
+        if stop is None:
+            stop = num_connections
+        value = self.delay.value
+        if value.is_single():
+            array = numpy.broadcast_to(numpy.float64(value.value),
+                                       (stop - start,))
+        elif value.is_array():
+            if len(value) != num_connections:
+                raise NineMLValueError(
+                    "Length of array value for delay ({}) does not match "
+                    "number of connections of '{}' projection ({})".format(
+                        len(value), self.name, num_connections))
+            array = numpy.asarray(value.values,
+                                  dtype=numpy.float64)[start:stop]
+        elif rng is not None:
+            array = value.sample(num_connections, rng=rng)[start:stop]
+        else:
+            if not isinstance(random_seed, RandomDistributionSampler):
+                random_seed = RandomDistributionSampler(random_seed)
+            array = random_seed.sample(value, num_connections,
+                                       key=(self.name, 'delay'),
+                                       start=start, stop=stop)
+        if units is not None:
+            if units.dimension != self.delay.units.dimension:
+                raise NineMLUsageError(
+                    "Cannot express delay in '{}' as its dimension is '{}'"
+                    .format(units.name, self.delay.units.dimension.name))
+            array = array * 10 ** (self.delay.units.power - units.power)
+        array = array.view()
+        array.flags.writeable = False
+        return array
+
     @name_error
     def analog_port_connection(self, name):
         return self._analog_port_connections[name]
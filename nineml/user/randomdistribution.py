@@ -1,4 +1,8 @@
+from builtins import object
+from zlib import crc32
+import numpy
 from nineml.user.component import Component
+from nineml.exceptions import NineMLUsageError
 
 
 class RandomDistributionProperties(Component):
@@ -16,5 +20,274 @@ class RandomDistributionProperties(Component):
     def standard_library(self):
         return self.component_class.standard_library
 
+    @property
+    def standard_type(self):
+        """The name of the distribution in the UncertML standard library"""
+        return self.standard_library.split('/')[-1]
+
     def get_nineml_type(self):
         return self.nineml_type
+
+    def sample(self, size, rng=None, random_seed=None):
+        """
+        Draws samples from the distribution in a single call to a NumPy random
+        number generator
+
+        Parameters
+        ----------
+        size : int
+            The number of samples to draw
+        rng : numpy.random.Generator | None
+            The random number generator to draw the samples with
+        random_seed : int | None
+            The seed used to create the random number generator if 'rng' isn't
+            provided
+
+        Returns
+        -------
+        samples : numpy.ndarray(float)
+            The drawn samples
+        """
+        if rng is None:
+            rng = numpy.random.default_rng(random_seed)
+        try:
+            sampler = standard_library_samplers[self.standard_type]
+        except KeyError:
+            raise NineMLUsageError(
+                "Sampling of '{}' distributions is not supported (only "
+                "univariate distributions can be sampled)".format(
+                    self.standard_type))
+        params = _DistributionParameters(
+            self, ((p.name, float(p.value)) for p in self.properties))
+        return numpy.asarray(sampler(rng, params, size), dtype=float)
+
+    def support(self):
+        """
+        Returns the lower and upper bounds of the values the distribution can
+        take (which may be infinite)
+        """
+        try:
+            support = standard_library_supports[self.standard_type]
+        except KeyError:
+            raise NineMLUsageError(
+                "Support of '{}' distributions is not available (only for "
+                "univariate distributions)".format(self.standard_type))
+        params = _DistributionParameters(
+            self, ((p.name, float(p.value)) for p in self.properties))
+        return tuple(float(b) for b in support(params))
+
+
+class RandomDistributionSampler(object):
+    """
+    Samples random distributions in bulk from a tree of independent NumPy
+    random streams derived from a single seed, so that the same values are
+    drawn regardless of the order in which the distributions are sampled or
+    how the sampling is split between processes.
+
+    Each stream is identified by a key (e.g. the names of the population and
+    property being sampled), and is further split into blocks of
+    'block_size' samples, so that any slice of the samples can be drawn
+    without drawing those that precede it.
+
+    Parameters
+    ----------
+    random_seed : int | None
+        The root seed of the streams. If None, a seed is drawn from the
+        operating system's entropy source (and can be read from 'seed' so
+        that it can be passed to other processes).
+    block_size : int | None
+        The number of samples drawn from each block of a stream
+    """
+
+    default_block_size = 65536
+
+    def __init__(self, random_seed=None, block_size=None):
+        if random_seed is None:
+            random_seed = numpy.random.SeedSequence().entropy
+        if block_size is None:
+            block_size = self.default_block_size
+        self._seed = random_seed
+        self._block_size = int(block_size)
+
+    def __repr__(self):
+        return "{}(random_seed={}, block_size={})".format(
+            type(self).__name__, self._seed, self._block_size)
+
+    @property
+    def seed(self):
+        return self._seed
+
+    @property
+    def block_size(self):
+        return self._block_size
+
+    def generator(self, *key):
+        """
+        Returns the NumPy random generator for the stream identified by the
+        key. Strings in the key are hashed so that the stream doesn't depend
+        on the order in which streams are created.
+
+        Parameters
+        ----------
+        key : int | str
+            The elements of the key of the stream
+        """
+        return numpy.random.default_rng(numpy.random.SeedSequence(
+            self._seed, spawn_key=tuple(self._key_int(k) for k in key)))
+
+    def sample(self, distribution, size, key=(), start=0, stop=None):
+        """
+        Draws samples 'start' to 'stop' out of 'size' samples of a random
+        distribution from the stream identified by the key
+
+        Parameters
+        ----------
+        distribution : RandomDistributionProperties | RandomDistributionValue
+            The distribution to sample
+        size : int
+            The total number of samples in the stream
+        key : tuple(int | str)
+            The key of the stream to draw the samples from
+        start : int
+            The index of the first sample to return
+        stop : int | None
+            The index after the last sample to return. If None all samples
+            after 'start' are returned
+
+        Returns
+        -------
+        samples : numpy.ndarray(float)
+            Samples 'start' to 'stop' of the stream
+        """
+        distribution = getattr(distribution, 'distribution', distribution)
+        if isinstance(key, (str, int)):
+            key = (key,)
+        size = int(size)
+        stop = size if stop is None else min(int(stop), size)
+        start = int(start)
+        if not 0 <= start <= stop:
+            raise NineMLUsageError(
+                "Invalid range of samples {}-{} (of {})".format(start, stop,
+                                                                size))
+        first_block = start // self._block_size
+        last_block = -(-stop // self._block_size)
+        blocks = []
+        for block in range(first_block, last_block):
+            block_start = block * self._block_size
+            samples = distribution.sample(
+                min(self._block_size, size - block_start),
+                rng=self.generator(*(tuple(key) + (block,))))
+            blocks.append(samples[max(start - block_start, 0):
+                                  stop - block_start])
+        if not blocks:
+            return numpy.empty(0)
+        elif len(blocks) == 1:
+            return blocks[0]
+        return numpy.concatenate(blocks)
+
+    @classmethod
+    def _key_int(cls, key):
+        if isinstance(key, str):
+            return crc32(key.encode('utf-8')) & 0xffffffff
+        return int(key)
+
+
+class _DistributionParameters(dict):
+    """
+    The values of the properties of a distribution, which raises a
+    NineMLUsageError when a required property is missing
+    """
+
+    def __init__(self, distribution, *args, **kwargs):
+        super(_DistributionParameters, self).__init__(*args, **kwargs)
+        self._distribution = distribution
+
+    def __missing__(self, key):
+        raise NineMLUsageError(
+            "Missing property '{}' of '{}' random distribution, required to "
+            "sample '{}' distributions".format(
+                key, self._distribution.name,
+                self._distribution.standard_type))
+
+    def first(self, *names):
+        """Returns the value of the first of the names that is present"""
+        for name in names:
+            if name in self:
+                return self[name]
+        return self[names[0]]
+
+
+def _normal_stddev(params):
+    if 'stddev' in params:
+        return params['stddev']
+    return numpy.sqrt(params['variance'])
+
+
+# Functions drawing 'size' samples from each UncertML distribution with a
+# NumPy Generator, using the UncertML parameter names (the multivariate
+# 'dirichlet' and 'multinomial' distributions are not included)
+standard_library_samplers = {
+    'bernoulli': lambda rng, p, size: rng.binomial(
+        1, p.first('probabilities', 'probability'), size),
+    'beta': lambda rng, p, size: rng.beta(p['alpha'], p['beta'], size),
+    'binomial': lambda rng, p, size: rng.binomial(
+        int(p['numberOfTrials']), p['probabilityOfSuccess'], size),
+    'cauchy': lambda rng, p, size: (
+        p['location'] + p['scale'] * rng.standard_cauchy(size)),
+    'chi-square': lambda rng, p, size: rng.chisquare(
+        p['degreesOfFreedom'], size),
+    'exponential': lambda rng, p, size: rng.exponential(
+        1.0 / p['rate'], size),
+    'f': lambda rng, p, size: rng.f(p['numerator'], p['denominator'], size),
+    'gamma': lambda rng, p, size: rng.gamma(p['shape'], p['scale'], size),
+    'geometric': lambda rng, p, size: rng.geometric(p['probability'], size),
+    'hypergeometric': lambda rng, p, size: rng.hypergeometric(
+        int(p['numberOfSuccesses']),
+        int(p['populationSize']) - int(p['numberOfSuccesses']),
+        int(p['numberOfTrials']), size),
+    'laplace': lambda rng, p, size: rng.laplace(p['location'], p['scale'],
+                                                size),
+    'logistic': lambda rng, p, size: rng.logistic(p['location'], p['scale'],
+                                                  size),
+    'log-normal': lambda rng, p, size: rng.lognormal(p['logScale'],
+                                                     p['shape'], size),
+    'negative-binomial': lambda rng, p, size: rng.negative_binomial(
+        p['numberOfSuccesses'], p['probability'], size),
+    'normal': lambda rng, p, size: rng.normal(p['mean'], _normal_stddev(p),
+                                              size),
+    # NumPy's 'pareto' draws from the Lomax (shifted Pareto) distribution
+    'pareto': lambda rng, p, size: p['scale'] * (1.0 + rng.pareto(p['shape'],
+                                                                  size)),
+    'poisson': lambda rng, p, size: rng.poisson(p['rate'], size),
+    'uniform': lambda rng, p, size: rng.uniform(p['minimum'], p['maximum'],
+                                                size),
+    'weibull': lambda rng, p, size: p['scale'] * rng.weibull(p['shape'],
+                                                             size)}
+
+
+_inf = float('inf')
+
+# The bounds of the values each UncertML distribution can take
+standard_library_supports = {
+    'bernoulli': lambda p: (0.0, 1.0),
+    'beta': lambda p: (0.0, 1.0),
+    'binomial': lambda p: (0.0, p['numberOfTrials']),
+    'cauchy': lambda p: (-_inf, _inf),
+    'chi-square': lambda p: (0.0, _inf),
+    'exponential': lambda p: (0.0, _inf),
+    'f': lambda p: (0.0, _inf),
+    'gamma': lambda p: (0.0, _inf),
+    'geometric': lambda p: (1.0, _inf),
+    'hypergeometric': lambda p: (
+        max(0.0, p['numberOfTrials'] + p['numberOfSuccesses'] -
+            p['populationSize']),
+        min(p['numberOfSuccesses'], p['numberOfTrials'])),
+    'laplace': lambda p: (-_inf, _inf),
+    'logistic': lambda p: (-_inf, _inf),
+    'log-normal': lambda p: (0.0, _inf),
+    'negative-binomial': lambda p: (0.0, _inf),
+    'normal': lambda p: (-_inf, _inf),
+    'pareto': lambda p: (p['scale'], _inf),
+    'poisson': lambda p: (0.0, _inf),
+    'uniform': lambda p: (p['minimum'], p['maximum']),
+    'weibull': lambda p: (0.0, _inf)}
@@ -1,4 +1,7 @@
+from builtins import object, range
 from collections import OrderedDict
+from bisect import bisect_left
+import numpy
 from . import BaseULObject
 from nineml.base import (
     DocumentLevelObject, ContainerObject, DynamicPortsObject)
@@ -218,6 +221,13 @@ class Selection(BaseULObject, DocumentLevelObject, DynamicPortsObject):
             "Only concatenation is currently supported"
         return self.operation.items
 
+    def cell_index(self):
+        """
+        Returns a SelectionIndex for translating between the global indices
+        of the cells in the selection and their populations/local indices
+        """
+        return SelectionIndex([self])
+
     @property
     def populations(self):
         return self.operation.populations
@@ -308,6 +318,267 @@ class Selection(BaseULObject, DocumentLevelObject, DynamicPortsObject):
     def num_event_receive_ports(self):
         return len(list(self.event_receive_ports))
 
+
+class SelectionIndex(object):
+    """
+    Maps between the global indices of the cells in a selection (i.e. their
+    positions in the concatenation of its populations) and (population, local
+    index) pairs using an array of cumulative population offsets, so that
+    translations can be performed on arrays of indices at once.
+
+    Subsets of the cells can be selected by indexing the SelectionIndex with
+    an integer array, a slice or a boolean mask. The subsets are themselves
+    SelectionIndex objects, which store slices as lazy ranges so they can be
+    further indexed (composing the selections) without creating per-cell
+    arrays.
+
+    Parameters
+    ----------
+    populations : list(Population | ComponentArray | Selection)
+        The populations to concatenate. Selections are expanded into the
+        populations they concatenate.
+    indices : range | numpy.ndarray(int) | None
+        The global indices of the cells in the subset. If None all cells of
+        the populations are included.
+    """
+
+    def __init__(self, populations, indices=None):
+        self._populations = list(chain(*(self._leaf_populations(p)
+                                         for p in populations)))
+        sizes = numpy.fromiter((p.size for p in self._populations),
+                               dtype=numpy.int64,
+                               count=len(self._populations))
+        self._offsets = numpy.concatenate(([0], numpy.cumsum(sizes)))
+        self._offsets.flags.writeable = False
+        self._pop_indices = dict((p.name, i)
+                                 for i, p in enumerate(self._populations))
+        if indices is None:
+            indices = range(int(self._offsets[-1]))
+        elif not isinstance(indices, range):
+            indices = numpy.asarray(indices, dtype=numpy.int64)
+            if len(indices) and (indices.min() < 0 or
+                                 indices.max() >= self._offsets[-1]):
+                raise IndexError(
+                    "Indices out of range for selection of {} cells".format(
+                        self._offsets[-1]))
+            indices.flags.writeable = False
+        self._indices = indices
+        self._sorter = None
+
+    @classmethod
+    def _leaf_populations(cls, population):
+        if isinstance(population, Selection):
+            return chain(*(cls._leaf_populations(it.population)
+                           for it in sorted(population.operation.items,
+                                            key=lambda it: it.index)))
+        return [population]
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __repr__(self):
+        return "{}({} of {} cells in '{}')".format(
+            type(self).__name__, len(self), self._offsets[-1],
+            "', '".join(p.name for p in self._populations))
+
+    @property
+    def size(self):
+        return len(self._indices)
+
+    @property
+    def populations(self):
+        return iter(self._populations)
+
+    @property
+    def offsets(self):
+        """
+        The global index of the first cell of each population, followed by
+        the total number of cells in the populations
+        """
+        return self._offsets
+
+    @property
+    def is_lazy(self):
+        """Whether the subset is stored as a range"""
+        return isinstance(self._indices, range)
+
+    @property
+    def global_indices(self):
+        """
+        The global indices of the cells in the subset (materialised as an
+        array if the subset is stored as a range)
+        """
+        if self.is_lazy:
+            return numpy.arange(self._indices.start, self._indices.stop,
+                                self._indices.step, dtype=numpy.int64)
+        return self._indices
+
+    def population_index(self, population):
+        """
+        Returns the position of a population in the concatenation
+
+        Parameters
+        ----------
+        population : Population | str | int
+            The population, its name or its position
+        """
+        if isinstance(population, int):
+            if not 0 <= population < len(self._populations):
+                raise IndexError(
+                    "Population index {} out of range".format(population))
+            return population
+        name = getattr(population, 'name', population)
+        try:
+            return self._pop_indices[name]
+        except KeyError:
+            raise NineMLNameError(
+                "'{}' population is not part of selection of '{}'".format(
+                    name, "', '".join(p.name for p in self._populations)))
+
+    def _base_indices(self, positions):
+        positions = numpy.asarray(positions, dtype=numpy.int64)
+        size = len(self)
+        if positions.size and (positions.min() < -size or
+                               positions.max() >= size):
+            raise IndexError(
+                "Index out of range for selection of {} cells".format(size))
+        positions = numpy.where(positions < 0, positions + size, positions)
+        if self.is_lazy:
+            return self._indices.start + self._indices.step * positions
+        return self._indices[positions]
+
+    def __getitem__(self, key):
+        """
+        Selects a subset of the cells with an integer array, a slice or a
+        boolean mask, returning a new SelectionIndex. Indexing with a single
+        integer returns the (population, local index) of the cell.
+        """
+        if isinstance(key, (int, numpy.integer)):
+            pop_index, local_index = self.to_local(key)
+            return (self._populations[int(pop_index)], int(local_index))
+        if isinstance(key, slice):
+            indices = self._indices[key]
+        else:
+            key = numpy.asarray(key)
+            if key.dtype == bool:
+                if key.shape != (len(self),):
+                    raise NineMLUsageError(
+                        "Shape of boolean mask {} does not match size of "
+                        "selection ({})".format(key.shape, len(self)))
+                key = numpy.flatnonzero(key)
+            indices = self._base_indices(key)
+        return type(self)(self._populations, indices)
+
+    def to_local(self, positions):
+        """
+        Translates positions in the (subset of the) selection into
+        population indices and local indices within the populations
+
+        Parameters
+        ----------
+        positions : int | numpy.ndarray(int)
+            Positions of cells in the subset
+
+        Returns
+        -------
+        population_indices : int | numpy.ndarray(int)
+            The positions of the populations in the concatenation
+        local_indices : int | numpy.ndarray(int)
+            The indices of the cells within their populations
+        """
+        base = self._base_indices(positions)
+        pop_indices = numpy.searchsorted(self._offsets, base,
+                                         side='right') - 1
+        return pop_indices, base - self._offsets[pop_indices]
+
+    def to_global(self, population, local_indices):
+        """
+        Translates local indices within a population into positions in the
+        (subset of the) selection
+
+        Parameters
+        ----------
+        population : Population | str | int
+            The population, its name or its position in the concatenation
+        local_indices : int | numpy.ndarray(int)
+            Indices of cells within the population
+
+        Returns
+        -------
+        positions : int | numpy.ndarray(int)
+            The positions of the cells in the subset
+        """
+        pop_index = self.population_index(population)
+        local_indices = numpy.asarray(local_indices, dtype=numpy.int64)
+        pop_size = self._offsets[pop_index + 1] - self._offsets[pop_index]
+        if local_indices.size and (local_indices.min() < 0 or
+                                   local_indices.max() >= pop_size):
+            raise IndexError(
+                "Local index out of range for '{}' population of {} cells"
+                .format(self._populations[pop_index].name, pop_size))
+        base = self._offsets[pop_index] + local_indices
+        if self.is_lazy:
+            start, step = self._indices.start, self._indices.step
+            positions, remainder = numpy.divmod(base - start, step)
+            found = ((remainder == 0) & (positions >= 0) &
+                     (positions < len(self)))
+        else:
+            if self._sorter is None:
+                self._sorter = numpy.argsort(self._indices, kind='mergesort')
+            sorted_indices = self._indices[self._sorter]
+            sorted_pos = numpy.minimum(
+                numpy.searchsorted(sorted_indices, base), len(self) - 1)
+            found = (sorted_indices[sorted_pos] == base if len(self)
+                     else numpy.zeros(base.shape, dtype=bool))
+            positions = self._sorter[sorted_pos] if len(self) else base
+        if not numpy.all(found):
+            raise NineMLUsageError(
+                "Cells {} of '{}' population are not in the selection".format(
+                    numpy.asarray(local_indices)[~found],
+                    self._populations[pop_index].name))
+        return positions
+
+    def split(self):
+        """
+        Splits the (subset of the) selection into the cells of each
+        population
+
+        Returns
+        -------
+        splits : OrderedDict(str, (range | numpy.ndarray, range |
+                                   numpy.ndarray))
+            The positions of the cells in the subset and their local indices
+            in the population, keyed by the names of the populations with
+            cells in the subset. Ranges are returned for lazy subsets with
+            positive steps.
+        """
+        splits = OrderedDict()
+        if self.is_lazy and self._indices.step > 0:
+            for i, pop in enumerate(self._populations):
+                start = bisect_left(self._indices, self._offsets[i])
+                stop = bisect_left(self._indices, self._offsets[i + 1])
+                if stop > start:
+                    offset = int(self._offsets[i])
+                    local = self._indices[start:stop]
+                    splits[pop.name] = (
+                        range(start, stop),
+                        range(local.start - offset, local.stop - offset,
+                              local.step))
+        else:
+            base = self.global_indices
+            pop_indices = numpy.searchsorted(self._offsets, base,
+                                             side='right') - 1
+            order = numpy.argsort(pop_indices, kind='mergesort')
+            bounds = numpy.searchsorted(pop_indices[order],
+                                        numpy.arange(len(self._offsets)))
+            for i, pop in enumerate(self._populations):
+                positions = order[bounds[i]:bounds[i + 1]]
+                if len(positions):
+                    splits[pop.name] = (positions,
+                                        base[positions] - self._offsets[i])
+        return splits
+
+
 # TGC 11/11/ This old implementation of Set (now called Selection) was copied
 #            from nineml.user.populations.py probably some of it is worth
 #            salvaging as we look to implement some of this functionality for
@@ -0,0 +1,325 @@
+"""
+Export of flattened networks to shared memory, so that worker processes (e.g.
+of a parameter sweep) can attach zero-copy views of the large numeric arrays of
+the network (connection indices, per-cell property values, delays) and only
+rebuild the lightweight object graph that refers to them, instead of each
+re-reading or unpickling the whole network.
+
+Requires multiprocessing.shared_memory (Python >= 3.8).
+
+:copyright: Copyright 2010-2017 by the NineML Python team, see AUTHORS.
+:license: BSD-3, see LICENSE for details.
+"""
+from builtins import object, zip
+import io
+import pickle
+import numpy
+from nineml.exceptions import NineMLUsageError
+try:
+    from multiprocessing import shared_memory, resource_tracker
+except ImportError:
+    shared_memory = resource_tracker = None  # Python < 3.8
+
+
+# The shared memory blocks attached to by this process, keyed by name, which
+# are kept open while the objects rebuilt from them may be in use
+_attached_blocks = {}
+
+
+class SharedNetwork(object):
+    """
+    Exports the component arrays and connection groups of a flattened network
+    (see Network.flatten) to shared memory. The NumPy arrays in the object
+    graph that are at least 'min_bytes' long (e.g. the values of ArrayValues)
+    are copied into a single shared memory block and the rest of the graph is
+    pickled, with references to the location of each array within the block,
+    into a small picklable SharedNetworkDescriptor. Worker processes that
+    receive the descriptor call its 'attach' method to rebuild the graph
+    around read-only views of the arrays in the block.
+
+    The block is owned by the exporting process and must be released with
+    'unlink' (or by using the export as a context manager) once the workers
+    have finished with it.
+
+    Parameters
+    ----------
+    component_arrays : list(ComponentArray)
+        The component arrays of the flattened network
+    connection_groups : list(ConnectionGroup)
+        The connection groups of the flattened network
+    min_bytes : int
+        The size in bytes above which arrays are placed in shared memory.
+        Smaller arrays are pickled with the rest of the object graph
+    name : str | None
+        The name of the shared memory block. If None a unique name is
+        generated
+    """
+
+    # Alignment of the arrays within the shared memory block (in bytes)
+    ALIGNMENT = 64
+
+    def __init__(self, component_arrays, connection_groups, min_bytes=4096,
+                 name=None):
+        _check_shared_memory()
+        graph = io.BytesIO()
+        pickler = _ExportPickler(graph, min_bytes)
+        pickler.dump((list(component_arrays), list(connection_groups)))
+        layout = []
+        nbytes = 0
+        for array in pickler.arrays:
+            offset = -(-nbytes // self.ALIGNMENT) * self.ALIGNMENT
+            layout.append((offset, array.dtype.str, array.shape))
+            nbytes = offset + array.nbytes
+        # Shared memory blocks cannot be empty
+        self._block = shared_memory.SharedMemory(name=name, create=True,
+                                                 size=max(nbytes, 1))
+        for (offset, dtype, shape), array in zip(layout, pickler.arrays):
+            _view(self._block, offset, dtype, shape)[...] = array
+        self._nbytes = nbytes
+        self._descriptor = SharedNetworkDescriptor(
+            self._block.name, layout, graph.getvalue(),
+            tracker_pid=_tracker_pid())
+
+    def __repr__(self):
+        return "{}('{}', {} arrays, {} bytes)".format(
+            type(self).__name__, self.name, self.num_arrays, self.nbytes)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):  # @UnusedVariable
+        self.close()
+        self.unlink()
+
+    @property
+    def name(self):
+        return self._block.name
+
+    @property
+    def descriptor(self):
+        return self._descriptor
+
+    @property
+    def num_arrays(self):
+        return self._descriptor.num_arrays
+
+    @property
+    def nbytes(self):
+        """The number of bytes of the arrays in the shared memory block"""
+        return self._nbytes
+
+    def attach(self):
+        """
+        Rebuilds the component arrays and connection groups around views of
+        the shared memory block (see SharedNetworkDescriptor.attach)
+        """
+        return self._descriptor.attach()
+
+    def close(self):
+        """
+        Closes the exporting process's handle to the shared memory block
+        """
+        self._block.close()
+
+    def unlink(self):
+        """
+        Releases the shared memory block, which is freed once all the
+        processes attached to it have closed their handles to it
+        """
+        try:
+            self._block.unlink()
+        except FileNotFoundError:
+            pass  # The block has already been released
+
+
+class SharedNetworkDescriptor(object):
+    """
+    A picklable description of a network exported to shared memory by
+    SharedNetwork, consisting of the name of the shared memory block, the
+    offsets, dtypes and shapes of the arrays within it, and the pickled
+    object graph without the arrays
+
+    Parameters
+    ----------
+    block_name : str
+        The name of the shared memory block
+    layout : list(tuple(int, str, tuple(int)))
+        The offset, dtype and shape of each array in the block
+    graph : bytes
+        The pickled component arrays and connection groups, which refer to
+        the arrays by their index in the layout
+    tracker_pid : int | None
+        The pid of the resource tracker of the exporting process, which is
+        shared by the processes it forks
+    """
+
+    def __init__(self, block_name, layout, graph, tracker_pid=None):
+        self._block_name = block_name
+        self._layout = layout
+        self._graph = graph
+        self._tracker_pid = tracker_pid
+
+    def __repr__(self):
+        return "{}('{}', {} arrays)".format(
+            type(self).__name__, self._block_name, self.num_arrays)
+
+    @property
+    def block_name(self):
+        return self._block_name
+
+    @property
+    def num_arrays(self):
+        return len(self._layout)
+
+    @property
+    def graph_size(self):
+        """The number of bytes of the pickled object graph"""
+        return len(self._graph)
+
+    def attach(self):
+        """
+        Attaches to the shared memory block and rebuilds the component arrays
+        and connection groups around read-only views of the arrays in it. The
+        block stays attached to the process until 'detach' is called, so
+        attaching the same network repeatedly (e.g. once per task) doesn't
+        map the block again.
+
+        Returns
+        -------
+        component_arrays : list(ComponentArray)
+            The component arrays of the flattened network
+        connection_groups : list(ConnectionGroup)
+            The connection groups of the flattened network
+        """
+        _check_shared_memory()
+        try:
+            block = _attached_blocks[self._block_name]
+        except KeyError:
+            try:
+                block = self._attach_block()
+            except OSError as e:
+                raise NineMLUsageError(
+                    "Could not attach to shared memory block '{}', it may "
+                    "have been unlinked by the exporting process ({})"
+                    .format(self._block_name, e))
+            _attached_blocks[self._block_name] = block
+        arrays = []
+        for offset, dtype, shape in self._layout:
+            array = _view(block, offset, dtype, shape)
+            array.flags.writeable = False
+            arrays.append(array)
+        return _AttachUnpickler(io.BytesIO(self._graph), arrays).load()
+
+    def _attach_block(self):
+        """
+        Attaches to the shared memory block without registering it with the
+        resource tracker of the process, which would unlink the block when
+        the process exits (before Python 3.13 blocks are registered by every
+        process that attaches to them, not just the one that creates them)
+        """
+        try:
+            return shared_memory.SharedMemory(name=self._block_name,
+                                              track=False)
+        except TypeError:
+            pass  # Python < 3.13
+        block = shared_memory.SharedMemory(name=self._block_name)
+        # Processes forked from the exporting process share its resource
+        # tracker, in which the block is registered by the exporting process
+        if (getattr(shared_memory, '_USE_POSIX', False) and
+                _tracker_pid() != self._tracker_pid):
+            resource_tracker.unregister(block._name, 'shared_memory')
+        return block
+
+    def detach(self):
+        """
+        Closes the process's handle to the shared memory block. The objects
+        returned by 'attach' must not be in use (i.e. have been deleted)
+        """
+        try:
+            block = _attached_blocks.pop(self._block_name)
+        except KeyError:
+            return
+        try:
+            block.close()
+        except BufferError:
+            _attached_blocks[self._block_name] = block
+            raise NineMLUsageError(
+                "Cannot detach from shared memory block '{}' while objects "
+                "attached to it are still referenced".format(
+                    self._block_name))
+
+
+class _ExportPickler(pickle.Pickler):
+    """
+    Pickles an object graph, replacing the NumPy arrays it contains that are
+    at least 'min_bytes' long with their index in 'arrays'. The documents the
+    objects belong to (e.g. units defined in a document) are not exported
+    and the attached objects don't belong to a document
+    """
+
+    DOCUMENT = 'document'
+
+    def __init__(self, file, min_bytes):
+        pickle.Pickler.__init__(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.min_bytes = min_bytes
+        self.arrays = []
+        self._indices = {}  # Indices of the arrays keyed by their ids
+
+    def persistent_id(self, obj):
+        if isinstance(obj, nineml.Document):
+            return self.DOCUMENT
+        if (type(obj) is not numpy.ndarray or obj.dtype.hasobject or
+                obj.nbytes < self.min_bytes):
+            return None
+        try:
+            return self._indices[id(obj)]
+        except KeyError:
+            index = self._indices[id(obj)] = len(self.arrays)
+            # Holding a reference to the array also keeps its id unique
+            self.arrays.append(obj)
+            return index
+
+
+class _AttachUnpickler(pickle.Unpickler):
+    """
+    Unpickles an object graph pickled by _ExportPickler, substituting the
+    given arrays for the indices that replaced them
+    """
+
+    def __init__(self, file, arrays):
+        pickle.Unpickler.__init__(self, file)
+        self.arrays = arrays
+
+    def persistent_load(self, pid):
+        if pid == _ExportPickler.DOCUMENT:
+            return None
+        return self.arrays[pid]
+
+
+def _view(block, offset, dtype, shape):
+    """
+    Returns a view of an array in a shared memory block. Unlike arrays created
+    with numpy.ndarray(buffer=...), arrays created with numpy.frombuffer hold
+    the buffer of the block, so the block cannot be closed while they exist
+    """
+    return numpy.frombuffer(block.buf, dtype=dtype,
+                            count=int(numpy.prod(shape)),
+                            offset=offset).reshape(shape)
+
+
+def _tracker_pid():
+    """
+    Returns the pid of the resource tracker of the process (None if it isn't
+    running)
+    """
+    return getattr(resource_tracker._resource_tracker, '_pid', None)
+
+
+def _check_shared_memory():
+    if shared_memory is None:
+        raise NineMLUsageError(
+            "Exporting networks to shared memory requires the "
+            "multiprocessing.shared_memory module (Python >= 3.8)")
+
+
+import nineml  # @IgnorePep8
@@ -30,9 +30,18 @@ from nineml.user.multi import (
     EventSendPortExposure, EventReceivePortExposure, AnalogSendPortExposure,
     AnalogReceivePortExposure, AnalogReducePortExposure)
 import sympy
+import numpy
 from nineml.user.projection import Connectivity
 from nineml.serialization import NINEML_V1_NS
 
+# Component classes that are only referenced by other elements are added to
+# the documents below without being cloned, which binds the units of their
+# constants (and their dimensions) to the documents, so clones of the
+# module-level units are used for them
+mV = un.mV.clone()
+nA = un.nA.clone()
+degC = un.degC.clone()
+Mohm = un.Mohm.clone()
 
 ranDistrA = RandomDistribution(
     name="ranDistrA",
@@ -73,8 +82,8 @@ dynA = Dynamics(
                 Parameter('P2', dimension=un.time),
                 Parameter('P3', dimension=un.voltage),
                 Parameter('P4', dimension=un.current)],
-    constants=[Constant('C1', value=-71.0, units=un.mV),
-               Constant('C2', value=22.2, units=un.degC)])
+    constants=[Constant('C1', value=-71.0, units=mV),
+               Constant('C2', value=22.2, units=degC)])
 
 dynB = Dynamics(
     name='dynB',
@@ -96,7 +105,7 @@ dynB = Dynamics(
             On('SV3 < 0.001', to='R2',
                do=[StateAssignment('SV3', '2 * random.normal()')])])
     ],
-    constants=[Constant('C1', 10.0 * un.mA, un.nA)],
+    constants=[Constant('C1', 10.0 * un.mA, nA)],
     analog_receive_ports=[AnalogReceivePort('ARP1', dimension=un.current)],
     analog_reduce_ports=[AnalogReducePort('ADP1', operator='+')],
     analog_send_ports=[AnalogSendPort('A1'),
@@ -142,7 +151,7 @@ dynD = Dynamics(
             name='R1'
         ),
     ],
-    constants=[Constant('C1', -67.0 * un.Mohm)],
+    constants=[Constant('C1', -67.0 * Mohm)],
     aliases=[Alias('A1', Expression('SV1 / C1'))],
     ports=[AnalogSendPort('A1', dimension=un.current),
            AnalogReducePort('ADP1', dimension=(un.voltage / un.time)),
@@ -205,7 +214,7 @@ dynG = Dynamics(
         Parameter('P1', dimension=un.dimensionless),
         Parameter('P2', dimension=un.time),
         Parameter('P3', dimension=un.resistance)],
-    constants=[Constant('C1', 1.3 * un.nA)],
+    constants=[Constant('C1', 1.3 * nA)],
     regimes=[
         Regime(
             name='R1',
@@ -535,7 +544,8 @@ def add_with_sub_elements(element):
     Recursively adds 9ML elements from the example document to a dictionary
     sorted by 9ML types
     """
-    if isinstance(element, (basestring, Document)) or element in loading:
+    if (isinstance(element, (basestring, Document, numpy.ndarray)) or
+            any(element is e for e in loading)):
         return
     if not isinstance(element, (dict, list, tuple, int, float, str,
                                 sympy.Basic, Connectivity)):
@@ -546,10 +556,14 @@ def add_with_sub_elements(element):
 
         instances_of_all_types[element.nineml_type][element.key] = element
         # Loop through all attributes of the element that are not in the class
-        # definition and attempt to add them to the instances_of_all_types dict
+        # definition (or are stored in its slots) and attempt to add them to
+        # the instances_of_all_types dict
         loading.append(element)
-        for attr in set(dir(element)) - set(dir(element.__class__)):
-            add_with_sub_elements(getattr(element, attr))
+        slots = set(chain(*(c.__dict__.get('__slots__', ())
+                            for c in type(element).__mro__)))
+        for attr in (set(dir(element)) - set(dir(element.__class__))) | slots:
+            if hasattr(element, attr):
+                add_with_sub_elements(getattr(element, attr))
         loading.pop()
     else:
         # If element is a dictionary or list
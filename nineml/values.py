@@ -5,7 +5,9 @@ from builtins import zip  # @IgnorePep8
 from .base import AnnotatedNineMLObject  # @IgnorePep8
 from abc import ABCMeta  # @IgnorePep8
 from urllib.request import urlopen  # @IgnorePep8
+import base64  # @IgnorePep8
 import contextlib  # @IgnorePep8
+import hashlib  # @IgnorePep8
 import collections  # @IgnorePep8
 import sympy  # @IgnorePep8
 import itertools  # @IgnorePep8
@@ -14,6 +16,7 @@ import numpy  # @IgnorePep8
 import nineml  # @IgnorePep8
 from nineml.exceptions import (  # @IgnorePep8
     NineMLUsageError, NineMLValueError, NineMLSerializationError)
+from nineml.annotations import PY9ML_NS  # @IgnorePep8
 from future.utils import with_metaclass  # @IgnorePep8
 
 # =============================================================================
@@ -71,6 +74,8 @@ def parse_float_operand(op_method):
 
 class BaseValue(with_metaclass(ABCMeta, AnnotatedNineMLObject)):
 
+    __slots__ = ()
+
     def is_array(self):
         return False
 
@@ -96,6 +101,8 @@ class SingleValue(BaseValue):
     Numerical values may either be numbers, or a component that generates
     numbers, e.g. a RandomDistribution instance.
     """
+    __slots__ = ('_annotations', '_value')
+
     nineml_type = "SingleValue"
     nineml_attr = ('value',)
 
@@ -240,24 +247,57 @@ class SingleValue(BaseValue):
 
 
 class ArrayValue(BaseValue):
+    """
+    An array of numerical values, stored in a contiguous NumPy array.
+
+    NumPy arrays and other objects supporting the buffer protocol are used
+    without copying if they are already contiguous and of the requested
+    dtype. The stored array is exposed as a read-only view, so the values
+    must not be modified through the original array after it has been
+    passed to the ArrayValue.
+
+    Parameters
+    ----------
+    values : numpy.ndarray | buffer | iterable(float)
+        The values of the array
+    datafile : tuple(str, str, str) | None
+        The url, mimetype and column name of an external data file the values
+        were loaded from
+    dtype : numpy.dtype
+        The dtype the values are stored as
+    """
 
     nineml_type = "ArrayValue"
     nineml_attr = ('values',)
 
     DataFile = collections.namedtuple('DataFile', 'url mimetype, columnName')
 
-    def __init__(self, values, datafile=None):
+    # The version of the python-nineml extension used to serialize the values
+    # of arrays as base64 strings of their bytes (see the 'array_encoding'
+    # option of the serializers), which is written with the array so the
+    # encoding can be changed in later versions without breaking old files.
+    # The encoded values are written in an element in the python-nineml
+    # namespace so they don't invalidate the 9ML of the ArrayValue
+    BASE64_ENCODING = 'base64-v1'
+    ENCODED_ELEMENT = 'EncodedArrayValue'
+
+    def __init__(self, values, datafile=None, dtype=numpy.float64):
         super(ArrayValue, self).__init__()
         try:
-            self._values = values.astype(float)  # If NumPy array
-        except AttributeError:
-            try:
-                self._values = [float(v) for v in values]
-            except (TypeError, ValueError):
-                raise NineMLValueError(
-                    "Values provided to ArrayValue ({}) could not be "
-                    "converted to a list of floats"
-                    .format(type(values)))
+            if iter(values) is values:  # If generator/iterator
+                values = numpy.fromiter(values, dtype=dtype)
+            array = numpy.ascontiguousarray(values, dtype=dtype)
+        except (TypeError, ValueError):
+            array = None
+        if array is None or array.ndim != 1:
+            raise NineMLValueError(
+                "Values provided to ArrayValue ({}) could not be "
+                "converted to a 1-dimensional array of floats"
+                .format(type(values)))
+        # Read-only view so the key remains valid
+        self._values = array.view()
+        self._values.flags.writeable = False
+        self._key = None
         if datafile is None:
             self._datafile = None
         else:
@@ -267,10 +307,19 @@ class ArrayValue(BaseValue):
     def values(self):
         return self._values
 
+    @property
+    def dtype(self):
+        return self._values.dtype
+
     @property
     def key(self):
-        # TODO: Should put a hash on the end of this to make it unique
-        return str('_'.join(str(v) for v in self._values[:10]))
+        """
+        A hash of the contents of the array, which is calculated on first
+        access and then cached
+        """
+        if self._key is None:
+            self._key = hashlib.sha1(self._values.tobytes()).hexdigest()
+        return self._key
 
     def is_array(self):
         return True
@@ -290,34 +339,51 @@ class ArrayValue(BaseValue):
             ('...' if len(self) >= 5 else ''))
 
     def inverse(self):
-        try:
-            return ArrayValue(1.0 / self._values)
-        except AttributeError:
-            return ArrayValue(1.0 / v for v in self._values)
+        return ArrayValue(1.0 / self._values)
 
     def serialize_node(self, node, **options):  # @UnusedVariable
-        if self._datafile is None:
-            for i, value in enumerate(self._values):
+        if self._datafile is not None:
+            node.attr('url', self.url, **options)
+            node.attr('mimetype', self.mimetype, **options)
+            node.attr('columnName', self.columnName, **options)
+        elif node.visitor.array_encoding == 'base64':
+            encoded_elem = node.visitor.create_elem(
+                self.ENCODED_ELEMENT, parent=node.serial_element,
+                namespace=PY9ML_NS, **options)
+            node.visitor.set_attr(encoded_elem, 'encoding',
+                                  self.BASE64_ENCODING, **options)
+            node.visitor.set_attr(encoded_elem, 'dtype',
+                                  self._values.dtype.str, **options)
+            node.visitor.set_attr(encoded_elem, 'data', base64.b64encode(
+                self._values.tobytes()).decode('ascii'), **options)
+        else:
+            for i, value in enumerate(self._values.tolist()):
                 row_elem = node.visitor.create_elem(
                     'ArrayValueRow', parent=node.serial_element, multiple=True,
                     **options)
                 node.visitor.set_attr(row_elem, 'index', i)
                 node.visitor.set_attr(row_elem, 'value', value)
-        else:
-            node.attr('url', self.url, **options)
-            node.attr('mimetype', self.mimetype, **options)
-            node.attr('columnName', self.columnName, **options)
 
     @classmethod
     def unserialize_node(cls, node, **options):  # @UnusedVariable
         if node.name == 'ExternalArrayValue':
             url = node.attr('url', **options)
-            with contextlib.closing(urlopen(url)) as f:
+            pool = node.visitor.document.pool
+            if pool is not None and pool.cache is not None:
+                f = pool.cache.open(url)
+            else:
+                f = urlopen(url)
+            with contextlib.closing(f):
                 # FIXME: Should use a non-numpy version of this load function
                 values = numpy.loadtxt(f)
             return cls(values, (node.attr('url', **options),
                                 node.attr('mimetype', **options),
                                 node.attr('columnName', **options)))
+        if cls.ENCODED_ELEMENT in node.unprocessed_children:
+            node.unprocessed_children.discard(cls.ENCODED_ELEMENT)
+            return cls._decode(node.visitor, node.visitor.get_child(
+                node.serial_element, cls.ENCODED_ELEMENT, **options),
+                **options)
         else:
             rows = []
             for name, elem in node.visitor.get_all_children(
@@ -345,6 +411,35 @@ class ArrayValue(BaseValue):
                     "Indices greater or equal to the number of array rows")
             return cls(values)
 
+    @classmethod
+    def _decode(cls, visitor, elem, **options):
+        """
+        Decodes the values of an array from the element they were encoded in
+        by the 'base64' array encoding
+        """
+        namespace = visitor.get_namespace(elem, **options)
+        if namespace != PY9ML_NS:
+            raise NineMLSerializationError(
+                "{} element of ArrayValue is not in the python-nineml "
+                "namespace ('{}' instead of '{}')"
+                .format(cls.ENCODED_ELEMENT, namespace, PY9ML_NS))
+        encoding = visitor.get_attr(elem, 'encoding', **options)
+        if encoding != cls.BASE64_ENCODING:
+            raise NineMLSerializationError(
+                "Unrecognised ArrayValue encoding '{}' (this version of "
+                "python-nineml supports '{}')"
+                .format(encoding, cls.BASE64_ENCODING))
+        try:
+            dtype = numpy.dtype(visitor.get_attr(elem, 'dtype', **options))
+            values = numpy.frombuffer(
+                base64.b64decode(visitor.get_attr(elem, 'data', **options)),
+                dtype=dtype)
+        except (TypeError, ValueError) as e:
+            raise NineMLSerializationError(
+                "Could not decode base64 ArrayValue data ({})".format(e))
+        # Convert to the native byte order of the machine
+        return cls(values, dtype=dtype.newbyteorder('='))
+
     # =========================================================================
     # Magic methods to allow the SingleValue to be treated like a
     # floating point number
@@ -359,31 +454,19 @@ class ArrayValue(BaseValue):
 
     @parse_float_operand
     def __add__(self, num):
-        try:
-            return ArrayValue(self._values + num)  # if numpy array
-        except TypeError:
-            return ArrayValue([float(v + num) for v in self._values])
+        return ArrayValue(self._values + num)
 
     @parse_float_operand
     def __sub__(self, num):
-        try:
-            return ArrayValue(self._values - num)  # if numpy array
-        except TypeError:
-            return ArrayValue([float(v - num) for v in self._values])
+        return ArrayValue(self._values - num)
 
     @parse_float_operand
     def __mul__(self, num):
-        try:
-            return ArrayValue(self._values * num)  # if numpy array
-        except TypeError:
-            return ArrayValue([float(v * num) for v in self._values])
+        return ArrayValue(self._values * num)
 
     @parse_float_operand
     def __truediv__(self, num):
-        try:
-            return ArrayValue(self._values.__truediv__(num))  # if numpy array
-        except AttributeError:
-            return ArrayValue([float(v / num) for v in self._values])
+        return ArrayValue(self._values / num)
 
     @parse_float_operand
     def __div__(self, num):
@@ -391,45 +474,29 @@ class ArrayValue(BaseValue):
 
     @parse_float_operand
     def __pow__(self, power):
-        try:
-            return ArrayValue(self._values ** power)  # if numpy array
-        except TypeError:
-            return ArrayValue([float(v ** power) for v in self._values])
+        return ArrayValue(self._values ** power)
 
     @parse_float_operand
     def __floordiv__(self, num):
-        try:
-            return ArrayValue(self._values // num)  # if numpy array
-        except TypeError:
-            return ArrayValue([float(v // num) for v in self._values])
+        return ArrayValue(self._values // num)
 
     @parse_float_operand
     def __mod__(self, num):
-        try:
-            return ArrayValue(self._values % num)  # if numpy array
-        except TypeError:
-            return ArrayValue([float(v % num) for v in self._values])
+        return ArrayValue(self._values % num)
 
     def __radd__(self, num):
         return self.__add__(num)
 
     @parse_float_operand
     def __rsub__(self, num):
-        try:
-            return ArrayValue(num - self._values)  # if numpy array
-        except TypeError:
-            return ArrayValue([float(num - v) for v in self._values])
+        return ArrayValue(num - self._values)
 
     def __rmul__(self, num):
         return self.__mul__(num)
 
     @parse_float_operand
     def __rtruediv__(self, num):
-        try:
-            return ArrayValue(self._values.__rtruediv__(num))  # if np
-        except AttributeError:
-            return ArrayValue([float(num.__truediv__(v))
-                               for v in self._values])
+        return ArrayValue(num / self._values)
 
     @parse_float_operand
     def __rdiv__(self, num):
@@ -437,64 +504,37 @@ class ArrayValue(BaseValue):
 
     @parse_float_operand
     def __rpow__(self, num):
-        try:
-            return ArrayValue(self._values.__rpow__(num))  # if numpy array
-        except AttributeError:
-            return ArrayValue([float(num ** v) for v in self._values])
+        return ArrayValue(num ** self._values)
 
     @parse_float_operand
     def __rfloordiv__(self, num):
-        try:
-            return ArrayValue(self._values.__rfloordiv__(num))  # if numpy arr.
-        except AttributeError:
-            return ArrayValue([float(num // v) for v in self._values])
+        return ArrayValue(num // self._values)
 
     @parse_float_operand
     def __rmod__(self, num):
-        try:
-            return ArrayValue(self._values.__rmod__(num))  # if numpy array
-        except AttributeError:
-            return ArrayValue([float(num % v) for v in self._values])
+        return ArrayValue(num % self._values)
 
     def __neg__(self):
-        try:
-            return ArrayValue(self._values.__neg__())  # if numpy array
-        except AttributeError:
-            return ArrayValue([-v for v in self._values])
+        return ArrayValue(-self._values)
 
     def __abs__(self):
-        try:
-            return ArrayValue(self._values.__abs__())
-        except AttributeError:
-            return ArrayValue([abs(v) for v in self._values])
+        return ArrayValue(numpy.abs(self._values))
 
     @parse_float_operand
     def __lt__(self, other):
-        try:
-            return ArrayValue(self._values.__lt__(other))
-        except AttributeError:
-            return ArrayValue([v < other for v in self._values])
+        return ArrayValue(self._values < other, dtype=bool)
 
     @parse_float_operand
     def __le__(self, other):
-        try:
-            return ArrayValue(self._values.__le__(other))
-        except AttributeError:
-            return ArrayValue([v <= other for v in self._values])
+        return ArrayValue(self._values <= other, dtype=bool)
 
     @parse_float_operand
     def __ge__(self, other):
-        try:
-            return ArrayValue(self._values.__ge__(other))
-        except AttributeError:
-            return ArrayValue([v >= other for v in self._values])
+        return ArrayValue(self._values >= other, dtype=bool)
 
     @parse_float_operand
     def __gt__(self, other):
-        try:
-            return ArrayValue(self._values.__gt__(other))
-        except AttributeError:
-            return ArrayValue([v > other for v in self._values])
+        return ArrayValue(self._values > other, dtype=bool)
 
 
 class RandomDistributionValue(BaseValue):
@@ -541,6 +581,24 @@ class RandomDistributionValue(BaseValue):
         """
         self._generator = generator_cls(self.distribution)
 
+    def sample(self, size, rng=None, random_seed=None):
+        """
+        Draws samples from the distribution in a single call to a NumPy random
+        number generator (see RandomDistributionProperties.sample)
+
+        Parameters
+        ----------
+        size : int
+            The number of samples to draw
+        rng : numpy.random.Generator | None
+            The random number generator to draw the samples with
+        random_seed : int | None
+            The seed used to create the random number generator if 'rng' isn't
+            provided
+        """
+        return self.distribution.sample(size, rng=rng,
+                                        random_seed=random_seed)
+
     def __repr__(self):
         return ("RandomDistributionValue({})".format(self.distribution.name))
 
@@ -57,7 +57,10 @@ class Cloner(BaseChildResultsVisitor):
             clone = super(Cloner, self).visit(obj, nineml_cls=nineml_cls,
                                               **kwargs)
             # Clone annotations if they are present
-            if (hasattr(obj, 'annotations') and not self.exclude_annotations):
+            # Check 'has_annotations' instead of 'annotations', which
+            # creates the annotations of objects that have none on access
+            if (not self.exclude_annotations and
+                    getattr(obj, 'has_annotations', False)):
                 clone._annotations = self.visit(obj.annotations, **kwargs)
             if not obj.temporary:
                 self.memo[id_] = clone
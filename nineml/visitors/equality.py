@@ -34,8 +34,14 @@ class EqualityChecker(BaseDualVisitor):
     def action(self, obj1, obj2, nineml_cls, **kwargs):
         if self.annotations_ns:
             try:
-                annotations_keys = set(chain(obj1.annotations.branch_keys,
-                                             obj2.annotations.branch_keys))
+                # The 'annotations' property isn't accessed on objects without
+                # annotations as it would create them
+                annotations1, annotations2 = (
+                    o.annotations if o.has_annotations
+                    else nineml.annotations.EMPTY_ANNOTATIONS
+                    for o in (obj1, obj2))
+                annotations_keys = set(chain(annotations1.branch_keys,
+                                             annotations2.branch_keys))
                 skip_annotations = False
             except AttributeError:
                 skip_annotations = True
@@ -43,12 +49,12 @@ class EqualityChecker(BaseDualVisitor):
                 for key in annotations_keys:
                     if key[1] in self.annotations_ns:
                         try:
-                            annot1 = obj1.annotations.branch(key)
+                            annot1 = annotations1.branch(key)
                         except NineMLNameError:
                             self._raise_annotations_exception(
                                 nineml_cls, obj1, obj2, key)
                         try:
-                            annot2 = obj2.annotations.branch(key)
+                            annot2 = annotations2.branch(key)
                         except NineMLNameError:
                             self._raise_annotations_exception(
                                 nineml_cls, obj1, obj2, key)
@@ -76,6 +82,8 @@ class EqualityChecker(BaseDualVisitor):
             self._raise_value_exception('value', val1, val2, nineml_cls)
 
     def action_arrayvalue(self, val1, val2, nineml_cls, **kwargs):  # @UnusedVariable @IgnorePep8
+        if val1.key == val2.key:
+            return  # Identical contents so no need to compare nearly equal
         if len(val1.values) != len(val2.values):
             self._raise_value_exception('values', val1, val2, nineml_cls)
         if any(self._not_nearly_equal(s, o)
@@ -153,7 +161,7 @@ class Hasher(BaseVisitor):
         for attr_name in nineml_cls.nineml_attr:
             try:
                 if attr_name == 'rhs':  # need to use Sympy equality checking
-                    self._hash_rhs(obj.rhs)
+                    self._hash_rhs(obj.rhs, nineml_cls)
                 else:
                     self._hash_attr(getattr(obj, attr_name))
             except NineMLNotBoundException:
@@ -185,8 +193,8 @@ class Hasher(BaseVisitor):
     def _hash_rhs(self, rhs, nineml_cls, **kwargs):  # @UnusedVariable
         try:
             rhs = sympy.expand(rhs)
-        except TypeError:
-            pass
+        except (TypeError, AttributeError):
+            pass  # Not an expandable (e.g. boolean) expression
         self._hash_attr(rhs)
 
     def action_unit(self, unit, nineml_cls, **kwargs):  # @UnusedVariable @IgnorePep8
@@ -205,6 +213,77 @@ class Hasher(BaseVisitor):
         self._hash_attr(rounded_val)
 
 
+class Fingerprinter(BaseVisitor):
+    """
+    Captures the exact state of a 9ML object, and all the objects it
+    contains, in a tuple that can be compared with a fingerprint taken
+    previously to determine whether the object has changed since. Unlike
+    Hasher, values are not rounded, names of units and annotations are
+    included and only the name and url of referenced objects are captured,
+    i.e. the parts of the object that are serialized with it.
+
+    Parameters
+    ----------
+    document : Document | None
+        The document the fingerprinted objects are in. The urls of references
+        to objects in the same document are not captured, as they change when
+        the document is written to a new url.
+    """
+
+    def __init__(self, document=None, **kwargs):
+        super(Fingerprinter, self).__init__(**kwargs)
+        self._document = document
+
+    def fingerprint(self, nineml_obj):
+        self._fingerprint = []
+        self.visit(nineml_obj)
+        return tuple(self._fingerprint)
+
+    def visit(self, obj, nineml_cls=None, **kwargs):  # @UnusedVariable
+        # Children are visited directly rather than through 'visit_child' and
+        # 'visit_children', as fingerprints are taken of every element that
+        # is written and need to be cheaper than serializing it
+        if isinstance(obj, nineml.reference.BaseReference):
+            target = obj.target
+            if (self._document is not None and
+                    target.document is self._document):
+                url = None
+            else:
+                url = target.url
+            self._fingerprint.append(
+                (obj.nineml_type, target.nineml_type, target.name, url))
+            return
+        if nineml_cls is None:
+            nineml_cls = type(obj)
+        self.action(obj, nineml_cls)
+        for child_name, child_type in nineml_cls.nineml_child.items():
+            child = getattr(obj, child_name)
+            if child is not None:
+                self.visit(child, child_type)
+        for children_type in nineml_cls.nineml_children:
+            for child in obj._members_iter(children_type):
+                self.visit(child, children_type)
+        annotations = getattr(obj, '_annotations', None)
+        if annotations is not None and not annotations.empty():
+            self._fingerprint.append('annotations')
+            self.visit(annotations)
+
+    def default_action(self, obj, nineml_cls, **kwargs):  # @UnusedVariable @IgnorePep8
+        attrs = []
+        for attr_name in nineml_cls.nineml_attr:
+            try:
+                attrs.append(getattr(obj, attr_name))
+            except NineMLNotBoundException:
+                attrs.append(None)
+        self._fingerprint.append((nineml_cls.nineml_type, type(obj),
+                                  tuple(attrs)))
+
+    def action_arrayvalue(self, val, nineml_cls, **kwargs):  # @UnusedVariable @IgnorePep8
+        # Arrays are compared via the digest of their contents
+        self._fingerprint.append((nineml_cls.nineml_type, val.key,
+                                  str(val.dtype), val._datafile))
+
+
 class MismatchFinder(DualWithContextMixin, EqualityChecker):
 
     def __init__(self, **kwargs):
@@ -295,3 +374,6 @@ class MismatchFinder(DualWithContextMixin, EqualityChecker):
     def _pop_contexts(self):
         self.contexts1.pop()
         self.contexts2.pop()
+
+
+import nineml  # @IgnorePep8
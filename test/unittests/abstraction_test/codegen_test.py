@@ -0,0 +1,224 @@
+import os
+import shutil
+import tempfile
+import unittest
+from distutils.spawn import find_executable
+import numpy
+from nineml.abstraction import (
+    Dynamics, Regime, On, OutputEvent, StateAssignment, StateVariable,
+    Parameter, AnalogReducePort, AnalogSendPort, EventReceivePort,
+    Constant)
+from nineml.abstraction.dynamics.codegen import (
+    DynamicsCCodeGenerator, CompiledDynamics)
+from nineml.exceptions import NineMLCodeGenerationError
+import nineml.units as un
+
+
+compiler = os.environ.get('CC', 'cc')
+
+
+def leaky_integrate_and_fire():
+    return Dynamics(
+        name='LIF',
+        regimes=[
+            Regime('dv/dt = (i_syn*R - v)/tau + g',
+                   transitions=[On('v > v_threshold',
+                                   do=[OutputEvent('spike'),
+                                       StateAssignment(
+                                           'refractory_end',
+                                           't + refractory_period'),
+                                       StateAssignment('v', 'v_reset')],
+                                   to='refractory'),
+                                On('kick', do=['g = g + g_inc'])],
+                   name='subthreshold'),
+            Regime(transitions=[On('t > refractory_end',
+                                   to='subthreshold')],
+                   name='refractory')],
+        aliases=['v_scaled := v * scale'],
+        state_variables=[StateVariable('v', dimension=un.voltage),
+                         StateVariable('refractory_end',
+                                       dimension=un.time),
+                         StateVariable('g', dimension=un.voltage / un.time)],
+        parameters=[Parameter('R', un.resistance),
+                    Parameter('refractory_period', un.time),
+                    Parameter('v_reset', un.voltage),
+                    Parameter('v_threshold', un.voltage),
+                    Parameter('tau', un.time),
+                    Parameter('g_inc', un.voltage / un.time)],
+        constants=[Constant('scale', 2.0, un.unitless)],
+        ports=[AnalogReducePort('i_syn', un.current, operator='+'),
+               AnalogSendPort('v', un.voltage),
+               AnalogSendPort('v_scaled', un.voltage),
+               EventReceivePort('kick')])
+
+
+class DynamicsCCodeGenerator_test(unittest.TestCase):
+
+    def test_source(self):
+        generator = DynamicsCCodeGenerator(leaky_integrate_and_fire())
+        source = generator.source
+        self.assertEqual(generator.regime_names,
+                         ['refractory', 'subthreshold'])
+        self.assertIn('double *sv_v;', source)
+        self.assertIn('double *p_tau;', source)
+        self.assertIn('double *in_i_syn;', source)
+        self.assertIn('double *out_v_scaled;', source)
+        self.assertIn('int *evin_kick;', source)
+        self.assertIn('int *evout_spike;', source)
+        self.assertIn('static const double c_scale = 2.0;', source)
+        for regime_name in generator.regime_names:
+            self.assertIn('static void LIF_step_{}('.format(regime_name),
+                          source)
+        self.assertIn('void LIF_update(LIF_state_t *s, size_t n, double t, '
+                      'double dt)', source)
+
+    def test_random_not_supported(self):
+        dyn = Dynamics(
+            name='Random',
+            regimes=[Regime('dv/dt = -v/tau',
+                            transitions=[On('v > 1',
+                                            do=['v = random.uniform(0, 1)'])],
+                            name='r')],
+            parameters=[Parameter('tau', un.time)])
+        self.assertRaises(NineMLCodeGenerationError, DynamicsCCodeGenerator,
+                          dyn)
+
+
+@unittest.skipIf(find_executable(compiler) is None,
+                 "C compiler '{}' not available".format(compiler))
+class CompiledDynamics_test(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def _state(self, compiled, size):
+        state = compiled.state(size, regime='subthreshold')
+        state.parameters['R'][:] = 1.5
+        state.parameters['refractory_period'][:] = 2.0
+        state.parameters['v_reset'][:] = 0.0
+        state.parameters['v_threshold'][:] = 20.0
+        state.parameters['tau'][:] = 20.0
+        state.parameters['g_inc'][:] = 1.0
+        state.inputs['i_syn'][:] = numpy.linspace(0.0, 30.0, size)
+        return state
+
+    def test_update(self):
+        compiled = CompiledDynamics(leaky_integrate_and_fire(),
+                                    cache_dir=self.cache_dir)
+        size, dt = 5, 0.1
+        state = self._state(compiled, size)
+        # Forward-Euler reference implementation
+        v = numpy.zeros(size)
+        refractory_end = numpy.zeros(size)
+        refractory = numpy.zeros(size, dtype=bool)
+        num_spikes = numpy.zeros(size, dtype=int)
+        t = 0.0
+        for _ in range(500):
+            compiled.update(state, t, dt)
+            t_next = t + dt
+            refractory_now = refractory.copy()
+            below_threshold = v <= 20.0
+            v[~refractory_now] += (
+                dt * (state.inputs['i_syn'] * 1.5 - v) / 20.0)[
+                    ~refractory_now]
+            spiked = ~refractory_now & below_threshold & (v > 20.0)
+            v[spiked] = 0.0
+            refractory_end[spiked] = t_next + 2.0
+            refractory[spiked] = True
+            refractory[refractory_now & (t_next > refractory_end)] = False
+            num_spikes += spiked
+            self.assertTrue(numpy.array_equal(
+                state.events_out['spike'].astype(bool), spiked))
+            t = t_next
+            self.assertTrue(numpy.allclose(state.state_variables['v'], v))
+            self.assertTrue(numpy.allclose(state.outputs['v_scaled'], 2 * v))
+            self.assertTrue(numpy.array_equal(
+                state.regime == compiled.regime_index('refractory'),
+                refractory))
+        self.assertEqual(num_spikes[0], 0)
+        self.assertGreater(num_spikes[-1], 1)
+
+    def test_cache(self):
+        compiled = CompiledDynamics(leaky_integrate_and_fire(),
+                                    cache_dir=self.cache_dir)
+        self.assertFalse(compiled.from_cache)
+        self.assertTrue(os.path.exists(compiled.library_path))
+        recompiled = CompiledDynamics(leaky_integrate_and_fire(),
+                                      cache_dir=self.cache_dir)
+        self.assertTrue(recompiled.from_cache)
+        self.assertEqual(compiled.library_path, recompiled.library_path)
+        other_flags = CompiledDynamics(leaky_integrate_and_fire(),
+                                       cache_dir=self.cache_dir,
+                                       cflags=['-O0', '-fPIC', '-shared'])
+        self.assertFalse(other_flags.from_cache)
+        self.assertNotEqual(compiled.library_path, other_flags.library_path)
+
+    def test_events_in(self):
+        compiled = CompiledDynamics(leaky_integrate_and_fire(),
+                                    cache_dir=self.cache_dir)
+        state = self._state(compiled, 3)
+        state.inputs['i_syn'][:] = 0.0
+        state.events_in['kick'][:] = [1, 0, 1]
+        compiled.update(state, 0.0, 0.1)
+        self.assertTrue(numpy.array_equal(state.state_variables['g'],
+                                          [1.0, 0.0, 1.0]))
+        self.assertTrue(numpy.allclose(state.state_variables['v'],
+                                       [0.1, 0.0, 0.1]))
+        # Incoming event flags are cleared after they are handled
+        self.assertFalse(state.events_in['kick'].any())
+
+    def test_edge_triggered(self):
+        compiled = CompiledDynamics(leaky_integrate_and_fire(),
+                                    cache_dir=self.cache_dir)
+        state = self._state(compiled, 2)
+        state.inputs['i_syn'][:] = 30.0
+        # The first instance starts above threshold so its trigger doesn't
+        # change from false to true, whereas the second crosses it
+        state.state_variables['v'][:] = [25.0, 19.99]
+        compiled.update(state, 0.0, 0.1)
+        self.assertTrue(numpy.array_equal(state.events_out['spike'], [0, 1]))
+        self.assertTrue(numpy.array_equal(
+            state.regime, [compiled.regime_index('subthreshold'),
+                           compiled.regime_index('refractory')]))
+        self.assertAlmostEqual(state.state_variables['v'][0],
+                               25.0 + 0.1 * (45.0 - 25.0) / 20.0)
+
+    def test_common_subexpressions(self):
+        dyn = Dynamics(
+            name='Gating',
+            aliases=['alpha := A * exp(-V / K)',
+                     'beta := A / (exp(-V / K) + 1)'],
+            regimes=[Regime('dm/dt = alpha * (1 - m) - beta * m',
+                            'dV/dt = -V / tau',
+                            name='default')],
+            state_variables=[StateVariable('m', un.dimensionless),
+                             StateVariable('V', un.voltage)],
+            parameters=[Parameter('A', un.per_time),
+                        Parameter('K', un.voltage),
+                        Parameter('tau', un.time)])
+        compiled = CompiledDynamics(dyn, cache_dir=self.cache_dir)
+        self.assertIn('const double dcse_0 = exp(-sv_V/p_K);',
+                      compiled.source)
+        state = compiled.state(4)
+        state.parameters['A'][:] = 0.5
+        state.parameters['K'][:] = 10.0
+        state.parameters['tau'][:] = 5.0
+        V = state.state_variables['V'][:] = numpy.linspace(-20, 20, 4)
+        m = state.state_variables['m'][:] = 0.5
+        compiled.update(state, 0.0, 0.01)
+        alpha = 0.5 * numpy.exp(-V / 10.0)
+        beta = 0.5 / (numpy.exp(-V / 10.0) + 1)
+        self.assertTrue(numpy.allclose(
+            state.state_variables['m'],
+            m + 0.01 * (alpha * (1 - m) - beta * m)))
+
+    def test_invalid_array(self):
+        compiled = CompiledDynamics(leaky_integrate_and_fire(),
+                                    cache_dir=self.cache_dir)
+        state = self._state(compiled, 10)
+        state.state_variables['v'] = numpy.zeros(5)
+        self.assertRaises(NineMLCodeGenerationError, compiled.update, state,
+                          0.0, 0.1)
@@ -0,0 +1,98 @@
+import unittest
+import numpy
+import sympy
+from nineml.abstraction import (
+    Dynamics, Regime, On, StateVariable, Parameter, AnalogReducePort,
+    AnalogSendPort, OutputEvent)
+from nineml.abstraction.dynamics.evaluation import EvaluationPlan
+from nineml.exceptions import NineMLUsageError
+import nineml.units as un
+
+
+def hodgkin_huxley_like():
+    return Dynamics(
+        name='HHLike',
+        aliases=[
+            'm_alpha := a_A * exp(-(V - V0) / K)',
+            'm_beta := b_A / (exp(-(V - V0) / K) + 1)',
+            'h_alpha := a_A * exp(-(V - V0) / K) * exp(-(V - V0) / K)',
+            'h_beta := b_A / (exp(-(V - V0) / K) + 1) + b_A',
+            'i_m := g * m * (E - V)'],
+        regimes=[
+            Regime(
+                'dm/dt = m_alpha * (1 - m) - m_beta * m',
+                'dh/dt = h_alpha * (1 - h) - h_beta * h',
+                'dV/dt = (i_m + i_ext) / C',
+                transitions=[On('V > V_th',
+                                do=[OutputEvent('spike'),
+                                    'm = m_alpha / (m_alpha + m_beta)'])],
+                name='default')],
+        state_variables=[StateVariable('V', un.voltage),
+                         StateVariable('m', un.dimensionless),
+                         StateVariable('h', un.dimensionless)],
+        parameters=[Parameter('a_A', un.per_time),
+                    Parameter('b_A', un.per_time),
+                    Parameter('V0', un.voltage),
+                    Parameter('K', un.voltage),
+                    Parameter('g', un.conductance),
+                    Parameter('E', un.voltage),
+                    Parameter('C', un.capacitance),
+                    Parameter('V_th', un.voltage)],
+        ports=[AnalogReducePort('i_ext', un.current, operator='+'),
+               AnalogSendPort('i_m', un.current)])
+
+
+class EvaluationPlan_test(unittest.TestCase):
+
+    namespace = {
+        'a_A': 0.1, 'b_A': 4.0, 'V0': -40.0, 'K': 10.0, 'g': 120.0,
+        'E': 50.0, 'C': 1.0, 'V_th': 0.0, 'i_ext': 0.5,
+        'V': numpy.linspace(-80.0, 20.0, 11),
+        'm': numpy.linspace(0.0, 1.0, 11),
+        'h': numpy.linspace(1.0, 0.0, 11)}
+
+    def test_from_regime(self):
+        plan = hodgkin_huxley_like().evaluation_plan('default')
+        self.assertGreater(plan.num_temporaries, 0)
+        self.assertLess(plan.num_operations, plan.num_original_operations)
+        self.assertEqual(
+            set(plan.outputs),
+            set([('Alias', 'm_alpha'), ('Alias', 'm_beta'),
+                 ('Alias', 'h_alpha'), ('Alias', 'h_beta'),
+                 ('Alias', 'i_m'), ('TimeDerivative', 'm'),
+                 ('TimeDerivative', 'h'), ('TimeDerivative', 'V'),
+                 ('Trigger', 'V > V_th'),
+                 ('StateAssignment', 'V > V_th', 'm')]))
+        self.assertEqual(set(plan.input_names), set(self.namespace))
+        # Temporaries must only depend on inputs and previous temporaries
+        defined = set(sympy.Symbol(n) for n in plan.input_names)
+        for sym, expr in plan.temporaries:
+            self.assertTrue(expr.free_symbols <= defined)
+            defined.add(sym)
+
+    def test_python_func(self):
+        plan = hodgkin_huxley_like().evaluation_plan('default')
+        values = plan.python_func(**self.namespace)
+        for key, expr in plan.original_outputs.items():
+            args = sorted(expr.free_symbols, key=str)
+            reference = sympy.lambdify(args, expr, modules='numpy')(
+                *(self.namespace[str(a)] for a in args))
+            self.assertTrue(numpy.allclose(values[key], reference),
+                            "Mismatch in {}".format(key))
+        self.assertRaises(NineMLUsageError, plan.python_func, V=1.0)
+
+    def test_include(self):
+        dyn = hodgkin_huxley_like()
+        plan = dyn.evaluation_plan('default', include=['TimeDerivative'])
+        self.assertEqual(list(plan.outputs),
+                         [('TimeDerivative', 'V'), ('TimeDerivative', 'h'),
+                          ('TimeDerivative', 'm')])
+        self.assertRaises(NineMLUsageError, dyn.evaluation_plan, 'default',
+                          include=['OnCondition'])
+
+    def test_temporary_names(self):
+        plan = EvaluationPlan([('a', 'exp(cse_0) + exp(cse_0) * x'),
+                               ('b', 'exp(cse_0) * y')])
+        self.assertEqual([str(s) for s, _ in plan.temporaries], ['cse_1'])
+        self.assertEqual(plan.python_func(cse_0=0.0, x=2.0, y=3.0),
+                         {'a': 3.0, 'b': 3.0})
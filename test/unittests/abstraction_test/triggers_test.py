@@ -0,0 +1,94 @@
+import unittest
+import numpy
+from nineml.abstraction import (
+    Dynamics, Regime, On, OutputEvent, StateVariable, Parameter)
+from nineml.abstraction.dynamics.triggers import TriggerAnalysis
+from nineml.exceptions import NineMLUsageError
+import nineml.units as un
+
+
+class TriggerAnalysis_test(unittest.TestCase):
+
+    def test_classification(self):
+        dyn = Dynamics(
+            name='LIF',
+            regimes=[
+                Regime('dv/dt = -v/tau',
+                       transitions=[
+                           On('v > v_thresh',
+                              do=[OutputEvent('spike'),
+                                  't_end = t + t_ref', 'v = v_reset'],
+                              to='refractory'),
+                           On('v * v > v_thresh * v_thresh / 4 && '
+                              'v < v_reset', to='refractory')],
+                       name='subthreshold'),
+                Regime(transitions=[On('t > t_end', to='subthreshold')],
+                       name='refractory')],
+            state_variables=[StateVariable('v', un.voltage),
+                             StateVariable('t_end', un.time)],
+            parameters=[Parameter('tau', un.time),
+                        Parameter('t_ref', un.time),
+                        Parameter('v_thresh', un.voltage),
+                        Parameter('v_reset', un.voltage)])
+        subthreshold = dyn.trigger_analysis('subthreshold')
+        threshold = subthreshold['v > v_thresh']
+        self.assertEqual(threshold.kind, TriggerAnalysis.THRESHOLD)
+        self.assertEqual(threshold.variable, 'v')
+        self.assertEqual(str(threshold.threshold), 'v_thresh')
+        self.assertEqual(threshold.direction, 1)
+        self.assertEqual(
+            [a.kind for a in subthreshold.values()].count(
+                TriggerAnalysis.GENERAL), 1)
+        refractory = dyn.trigger_analysis('refractory')
+        time_based = refractory['t > t_end']
+        self.assertEqual(time_based.kind, TriggerAnalysis.TIME)
+        self.assertEqual(str(time_based.event_time), 't_end')
+        # A time-dependent trigger is only time-based if it doesn't depend
+        # on state variables integrated in the regime
+        self.assertEqual(TriggerAnalysis('t > v', integrated=['v']).kind,
+                         TriggerAnalysis.GENERAL)
+        self.assertEqual(TriggerAnalysis('v_thresh - v < 0',
+                                         integrated=['v']).direction, 1)
+        self.assertEqual(TriggerAnalysis('v < v_thresh',
+                                         integrated=['v']).direction, -1)
+
+    def test_threshold_detect(self):
+        analysis = TriggerAnalysis('v > 2 * theta', integrated=['v'])
+        before = {'v': numpy.array([0.0, 1.0, 3.0, 0.0, 1.5])}
+        after = {'v': numpy.array([4.0, 1.5, 5.0, 1.0, 0.5])}
+        crossed, times = analysis.detect(
+            10.0, 0.5, before, after,
+            {'theta': numpy.array([1.0, 1.0, 1.0, 1.0, 0.5])})
+        self.assertEqual(list(crossed), [True, False, False, False, False])
+        self.assertAlmostEqual(times[0], 10.25)
+        self.assertTrue(numpy.isnan(times[1:]).all())
+
+    def test_general_detect(self):
+        analysis = TriggerAnalysis('v * w > 1', integrated=['v', 'w'])
+        self.assertEqual(analysis.kind, TriggerAnalysis.GENERAL)
+        before = {'v': numpy.array([0.0, 2.0]), 'w': numpy.array([1.0, 1.0])}
+        after = {'v': numpy.array([4.0, 3.0]), 'w': numpy.array([1.0, 1.0])}
+        crossed, times = analysis.detect(0.0, 1.0, before, after)
+        self.assertEqual(list(crossed), [True, False])
+        self.assertAlmostEqual(times[0], 0.25)
+        # Non-relational triggers are assumed to cross at the end of the step
+        analysis = TriggerAnalysis('v > 1 && w > 1', integrated=['v', 'w'])
+        crossed, times = analysis.detect(
+            0.0, 1.0, before, {'v': after['v'], 'w': numpy.array([2.0, 0.5])})
+        self.assertEqual(list(crossed), [True, False])
+        self.assertAlmostEqual(times[0], 1.0)
+
+    def test_time_detect(self):
+        analysis = TriggerAnalysis('t > t_a || t > t_b + offset')
+        self.assertEqual(analysis.kind, TriggerAnalysis.TIME)
+        states = {'t_a': numpy.array([1.2, 5.0, 0.5]),
+                  't_b': numpy.array([3.0, 0.8, 4.0])}
+        namespace = {'offset': 0.5}
+        next_times = analysis.next_event_time(dict(states, **namespace))
+        self.assertTrue(numpy.allclose(next_times, [1.2, 1.3, 0.5]))
+        crossed, times = analysis.detect(1.0, 0.5, states, states, namespace)
+        self.assertEqual(list(crossed), [True, True, False])
+        self.assertTrue(numpy.allclose(times[:2], [1.2, 1.3]))
+        self.assertRaises(NineMLUsageError,
+                          TriggerAnalysis('v > 1', ['v']).next_event_time,
+                          {'v': 0.0})
@@ -1,6 +1,8 @@
 import unittest
+import pickle
 from copy import deepcopy
-from nineml.annotations import Annotations, PY9ML_NS
+from nineml.annotations import Annotations, EMPTY_ANNOTATIONS, PY9ML_NS
+from nineml.exceptions import NineMLUsageError
 from nineml.abstraction import Parameter, Dynamics, Alias
 from nineml.units import Dimension
 from nineml import Document
@@ -164,3 +166,60 @@ class TestAnnotations(unittest.TestCase):
         self.assertFalse(a.equals(d, annotations_ns=['dummy_ns']))
         self.assertTrue(a.equals(e))
         self.assertFalse(a.equals(e, annotations_ns=['dummy_ns']))
+
+    def test_path_index(self):
+        annot = Annotations()
+        annot.set(('a', 'ns'), 'b', 'c', 1)
+        self.assertEqual(annot.get(('a', 'ns'), 'b', 'c'), '1')
+        self.assertEqual(annot.get(('a', 'ns'), 'b', 'd', default=0), 0)
+        # Modifying a sub-branch directly invalidates the cached paths of the
+        # branches that contain it
+        branch = annot[('a', 'ns')][0]['b'][0]
+        branch.set('c', 2)
+        branch.set('d', 3)
+        self.assertEqual(annot.get(('a', 'ns'), 'b', 'c'), '2')
+        self.assertEqual(annot.get(('a', 'ns'), 'b', 'd'), '3')
+        branch.delete('d')
+        self.assertRaises(KeyError, annot.get, ('a', 'ns'), 'b', 'd')
+        annot.pop(('a', 'ns'))
+        self.assertEqual(annot.get(('a', 'ns'), 'b', 'c', default=None),
+                         None)
+        annot.add(('a', 'ns'), 'b')
+        annot[('a', 'ns')][0]['b'][0].set('c', 4)
+        self.assertEqual(annot.get(('a', 'ns'), 'b', 'c'), '4')
+        # The attributes of a branch can't be modified without invalidating
+        # the cached paths
+        branch = annot[('a', 'ns')][0]['b'][0]
+        with self.assertRaises(TypeError):
+            branch.attr['c'] = 5
+        self.assertEqual(annot.get(('a', 'ns'), 'b', 'c'), '4')
+
+    def test_empty_singleton(self):
+        a = Parameter('A', dimension=un.dimensionless)
+        b = Parameter('B', dimension=un.dimensionless)
+        self.assertIs(a._annotations, EMPTY_ANNOTATIONS)
+        self.assertIs(b._annotations, EMPTY_ANNOTATIONS)
+        self.assertFalse(a.has_annotations)
+        self.assertEqual(a.get_annotation(('x', 'ns'), 'y', default='z'),
+                         'z')
+        self.assertIs(a._annotations, EMPTY_ANNOTATIONS)
+        self.assertRaises(NineMLUsageError, EMPTY_ANNOTATIONS.set,
+                          ('x', 'ns'), 'y', 1)
+        self.assertRaises(NineMLUsageError, EMPTY_ANNOTATIONS.delete,
+                          ('x', 'ns'), 'y')
+        self.assertRaises(NineMLUsageError, EMPTY_ANNOTATIONS.pop,
+                          ('x', 'ns'))
+        self.assertIs(deepcopy(EMPTY_ANNOTATIONS), EMPTY_ANNOTATIONS)
+        self.assertIs(pickle.loads(pickle.dumps(b))._annotations,
+                      EMPTY_ANNOTATIONS)
+        # Accessing the annotations of an object gives it its own copy
+        a.annotations.set(('x', 'ns'), 'y', 1)
+        self.assertTrue(a.has_annotations)
+        self.assertEqual(a.get_annotation(('x', 'ns'), 'y'), '1')
+        self.assertTrue(EMPTY_ANNOTATIONS.empty())
+        self.assertIs(b.clone()._annotations, EMPTY_ANNOTATIONS)
+        # Cloning and comparing objects doesn't create their annotations
+        self.assertIs(b._annotations, EMPTY_ANNOTATIONS)
+        self.assertTrue(b.equals(b.clone(), annotations_ns=['ns']))
+        self.assertIs(b._annotations, EMPTY_ANNOTATIONS)
+        self.assertEqual(a.clone().annotations.get(('x', 'ns'), 'y'), '1')
@@ -1,12 +1,15 @@
 import unittest
 from nineml.abstraction import (
     Parameter, Dynamics, Alias, StateVariable,
-    Regime, TimeDerivative, OnCondition)
+    Regime, TimeDerivative, OnCondition, AnalogSendPort)
 from nineml.serialization import ext_to_format
-from nineml.exceptions import NineMLSerializerNotImportedError
+from nineml.exceptions import (
+    NineMLSerializerNotImportedError, NineMLNameError)
 import logging
 import sys
+import time
 import nineml
+import nineml.units as un
 from tempfile import mkstemp
 
 
@@ -77,3 +80,110 @@ class TestPreserveIndices(unittest.TestCase):
                     regime.index_of(regime.time_derivative(td)), i)
         for i, a in enumerate(self.aliases):
             self.assertEqual(dyn.index_of(dyn.alias(a)), i)
+
+
+class TestElementIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.d = Dynamics(
+            name='d',
+            parameters=[Parameter('P1', un.time), Parameter('P2'),
+                        Parameter('P3')],
+            state_variables=[StateVariable('SV1'), StateVariable('SV2')],
+            regimes=[Regime('dSV1/dt = -SV1 / P1', 'dSV2/dt = -SV2 / P1',
+                            name='R1')],
+            aliases=[Alias('A1', 'P2 * SV1'), Alias('A2', 'P3 * SV2')],
+            analog_ports=[AnalogSendPort('A1'), AnalogSendPort('SV2')])
+
+    def test_element(self):
+        self.assertIs(self.d.element('P2'), self.d.parameter('P2'))
+        self.assertIs(self.d.element('R1'), self.d.regime('R1'))
+        # Send ports don't mask aliases/state variables
+        self.assertIs(self.d.element('A1'), self.d.alias('A1'))
+        self.assertIs(self.d.element('SV2', include_send_ports=True),
+                      self.d.state_variable('SV2'))
+        self.assertIs(self.d.element('A1', child_types=(AnalogSendPort,),
+                                     include_send_ports=True),
+                      self.d.analog_send_port('A1'))
+        self.assertRaises(NineMLNameError, self.d.element, 'A1',
+                          child_types=(AnalogSendPort,))
+        self.assertRaises(NineMLNameError, self.d.element, 'P1',
+                          child_types=(StateVariable,))
+        self.assertRaises(NineMLNameError, self.d.element, 'missing')
+        regime = self.d.regime('R1')
+        self.assertIs(regime.element('SV1'), regime.time_derivative('SV1'))
+
+    def test_add_remove(self):
+        self.d.element('P1')  # Build the index
+        param = Parameter('P4')
+        self.d.add(param)
+        self.assertIs(self.d.element('P4'), param)
+        self.assertEqual(self.d.index_of(param), 3)
+        self.assertIs(self.d.from_index(3, Parameter), param)
+        self.d.remove(self.d.parameter('P2'))
+        self.assertRaises(NineMLNameError, self.d.element, 'P2')
+        self.assertEqual(self.d.index_of(param), 2)
+        self.assertIs(self.d.from_index(1, Parameter),
+                      self.d.parameter('P3'))
+        self.assertRaises(ValueError, self.d.index_of, Parameter('P2'))
+
+    def test_rename(self):
+        self.d.element('P1')  # Build the index
+        self.d.rename_symbol('P1', 'Q1')
+        self.assertIs(self.d.element('Q1'), self.d.parameter('Q1'))
+        self.assertRaises(NineMLNameError, self.d.element, 'P1')
+        self.assertEqual(self.d.index_of(self.d.parameter('Q1')),
+                         list(self.d.parameter_names).index('Q1'))
+
+    def test_direct_modification(self):
+        self.d.element('P1')  # Build the index
+        param = Parameter('P2')
+        self.d._parameters['P2'] = param
+        self.d._parameters['P5'] = Parameter('P5')
+        self.assertIs(self.d.element('P2'), param)
+        self.assertIs(self.d.element('P5'), self.d.parameter('P5'))
+
+    def test_matches_unindexed(self):
+        unindexed = self.d.clone()
+        unindexed.index_elements = False
+        for name in ('P1', 'P3', 'SV1', 'SV2', 'A1', 'R1', 'missing'):
+            for include_send_ports in (False, True):
+                try:
+                    expected = unindexed.element(
+                        name, include_send_ports=include_send_ports)
+                except NineMLNameError:
+                    self.assertRaises(NineMLNameError, self.d.element, name,
+                                      include_send_ports=include_send_ports)
+                else:
+                    self.assertEqual(
+                        self.d.element(name,
+                                       include_send_ports=include_send_ports),
+                        expected)
+
+    def test_on_condition_string(self):
+        regime = Regime('dv/dt = -v', name='r',
+                        transitions=[OnCondition('v > vt')])
+        # The index is keyed by the parsed trigger so the string is parsed
+        # before it is looked up again
+        self.assertIs(regime.element('v > vt'), regime.on_condition('v > vt'))
+        self.assertRaises(NineMLNameError, regime.element, 'v < vt')
+        self.assertRaises(NineMLNameError, regime.element, 'vt')
+
+    def test_miss_speed(self):
+        # Misses should be resolved from the index without falling back to
+        # the member accessors, which raise and catch an exception for every
+        # child type
+        unindexed = self.d.clone()
+        unindexed.index_elements = False
+        self.d.element('P1')  # Build the index
+
+        def time_misses(container):
+            start = time.time()
+            for _ in range(2000):
+                try:
+                    container.element('missing')
+                except NineMLNameError:
+                    pass
+            return time.time() - start
+
+        self.assertLess(time_misses(self.d) * 2, time_misses(unindexed))
@@ -0,0 +1,95 @@
+import unittest
+import pickle as pkl
+import tracemalloc
+from nineml.abstraction import (
+    Parameter, StateVariable, Alias, TimeDerivative, StateAssignment)
+from nineml.annotations import Annotations, EMPTY_ANNOTATIONS
+from nineml.user import Property
+from nineml.values import SingleValue
+from nineml.units import Quantity
+import nineml.units as un
+
+
+class _DictLayout(object):
+    """
+    The layout these objects had before they defined __slots__, i.e. a
+    __dict__ holding the same attributes and an Annotations object per object
+    """
+
+    def __init__(self, **attrs):
+        self._annotations = Annotations()
+        for name, value in attrs.items():
+            setattr(self, name, value)
+
+
+def allocated(factory, num_objects=2000):
+    """
+    Returns the number of bytes allocated per object created by the factory
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        objects = [factory() for _ in range(num_objects)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    assert len(objects) == num_objects
+    return float(after - before) / num_objects
+
+
+class TestMemoryFootprint(unittest.TestCase):
+
+    # Values shared between the objects so only the objects themselves are
+    # measured
+    quantity = Quantity(1.0, un.mV)
+    value = SingleValue(1.0)
+
+    objects = {
+        'Parameter': (
+            lambda: Parameter('P', un.voltage),
+            lambda: _DictLayout(_name='P', _dimension=un.voltage)),
+        'StateVariable': (
+            lambda: StateVariable('SV', un.voltage),
+            lambda: _DictLayout(_name='SV', _dimension=un.voltage)),
+        'Property': (
+            lambda: Property('P', TestMemoryFootprint.quantity),
+            lambda: _DictLayout(_name='P',
+                                _quantity=TestMemoryFootprint.quantity)),
+        'SingleValue': (
+            lambda: SingleValue(1.0),
+            lambda: _DictLayout(_value=1.0)),
+        'Quantity': (
+            lambda: Quantity(TestMemoryFootprint.value, un.mV),
+            lambda: _DictLayout(_value=TestMemoryFootprint.value,
+                                _units=un.mV))}
+
+    def test_footprint(self):
+        for name, (factory, dict_factory) in self.objects.items():
+            slotted = allocated(factory)
+            baseline = allocated(dict_factory)
+            self.assertLessEqual(
+                slotted * 2, baseline,
+                "{} objects use {} bytes each, which is not at least 2x "
+                "smaller than {} bytes".format(name, slotted, baseline))
+
+    def test_no_dict(self):
+        for obj in (Parameter('P', un.voltage),
+                    StateVariable('SV', un.voltage), Alias('A', 'P * 2'),
+                    TimeDerivative('SV', '-SV / P'),
+                    StateAssignment('SV', 'P'),
+                    Property('P', 1.0 * un.mV), SingleValue(1.0),
+                    Quantity(1.0, un.mV)):
+            self.assertFalse(hasattr(obj, '__dict__'),
+                             "{} has a __dict__".format(type(obj).__name__))
+            self.assertIs(obj._annotations, EMPTY_ANNOTATIONS)
+            clone = obj.clone()
+            self.assertEqual(obj, clone)
+            self.assertIs(clone._annotations, EMPTY_ANNOTATIONS)
+            self.assertEqual(obj, pkl.loads(pkl.dumps(obj)))
+            # Annotations are created on first access and survive pickling
+            obj.annotations.set(('A', 'NS'), 'B', 1)
+            self.assertEqual(
+                pkl.loads(pkl.dumps(obj)).get_annotation(('A', 'NS'), 'B'),
+                '1')
+            self.assertEqual(obj.clone().get_annotation(('A', 'NS'), 'B'),
+                             '1')
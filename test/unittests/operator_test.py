@@ -64,6 +64,30 @@ class TestValues(unittest.TestCase):
             self.assertEqual(float(val), val._value)
             self.assertLess(float(val) - int(val), 1.0)
 
+    def test_array_value_storage(self):
+        array = np.arange(10.0)
+        val = ArrayValue(array)
+        # Contiguous float64 arrays and buffers are used without copying
+        self.assertTrue(np.shares_memory(val.values, array))
+        self.assertTrue(np.shares_memory(
+            ArrayValue(memoryview(array)).values, array))
+        # Other iterables are converted to contiguous float64 arrays
+        for other in (ArrayValue(list(range(10))),
+                      ArrayValue(float(i) for i in range(10)),
+                      ArrayValue(array[::-1][::-1].copy(order='F'))):
+            self.assertIsInstance(other.values, np.ndarray)
+            self.assertEqual(other.values.dtype, np.float64)
+            self.assertTrue(other.values.flags.c_contiguous)
+            self.assertEqual(other.key, val.key)
+        self.assertEqual(ArrayValue(array, dtype=np.int32).dtype, np.int32)
+        # The buffer is read-only
+        with self.assertRaises(ValueError):
+            val.values[0] = 1.0
+        # The key is a hash of the contents
+        self.assertNotEqual(ArrayValue(array + 1.0).key, val.key)
+        self.assertNotEqual(ArrayValue(array[:-1]).key, val.key)
+        self.assertEqual(val, ArrayValue(array.copy()))
+
     def test_single_value_operators(self):
         result = SingleValue(10.5)  # Random starting value
         val_iter = cycle(single_values)
@@ -0,0 +1,242 @@
+from __future__ import unicode_literals
+import unittest
+import tempfile
+import shutil
+import os.path
+import gc
+import weakref
+import nineml
+from nineml import DocumentPool
+from nineml.abstraction import ComponentClassStore
+from nineml.abstraction import Dynamics, Parameter, StateVariable, Regime
+from nineml.user import DynamicsProperties
+from nineml.exceptions import NineMLUsageError
+import nineml.units as un
+
+
+class TestDocumentPool(unittest.TestCase):
+
+    num_libs = 3
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.lib_urls = []
+        for i in range(self.num_libs):
+            url = self.url('lib{}.xml'.format(i))
+            nineml.write(url, self.dynamics(i))
+            self.lib_urls.append(url)
+        self.main_urls = [self.url('main{}.xml'.format(i)) for i in range(2)]
+        for main_url in self.main_urls:
+            self.write_main(main_url)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def url(self, fname):
+        return os.path.join(self.tmp_dir, fname)
+
+    def dynamics(self, i, tau_name='tau'):
+        return Dynamics(
+            'Lib{}'.format(i),
+            parameters=[Parameter(tau_name, un.time)],
+            state_variables=[StateVariable('x', un.dimensionless)],
+            regimes=[Regime('dx/dt = -x/{}'.format(tau_name), name='r')])
+
+    def write_main(self, main_url):
+        pool = DocumentPool()
+        props = []
+        for i, lib_url in enumerate(self.lib_urls):
+            dyn = pool.document(lib_url)['Lib{}'.format(i)]
+            props.append(DynamicsProperties(
+                'P{}'.format(i), dyn,
+                {p.name: 1.0 * un.ms for p in dyn.parameters}))
+        nineml.write(main_url, *props)
+
+    def test_shared_library(self):
+        pool = DocumentPool()
+        docs = [nineml.read(u, pool=pool) for u in self.main_urls]
+        # Each library document is only loaded once
+        self.assertEqual(pool.num_loads, self.num_libs + 2)
+        self.assertEqual(len(pool), self.num_libs + 2)
+        for i in range(self.num_libs):
+            defns = [d['P{}'.format(i)].component_class for d in docs]
+            self.assertIs(defns[0], defns[1])
+            self.assertIs(defns[0].document, pool.document(self.lib_urls[i]))
+        self.assertEqual(pool.num_loads, self.num_libs + 2)
+        for main_url in self.main_urls:
+            self.assertEqual(pool.dependencies(main_url), set(self.lib_urls))
+        self.assertEqual(pool.dependents(self.lib_urls[0]),
+                         set(self.main_urls))
+        # Selective references into the pool
+        props = nineml.read(self.main_urls[0] + '#P1', pool=pool)
+        self.assertIs(props, docs[0]['P1'])
+        self.assertEqual(pool.num_loads, self.num_libs + 2)
+
+    def test_invalidate(self):
+        pool = DocumentPool()
+        doc = nineml.read(self.main_urls[0], pool=pool)
+        nineml.read(self.main_urls[1], pool=pool)
+        invalidated = pool.invalidate(self.lib_urls[0])
+        self.assertEqual(set(invalidated),
+                         set([self.lib_urls[0]] + self.main_urls))
+        # The other library documents are left in the pool
+        self.assertEqual(set(pool), set(self.lib_urls[1:]))
+        reloaded = nineml.read(self.main_urls[0], pool=pool)
+        self.assertIsNot(reloaded, doc)
+        self.assertEqual(reloaded, doc)
+        self.assertEqual(pool.num_loads, self.num_libs + 4)
+        # Reloading a document invalidates its dependents
+        nineml.read(self.lib_urls[1], pool=pool, reload=True)
+        self.assertNotIn(self.main_urls[0], pool)
+        self.assertEqual(pool.num_loads, self.num_libs + 5)
+
+    def test_refresh(self):
+        pool = DocumentPool()
+        doc = nineml.read(self.main_urls[0], pool=pool)
+        self.assertEqual(pool.refresh(), [])
+        self.modify_lib()
+        # Without 'check_modified' modified files are only detected on refresh
+        self.assertIs(pool.document(self.main_urls[0]), doc)
+        self.assertEqual(set(pool.refresh()),
+                         set([self.lib_urls[2], self.main_urls[0]]))
+        lib = pool.document(self.lib_urls[2])
+        self.assertEqual([p.name for p in lib['Lib2'].parameters], ['tau2'])
+
+    def test_check_modified(self):
+        pool = DocumentPool(check_modified=True)
+        nineml.read(self.main_urls[0], pool=pool)
+        self.modify_lib()
+        lib = pool.document(self.lib_urls[2])
+        self.assertNotIn(self.main_urls[0], pool)
+        self.assertEqual([p.name for p in lib['Lib2'].parameters], ['tau2'])
+
+    def modify_lib(self):
+        nineml.write(self.lib_urls[2],
+                     self.dynamics(2, tau_name='tau2'))
+        # Ensure the modification time differs from that of the old file
+        mtime = os.path.getmtime(self.lib_urls[2]) + 10
+        os.utime(self.lib_urls[2], (mtime, mtime))
+
+    def test_max_size(self):
+        self.assertRaises(NineMLUsageError, DocumentPool, max_size=0)
+        pool = DocumentPool(max_size=2)
+        for lib_url in self.lib_urls:
+            pool.document(lib_url)
+        self.assertEqual(list(pool), self.lib_urls[1:])
+        # Requesting a document moves it to the most recently used end
+        pool.document(self.lib_urls[1])
+        pool.document(self.lib_urls[0])
+        self.assertEqual(list(pool), [self.lib_urls[1], self.lib_urls[0]])
+        self.assertEqual(pool.num_loads, self.num_libs + 1)
+        # The main document is loaded even though its references don't fit
+        doc = nineml.read(self.main_urls[0], pool=pool)
+        self.assertEqual(len(pool), 2)
+        self.assertIn(self.main_urls[0], pool)
+        for i in range(self.num_libs):
+            self.assertEqual(doc['P{}'.format(i)].component_class.name,
+                             'Lib{}'.format(i))
+
+    def test_circular_reference(self):
+        pool = DocumentPool()
+        pool._loading.append(self.lib_urls[0])
+        self.assertRaises(NineMLUsageError, pool.document, self.lib_urls[0])
+
+
+class TestComponentClassStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        # Copies of the same dynamics under different names in different
+        # files
+        self.lib_urls = []
+        self.names = ['Cell', 'Cell', 'CellCopy', 'Other']
+        for i, name in enumerate(self.names[:-1]):
+            url = os.path.join(self.tmp_dir, 'lib{}.xml'.format(i))
+            nineml.write(url, Dynamics(
+                name,
+                parameters=[Parameter('tau', un.time)],
+                state_variables=[StateVariable('x', un.dimensionless)],
+                regimes=[Regime('dx/dt = -x/tau', name='r')]))
+            self.lib_urls.append(url)
+        self.other_url = os.path.join(self.tmp_dir, 'other.xml')
+        nineml.write(self.other_url, Dynamics(
+            'Other',
+            parameters=[Parameter('tau', un.time)],
+            state_variables=[StateVariable('x', un.dimensionless)],
+            regimes=[Regime('dx/dt = -2*x/tau', name='r')]))
+        self.main_url = os.path.join(self.tmp_dir, 'main.xml')
+        pool = DocumentPool()
+        props = [DynamicsProperties('P{}'.format(i), pool.document(u)[n],
+                                    {'tau': 1.0 * un.ms})
+                 for i, (u, n) in enumerate(zip(
+                     self.lib_urls + [self.other_url], self.names))]
+        nineml.write(self.main_url, *props)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_shared_definitions(self):
+        store = ComponentClassStore()
+        pool = DocumentPool(store=store)
+        doc = nineml.read(self.main_url, pool=pool)
+        defns = [doc['P{}'.format(i)].component_class for i in range(4)]
+        self.assertIs(defns[0], pool.document(self.lib_urls[0])['Cell'])
+        self.assertIs(defns[1], defns[0])
+        self.assertIs(defns[2], defns[0])
+        self.assertEqual(defns[3].name, 'Other')
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.num_duplicates, 2)
+        (shared, duplicates), = store.duplicates()
+        self.assertIs(shared, defns[0])
+        self.assertEqual(sorted(d.url for d in duplicates),
+                         self.lib_urls[1:])
+        # The duplicates are still held by the documents in the pool so no
+        # memory is saved
+        self.assertEqual(store.num_freed, 0)
+        self.assertEqual(store.memory_saved(), 0)
+        self.assertIn("'CellCopy' ({}) [still loaded]".format(
+            self.lib_urls[2]), store.report())
+        # Without a store each definition is a separate object
+        doc = nineml.read(self.main_url, pool=DocumentPool())
+        self.assertIsNot(doc['P0'].component_class,
+                         doc['P1'].component_class)
+
+    def test_digest(self):
+        dyns = [nineml.read(u, register=False)[n]
+                for u, n in zip(self.lib_urls + [self.other_url], self.names)]
+        store = ComponentClassStore(*dyns)
+        self.assertEqual(ComponentClassStore.digest(dyns[0]),
+                         ComponentClassStore.digest(dyns[2]))
+        self.assertNotEqual(ComponentClassStore.digest(dyns[0]),
+                            ComponentClassStore.digest(dyns[3]))
+        self.assertIn(dyns[1], store)
+        self.assertIs(store.add(dyns[2]), dyns[0])
+        # Only component classes are stored
+        self.assertIs(store.add(un.ms), un.ms)
+        self.assertEqual(len(store), 2)
+
+    def test_eviction(self):
+        # A fourth copy of the dynamics
+        lib_urls = self.lib_urls + [os.path.join(self.tmp_dir, 'lib3.xml')]
+        nineml.write(lib_urls[-1], nineml.read(self.lib_urls[2],
+                                               register=False)['CellCopy'])
+        store = ComponentClassStore()
+        pool = DocumentPool(max_size=1, store=store)
+        docs = [weakref.ref(pool.document(u)) for u in lib_urls]
+        gc.collect()
+        # Only the document of the shared copy and the one in the pool are
+        # kept alive, the documents of the duplicates are freed on eviction
+        self.assertEqual([d() is not None for d in docs],
+                         [True, False, False, True])
+        self.assertEqual(len(pool), 1)
+        self.assertIs(next(iter(store)), docs[0]()['Cell'])
+        self.assertEqual(store.num_duplicates, 3)
+        self.assertEqual(store.num_freed, 2)
+        self.assertGreater(store.memory_saved(), 0)
+        # Reloaded duplicates are only recorded once and are no longer freed
+        pool.document(lib_urls[1])
+        gc.collect()
+        self.assertEqual(store.num_duplicates, 3)
+        (_, duplicates), = store.duplicates()
+        self.assertEqual(sorted(d.url for d in duplicates if d.freed),
+                         lib_urls[2:])
@@ -1,9 +1,29 @@
 from __future__ import unicode_literals
 import unittest
 import tempfile
+import shutil
 import os
-from nineml import read, write
+import sys
+import json
+import subprocess
+import numpy
+try:
+    import yaml
+except ImportError:
+    yaml = None
+from nineml import read, write, serialize, unserialize, Document
 from nineml import DynamicsProperties
+from nineml.abstraction import Dynamics, Parameter, StateVariable, Regime
+from nineml.user import Property
+from nineml.values import SingleValue, ArrayValue
+from nineml.annotations import PY9ML_NS
+import nineml
+from nineml.serialization import format_to_serializer, _digests_path
+from nineml.serialization.xml import XMLSerializer, XMLUnserializer
+from nineml.serialization.json import (
+    dumps as json_dumps, _fast_dumps as fast_json_dumps)
+from nineml.exceptions import NineMLNameError, NineMLSerializationError
+import nineml.units as un
 from nineml.utils.comprehensive_example import dynA, dynB
 
 
@@ -23,3 +43,330 @@ class TestReadWrite(unittest.TestCase):
             definition='{}#dynB'.format(os.path.join(tmp_dir, self.tmp_path)),
             properties={'P1': 1, 'P2': 2, 'P3': 3})
         self.assertEqual(dynB, dynBProps.component_class)
+
+    def test_load_states(self):
+        time = un.Dimension('time', t=1)
+        ms = un.Unit('ms', time, power=-3)
+        s = un.Unit('s', time, power=0)
+        unserializer = XMLUnserializer(
+            serialize(Document(time, ms, s), format='xml', to_str=True))
+        doc = unserializer.document
+        self.assertIn('ms', doc)
+        self.assertNotIn('us', doc)
+        self.assertEqual(unserializer.load_state('ms'),
+                         XMLUnserializer.UNLOADED)
+        # Loading the unit loads the dimension it references
+        doc['ms']
+        self.assertEqual(unserializer.load_state('ms'), XMLUnserializer.LOADED)
+        self.assertEqual(unserializer.load_state('time'),
+                         XMLUnserializer.LOADED)
+        self.assertEqual(unserializer.load_state('s'),
+                         XMLUnserializer.UNLOADED)
+        self.assertRaises(NineMLNameError, unserializer.load_state, 'us')
+        # Elements that are requested while they are being loaded are
+        # circular references
+        unserializer._load_states['s'] = XMLUnserializer.LOADING
+        self.assertRaises(NineMLSerializationError, doc.__getitem__, 's')
+        unserializer._load_states['s'] = XMLUnserializer.UNLOADED
+        self.assertEqual(unserializer.unserialize()['s'], s)
+
+
+class TestIncrementalWrite(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.dynamics = Dynamics(
+            name='Dyn',
+            parameters=[Parameter('tau', un.time),
+                        Parameter('v_rest', un.voltage)],
+            state_variables=[StateVariable('v', un.voltage)],
+            regimes=[Regime('dv/dt = (v_rest - v) / tau', name='r')])
+        self.reused = []
+        reused = self.reused
+
+        class RecordingXMLSerializer(XMLSerializer):
+
+            def reuse_elem(self, serial_elem, parent, **options):
+                reused.append(serial_elem.get('name',
+                                              serial_elem.get('symbol')))
+                super(RecordingXMLSerializer, self).reuse_elem(
+                    serial_elem, parent, **options)
+
+        self.orig_serializer = format_to_serializer['xml']
+        format_to_serializer['xml'] = RecordingXMLSerializer
+
+    def tearDown(self):
+        format_to_serializer['xml'] = self.orig_serializer
+        shutil.rmtree(self.tmp_dir)
+
+    def document(self, num_props=5):
+        doc = Document(self.dynamics, un.ms, un.mV)
+        for i in range(num_props):
+            doc.add(DynamicsProperties(
+                'Props{}'.format(i), doc['Dyn'],
+                {'tau': (i + 1) * doc['ms'], 'v_rest': -65.0 * doc['mV']}),
+                clone=False)
+        return doc
+
+    def test_incremental_write(self):
+        url = os.path.join(self.tmp_dir, 'doc.xml')
+        full_url = os.path.join(self.tmp_dir, 'full.xml')
+        doc = self.document()
+        # Without previous fingerprints the whole document is written
+        write(url, doc, incremental=True)
+        self.assertEqual(self.reused, [])
+        # Change a property in place and add a new element
+        doc['Props2'].set(Property('tau', 10.0 * doc['ms']))
+        doc.add(DynamicsProperties(
+            'Props5', doc['Dyn'],
+            {'tau': 1.0 * doc['ms'], 'v_rest': -70.0 * doc['mV']}),
+            clone=False)
+        write(url, doc, incremental=True)
+        self.assertEqual(
+            sorted(self.reused),
+            sorted(['Dyn', 'ms', 'mV', 'time', 'voltage', 'Props0',
+                    'Props1', 'Props3', 'Props4']))
+        # The file is identical to a full write of the document
+        write(full_url, doc.clone())
+        with open(url, 'rb') as f, open(full_url, 'rb') as full_f:
+            self.assertEqual(f.read(), full_f.read())
+        self.assertEqual(
+            read(url, reload=True)['Props2'].property('tau').value,
+            SingleValue(10.0))
+        # Removing an element
+        del self.reused[:]
+        doc.remove(doc['Props0'])
+        write(url, doc, incremental=True)
+        self.assertNotIn('Props0', self.reused)
+        self.assertNotIn('Props0', read(url, reload=True))
+
+    def test_separate_process(self):
+        url = os.path.join(self.tmp_dir, 'doc.xml')
+        write(url, self.document())
+        self.assertFalse(os.path.exists(_digests_path(url)))
+        # Write the document incrementally from a separate interpreter
+        script = ("import sys, nineml; "
+                  "nineml.write(sys.argv[1], nineml.read(sys.argv[1]), "
+                  "incremental=True)")
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(
+            [os.path.dirname(os.path.dirname(nineml.__file__))] +
+            ([env['PYTHONPATH']] if 'PYTHONPATH' in env else []))
+        subprocess.check_call([sys.executable, '-c', script, url], env=env)
+        self.assertTrue(os.path.exists(_digests_path(url)))
+        # The digests written by the other process are used to reuse the
+        # unchanged elements
+        doc = read(url, reload=True)
+        doc['Props2'].set(Property('tau', 10.0 * doc['ms']))
+        write(url, doc, incremental=True)
+        self.assertEqual(
+            sorted(self.reused),
+            sorted(['Dyn', 'ms', 'mV', 'time', 'voltage', 'Props0',
+                    'Props1', 'Props3', 'Props4']))
+        self.assertEqual(
+            read(url, reload=True)['Props2'].property('tau').value,
+            SingleValue(10.0))
+
+    def test_fallback(self):
+        url = os.path.join(self.tmp_dir, 'doc.xml')
+        doc = self.document()
+        write(url, doc, incremental=True)
+        # Files modified since the last incremental write are written in full
+        mtime = os.path.getmtime(url) + 10
+        os.utime(url, (mtime, mtime))
+        write(url, doc, incremental=True)
+        self.assertEqual(self.reused, [])
+        # As are those written with different options
+        write(url, doc, incremental=True, version=2)
+        self.assertEqual(self.reused, [])
+        write(url, doc, incremental=True, version=2)
+        self.assertEqual(len(self.reused), len(doc))
+        # Formats that don't support incremental writes are written in full
+        yml_url = os.path.join(self.tmp_dir, 'doc.yml')
+        write(yml_url, doc, incremental=True)
+        doc['Props0'].set(Property('tau', 10.0 * doc['ms']))
+        write(yml_url, doc, incremental=True)
+        self.assertEqual(
+            read(yml_url, reload=True)['Props0'].property('tau').value,
+            SingleValue(10.0))
+
+
+class TestReadWriteOptions(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.document = Document(Dynamics(
+            name='Dyn',
+            parameters=[Parameter('tau', un.time),
+                        Parameter('v_rest', un.voltage)],
+            state_variables=[StateVariable('v', un.voltage)],
+            regimes=[Regime('dv/dt = (v_rest - v) / tau', name='r')]),
+            un.ms, un.mV)
+        ms, mV = self.document['ms'], self.document['mV']
+        for i in range(10):
+            self.document.add(DynamicsProperties(
+                'Props{}'.format(i), self.document['Dyn'],
+                {'tau': (i + 1) * ms, 'v_rest': -65.0 * mV}), clone=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_parallel_write(self):
+        for fmt, ext in (('xml', 'xml'), ('yaml', 'yml'), ('json', 'json')):
+            if format_to_serializer[fmt] is None:
+                continue
+            serializations = []
+            for num_processes in (None, 3):
+                url = os.path.join(self.tmp_dir, 'doc{}.{}'.format(
+                    num_processes, ext))
+                write(url, self.document, num_processes=num_processes,
+                      register=False)
+                with open(url, 'rb') as f:
+                    serializations.append(f.read())
+            self.assertEqual(serializations[0], serializations[1],
+                             "Parallel {} serialization differs from "
+                             "sequential".format(ext))
+            self.assertEqual(read(url, register=False), self.document)
+
+    def test_partial_read(self):
+        for fmt, ext in (('xml', 'xml'), ('yaml', 'yml'), ('json', 'json')):
+            if format_to_serializer[fmt] is None:
+                continue
+            url = os.path.join(self.tmp_dir, 'doc.' + ext)
+            write(url, self.document, register=False)
+            doc = read(url, only=['Props3', 'ms'])
+            # Only the requested elements and the elements they reference
+            # are loaded
+            self.assertEqual(
+                sorted(doc.keys()),
+                ['Dyn', 'Props3', 'mV', 'ms', 'time', 'voltage'])
+            self.assertTrue(doc['Props3'].equals(self.document['Props3'],
+                                                 check_urls=False))
+            self.assertRaises(NineMLNameError, doc.__getitem__, 'Props4')
+            # Partial documents are not cached
+            self.assertEqual(len(read(url, register=False)),
+                             len(self.document))
+            self.assertRaises(NineMLNameError, read, url, only=['Missing'])
+
+    @unittest.skipIf(format_to_serializer['yaml'] is None,
+                     "YAML serializer is not available")
+    def test_yaml_strings(self):
+        url = os.path.join(self.tmp_dir, 'doc.yml')
+        write(url, self.document, register=False)
+        with open(url) as f:
+            contents = f.read()
+        # Strings are written as plain text rather than binary
+        self.assertNotIn('!!binary', contents)
+        self.assertIn('Props3', contents)
+        # Files with binary strings (written by earlier versions under Python
+        # 3) can still be read
+        with open(url, 'w') as f:
+            yaml.dump(_to_bytes(yaml.load(contents, Loader=yaml.Loader)),
+                      stream=f)
+        self.assertTrue(read(url, register=False).equals(self.document,
+                                                         check_urls=False))
+
+    def test_stream_write(self):
+        # Add an array with a NaN, which is encoded by the standard library
+        # even if a faster JSON encoder is installed
+        ms = self.document['ms']
+        self.document.add(DynamicsProperties(
+            'ArrayProps', self.document['Dyn'],
+            {'tau': ArrayValue([1.0, 2.0, float('nan')]) * ms,
+             'v_rest': -65.0 * self.document['mV']}), clone=False)
+        for fmt, ext in (('xml', 'xml'), ('json', 'json')):
+            serializations = []
+            for stream in (False, True):
+                url = os.path.join(self.tmp_dir, 'doc{}.{}'.format(
+                    int(stream), ext))
+                write(url, self.document, stream=stream, register=False)
+                with open(url, 'rb') as f:
+                    serializations.append(f.read())
+            # Formats that don't support streaming are written normally
+            self.assertEqual(serializations[0], serializations[1],
+                             "Streamed {} serialization differs from "
+                             "normal".format(ext))
+        reread = read(url, register=False)
+        self.assertTrue(reread['Props3'].equals(self.document['Props3'],
+                                                check_urls=False))
+        self.assertEqual(len(reread['ArrayProps'].property('tau').value), 3)
+        # The output of the fast JSON encoders can be read by the standard
+        # library
+        with open(url) as f:
+            self.assertEqual(sorted(json.load(f)['NineML']),
+                             ['@namespace', 'Component', 'ComponentClass',
+                              'Dimension', 'Unit'])
+
+    def test_stream_write_fallback(self):
+        # The fast JSON encoders format some floats differently to the
+        # standard library (e.g. 1e-07), so if any element of the document
+        # can only be encoded by the standard library all elements must be
+        # for the streamed output to match
+        ms = self.document['ms']
+        for name, tau in (('Small', 1e-7), ('ZNaN', float('nan'))):
+            self.document.add(DynamicsProperties(
+                name, self.document['Dyn'],
+                {'tau': tau * ms, 'v_rest': -65.0 * self.document['mV']}),
+                clone=False)
+        serializations = []
+        for stream in (False, True):
+            url = os.path.join(self.tmp_dir, 'doc{}.json'.format(
+                int(stream)))
+            write(url, self.document, stream=stream, register=False)
+            with open(url, 'rb') as f:
+                serializations.append(f.read())
+        self.assertEqual(serializations[0], serializations[1])
+        self.assertIn(b'1e-07', serializations[0])
+        # Strings containing 'null' don't cause the fallback
+        obj = {'name': 'nullcline', 'value': 1e-7}
+        encoded = fast_json_dumps(obj)
+        if encoded is not None:  # A fast encoder is installed
+            self.assertEqual(json_dumps(obj), encoded)
+            self.assertIsNone(fast_json_dumps(
+                {'name': 'nullcline', 'value': float('nan')}))
+
+    def test_array_encoding(self):
+        array = ArrayValue(numpy.linspace(0.0, 1.0, 1000))
+        self.document.add(DynamicsProperties(
+            'ArrayProps', self.document['Dyn'],
+            {'tau': array * self.document['ms'],
+             'v_rest': -65.0 * self.document['mV']}), clone=False)
+        for fmt, ext in (('xml', 'xml'), ('yaml', 'yml'), ('json', 'json')):
+            if format_to_serializer[fmt] is None:
+                continue
+            sizes = []
+            for array_encoding in ('rows', 'base64'):
+                url = os.path.join(self.tmp_dir, 'doc_{}.{}'.format(
+                    array_encoding, ext))
+                write(url, self.document, array_encoding=array_encoding,
+                      register=False)
+                sizes.append(os.path.getsize(url))
+                reread = read(url, register=False)
+                self.assertTrue(numpy.array_equal(
+                    reread['ArrayProps'].property('tau').value.values,
+                    array.values))
+            self.assertLess(sizes[1], sizes[0] / 2)
+            with open(url) as f:
+                self.assertIn(ArrayValue.BASE64_ENCODING, f.read())
+        self.assertRaises(NineMLSerializationError, serialize, array,
+                          format='xml', array_encoding='hex')
+        # Unknown versions of the encoding are rejected
+        serial_elem = serialize(array, format='dict', version=2,
+                                array_encoding='base64')
+        encoded_elem = serial_elem['ArrayValue'][ArrayValue.ENCODED_ELEMENT]
+        # The encoded values are in the python-nineml namespace
+        self.assertEqual(encoded_elem['@namespace'], PY9ML_NS)
+        self.assertNotIn('encoding', serial_elem['ArrayValue'])
+        encoded_elem['encoding'] = 'base64-v99'
+        self.assertRaises(NineMLSerializationError, unserialize,
+                          serial_elem, ArrayValue, format='dict', version=2)
+
+
+def _to_bytes(elem):
+    if isinstance(elem, str):
+        elem = elem.encode('utf-8')
+    elif isinstance(elem, list):
+        elem = [_to_bytes(e) for e in elem]
+    elif isinstance(elem, dict):
+        elem = dict((_to_bytes(n), _to_bytes(e)) for n, e in elem.items())
+    return elem
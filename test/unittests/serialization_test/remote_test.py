@@ -0,0 +1,260 @@
+from __future__ import unicode_literals
+from future import standard_library
+standard_library.install_aliases()
+import unittest  # @IgnorePep8
+import tempfile  # @IgnorePep8
+import shutil  # @IgnorePep8
+import hashlib  # @IgnorePep8
+import threading  # @IgnorePep8
+import time  # @IgnorePep8
+import os.path  # @IgnorePep8
+import stat  # @IgnorePep8
+from http.server import HTTPServer, BaseHTTPRequestHandler  # @IgnorePep8
+from socketserver import ThreadingMixIn  # @IgnorePep8
+import nineml  # @IgnorePep8
+from nineml import DocumentPool, UrlCache  # @IgnorePep8
+from nineml.serialization.remote import (  # @IgnorePep8
+    DEFAULT_CACHE_DIR, _default_cache_dir)
+from nineml.abstraction import (  # @IgnorePep8
+    Dynamics, Parameter, StateVariable, Regime)
+from nineml.user import DynamicsProperties  # @IgnorePep8
+from nineml.exceptions import NineMLIOError, NineMLUsageError  # @IgnorePep8
+import nineml.units as un  # @IgnorePep8
+
+
+class _ModelServer(ThreadingMixIn, HTTPServer):
+    """
+    A stand-in for a model server, which serves files from a dictionary with
+    ETags after a delay and records the requests it receives
+    """
+
+    daemon_threads = True
+
+    def __init__(self, delay=0.0):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), _ModelRequestHandler)
+        self.files = {}
+        self.delay = delay
+        self.requests = []
+        self.num_not_modified = 0
+        self.num_concurrent = 0
+        self.max_concurrent = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return 'http://127.0.0.1:{}/'.format(self.server_address[1])
+
+
+class _ModelRequestHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+            server.num_concurrent += 1
+            server.max_concurrent = max(server.max_concurrent,
+                                        server.num_concurrent)
+        try:
+            time.sleep(server.delay)
+            try:
+                body = server.files[self.path.lstrip('/')]
+            except KeyError:
+                self.send_error(404)
+                return
+            etag = '"{}"'.format(hashlib.sha1(body).hexdigest())
+            if self.headers.get('If-None-Match') == etag:
+                with server.lock:
+                    server.num_not_modified += 1
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.num_concurrent -= 1
+
+    def log_message(self, *args):  # @UnusedVariable
+        pass
+
+
+class TestRemoteReferences(unittest.TestCase):
+
+    num_libs = 4
+    delay = 0.2
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+        self.server = _ModelServer(delay=self.delay)
+        self.server_thread = threading.Thread(
+            target=self.server.serve_forever)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+        base_url = self.server.base_url
+        props = []
+        for i in range(self.num_libs):
+            fname = 'lib{}.xml'.format(i)
+            lib_path = os.path.join(self.tmp_dir, fname)
+            nineml.write(lib_path, Dynamics(
+                'Lib{}'.format(i),
+                parameters=[Parameter('tau', un.time)],
+                state_variables=[StateVariable('x', un.dimensionless)],
+                regimes=[Regime('dx/dt = -x/tau', name='r')]))
+            lib = nineml.read(lib_path, register=False)
+            props.append(DynamicsProperties('P{}'.format(i),
+                                            lib['Lib{}'.format(i)],
+                                            {'tau': 1.0 * un.ms}))
+            with open(lib_path, 'rb') as f:
+                self.server.files[fname] = f.read()
+        main_path = os.path.join(self.tmp_dir, 'main.xml')
+        nineml.write(main_path, *props)
+        with open(main_path, 'rb') as f:
+            # Point the references to the libraries at the server
+            self.server.files['main.xml'] = f.read().replace(
+                (self.tmp_dir + '/').encode('utf-8'),
+                base_url.encode('utf-8'))
+        self.server.files['data.txt'] = b'1.0\n2.0\n3.0\n'
+        self.main_url = base_url + 'main.xml'
+        self.lib_urls = [base_url + 'lib{}.xml'.format(i)
+                         for i in range(self.num_libs)]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_prefetch(self):
+        pool = DocumentPool(cache=UrlCache(self.cache_dir))
+        fetched = pool.prefetch(self.main_url)
+        self.assertEqual(set(fetched), set([self.main_url] + self.lib_urls))
+        # The libraries are fetched concurrently
+        self.assertGreater(self.server.max_concurrent, 1)
+        num_requests = len(self.server.requests)
+        self.assertEqual(num_requests, self.num_libs + 1)
+        doc = nineml.read(self.main_url, pool=pool)
+        # Loading the document doesn't require any more requests
+        self.assertEqual(len(self.server.requests), num_requests)
+        for i in range(self.num_libs):
+            self.assertEqual(doc['P{}'.format(i)].component_class.name,
+                             'Lib{}'.format(i))
+        self.assertEqual(pool.dependencies(self.main_url),
+                         set(self.lib_urls))
+
+    def test_read_prefetch(self):
+        start = time.time()
+        doc = nineml.read(self.main_url, prefetch=True,
+                          pool=DocumentPool(cache=UrlCache(self.cache_dir)))
+        prefetch_time = time.time() - start
+        self.assertEqual(len(list(doc.elements)), self.num_libs + 2)
+        # Reading the document and its libraries one at a time takes a
+        # round trip per document
+        start = time.time()
+        nineml.read(self.main_url, pool=DocumentPool())
+        serial_time = time.time() - start
+        self.assertGreaterEqual(serial_time, self.delay * (self.num_libs + 1))
+        self.assertLess(prefetch_time, serial_time)
+
+    def test_cache_validation(self):
+        cache = UrlCache(self.cache_dir)
+        pool = DocumentPool(cache=cache)
+        pool.prefetch(self.main_url)
+        self.assertEqual(cache.num_downloads, self.num_libs + 1)
+        # A new cache in the same directory revalidates the cached copies
+        # instead of downloading them again
+        cache = UrlCache(self.cache_dir)
+        doc = nineml.read(self.main_url, prefetch=True,
+                          pool=DocumentPool(cache=cache))
+        self.assertEqual(cache.num_requests, self.num_libs + 1)
+        self.assertEqual(cache.num_downloads, 0)
+        self.assertEqual(self.server.num_not_modified, self.num_libs + 1)
+        self.assertEqual(doc['P0'].component_class.name, 'Lib0')
+        # Modified urls are downloaded again
+        self.server.files['lib0.xml'] = self.server.files['lib0.xml'].replace(
+            b'Lib0', b'Lib0b')
+        self.server.files['main.xml'] = self.server.files['main.xml'].replace(
+            b'>Lib0<', b'>Lib0b<')
+        cache = UrlCache(self.cache_dir)
+        doc = nineml.read(self.main_url, prefetch=True,
+                          pool=DocumentPool(cache=cache))
+        self.assertEqual(cache.num_downloads, 2)
+        self.assertEqual(doc['P0'].component_class.name, 'Lib0b')
+
+    def test_max_age(self):
+        cache = UrlCache(self.cache_dir, max_age=0.0)
+        cache.fetch_all(self.lib_urls)
+        self.assertEqual(cache.num_requests, self.num_libs)
+        cache.path(self.lib_urls[0])
+        self.assertEqual(cache.num_requests, self.num_libs + 1)
+        self.assertEqual(cache.num_downloads, self.num_libs)
+        cache = UrlCache(self.cache_dir)
+        cache.path(self.lib_urls[0])
+        cache.path(self.lib_urls[0])
+        self.assertEqual(cache.num_requests, 1)
+
+    def test_external_arrays(self):
+        data_url = self.server.base_url + 'data.txt'
+        self.server.files['main.xml'] = self.server.files['main.xml'].replace(
+            b'<SingleValue>1.0</SingleValue>',
+            '<ExternalArrayValue url="{}" mimetype="text/plain" '
+            'columnName="a"/>'.format(data_url).encode('utf-8'), 1)
+        cache = UrlCache(self.cache_dir)
+        pool = DocumentPool(cache=cache)
+        self.assertIn(data_url, pool.prefetch(self.main_url))
+        with cache.open(data_url) as f:
+            self.assertEqual(f.read(), self.server.files['data.txt'])
+        self.assertEqual(self.server.requests.count('/data.txt'), 1)
+
+    def test_errors(self):
+        cache = UrlCache(self.cache_dir)
+        missing_url = self.server.base_url + 'missing.xml'
+        self.assertRaises(NineMLIOError, cache.fetch, missing_url)
+        self.assertRaises(NineMLIOError, cache.fetch_all,
+                          [self.main_url, missing_url])
+        self.assertEqual(
+            cache.fetch_all([missing_url, self.lib_urls[0]],
+                            ignore_errors=True),
+            [self.lib_urls[0]])
+        self.assertRaises(NineMLUsageError, DocumentPool().prefetch,
+                          self.main_url)
+        # Missing references are only reported when they are loaded
+        self.server.files['main.xml'] = self.server.files['main.xml'].replace(
+            b'lib0.xml', b'missing.xml')
+        pool = DocumentPool(cache=UrlCache(self.cache_dir))
+        pool.prefetch(self.main_url)
+        self.assertRaises(NineMLIOError, nineml.read, self.main_url,
+                          pool=pool)
+
+
+class TestCacheDir(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.environ = dict(os.environ)
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.environ)
+        shutil.rmtree(self.tmp_dir)
+
+    def test_default_per_user(self):
+        os.environ['XDG_CACHE_HOME'] = self.tmp_dir
+        self.assertEqual(_default_cache_dir(),
+                         os.path.join(self.tmp_dir, 'nineml', 'urls'))
+        del os.environ['XDG_CACHE_HOME']
+        os.environ['HOME'] = self.tmp_dir
+        self.assertEqual(_default_cache_dir(),
+                         os.path.join(self.tmp_dir, '.cache', 'nineml',
+                                      'urls'))
+        # The default isn't shared between the users of the machine
+        self.assertNotEqual(DEFAULT_CACHE_DIR, os.path.join(
+            tempfile.gettempdir(), 'nineml-url-cache'))
+
+    @unittest.skipIf(os.name != 'posix', "File modes are only set on POSIX")
+    def test_private(self):
+        cache_dir = os.path.join(self.tmp_dir, 'cache')
+        UrlCache(cache_dir)
+        self.assertEqual(stat.S_IMODE(os.stat(cache_dir).st_mode) & 0o077, 0)
@@ -1,7 +1,12 @@
 import unittest
+import pickle
+import numpy
 from sympy import sympify
 from nineml import units as un
 from nineml.serialization.xml import XMLUnserializer
+from nineml.values import ArrayValue
+from nineml.user import Property
+from nineml.exceptions import NineMLDimensionError, NineMLUsageError
 
 
 all_dims = [getattr(un, d) for d in dir(un)
@@ -34,8 +39,140 @@ class TestUnitsDimensions(unittest.TestCase):
                 self.assertEqual(getattr(dim, abbrev), dim._dims[i])
                 self.assertEqual(getattr(dim, name), dim._dims[i])
 
+    def test_interning(self):
+        document1 = XMLUnserializer(root=units_xml_str).unserialize()
+        document2 = XMLUnserializer(root=units_xml_str).unserialize()
+        # Each document has its own units but their keys are shared with
+        # each other and the module-level units
+        self.assertIsNot(document1['mV'], document2['mV'])
+        self.assertIs(document1['mV'].intern_key, document2['mV'].intern_key)
+        self.assertIs(document1['mV'].intern_key, un.mV.intern_key)
+        self.assertIs(document1['voltage']._dims, un.voltage._dims)
+        # Names are ignored when checking equality
+        millivolt = un.Unit('millivolt', un.voltage, power=-3)
+        self.assertEqual(millivolt, un.mV)
+        self.assertEqual(hash(millivolt), hash(un.mV))
+        self.assertNotEqual(un.mV, un.V)
+        self.assertNotEqual(un.degC, un.K)
+        self.assertNotEqual(un.voltage, un.current)
+        self.assertEqual(un.voltage / un.time, un.voltage * un.per_time)
+        self.assertIs((un.mV / un.ms).intern_key,
+                      un.Unit('V_per_s', un.voltage / un.time,
+                              power=0).intern_key)
+        unpickled = pickle.loads(pickle.dumps(millivolt))
+        self.assertIs(unpickled.intern_key, un.mV.intern_key)
+        self.assertIs(unpickled.dimension._dims, un.voltage._dims)
+
+
 # FIXME: Currently the 'scale' attribute isn't supported, need to work out
 #        whether we want to do this or not.
+class TestQuantityArray(unittest.TestCase):
+
+    def setUp(self):
+        self.values = numpy.array([1.0, 2.0, 3.0])
+        self.array = un.QuantityArray(self.values, un.mV)
+
+    def test_arithmetic(self):
+        # Other operands are converted into the units of the first
+        summed = self.array + un.QuantityArray([0.001, 0.002, 0.003], un.V)
+        self.assertEqual(summed.units, un.mV)
+        self.assertTrue(numpy.allclose(summed.values, [2.0, 4.0, 6.0]))
+        self.assertTrue(numpy.allclose((self.array - 1.0 * un.mV).values,
+                                       [0.0, 1.0, 2.0]))
+        self.assertRaises(NineMLDimensionError, self.array.__add__,
+                          1.0 * un.ms)
+        self.assertRaises(NineMLDimensionError, self.array.__add__, 1.0)
+        # Units are combined by multiplication/division
+        product = self.array * un.QuantityArray(self.values, un.nS)
+        self.assertEqual(product.units.dimension,
+                         un.voltage * un.conductance)
+        self.assertEqual(product.units.power, -12)
+        self.assertTrue(numpy.allclose(product.values, [1.0, 4.0, 9.0]))
+        self.assertEqual((self.array / un.ms).units.dimension,
+                         un.voltage / un.time)
+        self.assertEqual((1.0 / self.array).units.power, 3)
+        self.assertEqual((self.array ** 2).units.power, -6)
+        self.assertTrue(numpy.allclose((-abs(self.array)).values,
+                                       -self.values))
+
+    def test_broadcasting(self):
+        column = un.QuantityArray(numpy.array([[0.0], [10.0]]), un.mV)
+        self.assertEqual((self.array + column).shape, (2, 3))
+        # NumPy arrays as left operands defer to the quantity array
+        scaled = numpy.array([[1.0], [2.0]]) * self.array
+        self.assertIsInstance(scaled, un.QuantityArray)
+        self.assertEqual(scaled.shape, (2, 3))
+        self.assertEqual(scaled.units, un.mV)
+
+    def test_in_units(self):
+        self.assertTrue(numpy.allclose(self.array.in_units(un.V),
+                                       [0.001, 0.002, 0.003]))
+        # No conversion necessary so the same array is returned
+        self.assertIs(self.array.in_units(un.mV), self.values)
+        self.assertRaises(NineMLDimensionError, self.array.in_units, un.ms)
+        array = un.QuantityArray(self.values, un.mV)
+        array.set_units(un.V)
+        self.assertEqual(array.units, un.V)
+        self.assertTrue(numpy.allclose(array.values, [0.001, 0.002, 0.003]))
+        converted = un.QuantityArray(self.array, un.V)
+        self.assertEqual(converted.units, un.V)
+        self.assertTrue(numpy.allclose(converted.values, array.values))
+        # Quantities are converted into the given units too
+        converted = un.QuantityArray(
+            un.Quantity(ArrayValue([1.0, 2.0]), un.mV), un.V)
+        self.assertEqual(converted.units, un.V)
+        self.assertTrue(numpy.allclose(converted.values, [0.001, 0.002]))
+        converted = un.QuantityArray(1.0 * un.mV, un.V)
+        self.assertTrue(numpy.allclose(converted.values, 0.001))
+
+    def test_reductions(self):
+        matrix = un.QuantityArray(numpy.arange(6.0).reshape(2, 3), un.ms)
+        self.assertEqual(float(matrix.sum()), 15.0)
+        self.assertTrue(numpy.allclose(matrix.sum(axis=0).values,
+                                       [3.0, 5.0, 7.0]))
+        self.assertEqual(float(matrix.mean()), 2.5)
+        self.assertEqual(float(matrix.min()), 0.0)
+        self.assertEqual(float(matrix.max()), 5.0)
+        self.assertEqual(matrix.std().units, un.ms)
+        self.assertAlmostEqual(float(matrix.var()), numpy.arange(6.0).var())
+        self.assertEqual(matrix.var().units.power, -6)
+
+    def test_comparisons(self):
+        self.assertEqual(list(self.array > 0.0015 * un.V),
+                         [False, True, True])
+        self.assertEqual(list(self.array <= self.array), [True] * 3)
+        self.assertEqual(list(self.array == un.QuantityArray(
+            [0.001, 0.0, 0.003], un.V)), [True, False, True])
+        self.assertRaises(NineMLDimensionError, self.array.__lt__,
+                          1.0 * un.ms)
+
+    def test_dimensionless_power(self):
+        # Plain numbers are scaled into the units of dimensionless arrays
+        milli = un.Unit('milli', un.dimensionless, power=-3)
+        array = un.QuantityArray([1.0, 2.0], milli)
+        self.assertTrue(numpy.allclose((array + 1).values, [1001.0, 1002.0]))
+        self.assertTrue(numpy.allclose((array - 1).values, [-999.0, -998.0]))
+        self.assertTrue(numpy.allclose((1 - array).values, [999.0, 998.0]))
+        self.assertEqual(list(array < 0.0015), [True, False])
+
+    def test_no_copy_conversions(self):
+        value = self.array.to_value()
+        self.assertIsInstance(value, ArrayValue)
+        self.assertTrue(numpy.shares_memory(value.values, self.values))
+        prop = self.array.to_property('v')
+        self.assertIsInstance(prop, Property)
+        self.assertEqual(prop.units, un.mV)
+        for array in (prop.value.values, un.QuantityArray(prop).values,
+                      un.QuantityArray(value).values,
+                      # Properties can be created directly from quantity arrays
+                      Property('v', self.array).value.values):
+            self.assertTrue(numpy.shares_memory(array, self.values))
+        self.assertEqual(un.QuantityArray(prop).units, un.mV)
+        self.assertEqual(float(un.QuantityArray(2.0 * un.mV)), 2.0)
+        self.assertRaises(NineMLUsageError, un.QuantityArray(
+            numpy.ones((2, 2))).to_value)
+
+
 units_xml_str = """<?xml version="1.0" encoding="UTF-8"?>
 <NineML xmlns="http://nineml.net/9ML/2.0">
   <Annotations>
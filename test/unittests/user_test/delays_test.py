@@ -0,0 +1,104 @@
+import unittest
+import numpy
+from nineml.abstraction import (
+    Dynamics, Regime, StateVariable, Parameter, RandomDistribution)
+from nineml.abstraction.connectionrule import (
+    all_to_all_connection_rule, one_to_one_connection_rule,
+    probabilistic_connection_rule)
+from nineml.user import (
+    Population, DynamicsProperties, Projection, ConnectionRuleProperties,
+    RandomDistributionProperties, Network, DelayAnalysis)
+from nineml.values import ArrayValue, RandomDistributionValue
+from nineml.exceptions import NineMLUsageError
+from nineml import units as un
+
+
+class TestDelayAnalysis(unittest.TestCase):
+
+    def setUp(self):
+        cell = DynamicsProperties(
+            name='CellProps',
+            definition=Dynamics(
+                name='Cell',
+                state_variables=[StateVariable('v', dimension=un.voltage)],
+                regimes=[Regime('dv/dt = -v / tau', name='R1')],
+                parameters=[Parameter('tau', dimension=un.time)]),
+            properties={'tau': 10.0 * un.ms})
+        self.a = Population('A', 10, cell)
+        self.b = Population('B', 4, cell)
+        uniform = RandomDistributionProperties(
+            name='UniformDelay',
+            definition=RandomDistribution(
+                name='Uniform',
+                parameters=[Parameter('minimum', un.dimensionless),
+                            Parameter('maximum', un.dimensionless)],
+                standard_library=(
+                    'http://www.uncertml.org/distributions/uniform')),
+            properties={'minimum': 2.0, 'maximum': 4.0})
+        self.projections = [
+            Projection('AllToAll', pre=self.a, post=self.b, response=cell,
+                       delay=1.0 * un.ms,
+                       connection_rule_properties=ConnectionRuleProperties(
+                           'AllToAllConn', all_to_all_connection_rule)),
+            Projection('OneToOne', pre=self.b, post=self.b, response=cell,
+                       delay=ArrayValue([0.5, 0.6, 0.7, 0.8]) * un.ms,
+                       connection_rule_properties=ConnectionRuleProperties(
+                           'OneToOneConn', one_to_one_connection_rule)),
+            Projection('Probabilistic', pre=self.a, post=self.a,
+                       response=cell,
+                       delay=RandomDistributionValue(uniform) * un.ms,
+                       connection_rule_properties=ConnectionRuleProperties(
+                           'ProbConn', probabilistic_connection_rule,
+                           properties={'probability': 0.5}))]
+        self.network = Network('Net', populations=[self.a, self.b],
+                               projections=self.projections)
+
+    def test_limits(self):
+        analysis = self.network.delay_analysis(random_seed=1)
+        self.assertAlmostEqual(analysis.min_delay, 0.5)
+        self.assertGreater(analysis.max_delay, 3.9)
+        self.assertLess(analysis.max_delay, 4.0)
+        self.assertEqual(analysis.projection_limits['AllToAll'], (1.0, 1.0))
+        bounds = self.network.delay_analysis(units=un.s, limits='bounds',
+                                             random_seed=1)
+        self.assertAlmostEqual(bounds.min_delay, 0.0005)
+        self.assertAlmostEqual(bounds.max_delay, 0.004)
+        self.assertEqual(bounds.ring_buffer_size(0.0001), 41)
+        self.assertRaises(NineMLUsageError, self.network.delay_analysis,
+                          units=un.mV)
+        self.assertRaises(NineMLUsageError, self.network.delay_analysis,
+                          limits='exact')
+
+    def test_histogram(self):
+        analysis = self.network.delay_analysis(bins=7, random_seed=1)
+        counts, edges = analysis.histogram
+        self.assertEqual(len(counts), 7)
+        self.assertEqual(len(edges), 8)
+        # Weighted by the (expected) number of connections of each projection
+        self.assertAlmostEqual(counts.sum(), 40 + 4 + 50)
+        self.assertAlmostEqual(counts[0], 4)
+        self.assertAlmostEqual(counts[1], 40)
+        analysis = self.network.delay_analysis(
+            bins=numpy.array([0.0, 1.5, 5.0]), random_seed=1,
+            num_connections={'Probabilistic': 30})
+        self.assertTrue(numpy.allclose(analysis.histogram[0], [44, 30]))
+        empty = Network('Empty', populations=[self.a]).delay_analysis()
+        self.assertEqual(empty.min_delay, 0.0)
+        self.assertEqual(empty.histogram[0].sum(), 0)
+
+    def test_supplied_num_connections(self):
+        # The expected number of connections can't be derived from a random
+        # probability, so it must be supplied
+        uniform = self.projections[2].delay.value.distribution
+        projection = Projection(
+            'RandomProb', pre=self.a, post=self.b,
+            response=self.projections[0].response, delay=1.0 * un.ms,
+            connection_rule_properties=ConnectionRuleProperties(
+                'RandomProbConn', probabilistic_connection_rule,
+                properties={'probability': (RandomDistributionValue(uniform) *
+                                            un.unitless)}))
+        self.assertRaises(NineMLUsageError,
+                          projection.expected_num_connections)
+        analysis = DelayAnalysis([projection],
+                                 num_connections={'RandomProb': 5})
+        self.assertEqual(analysis.histogram[0].sum(), 5)
@@ -0,0 +1,147 @@
+import unittest
+import multiprocessing
+import numpy
+from nineml.abstraction import (
+    Dynamics, Regime, StateVariable, Parameter, AnalogSendPort)
+from nineml.abstraction.connectionrule import (
+    all_to_all_connection_rule, one_to_one_connection_rule,
+    explicit_connection_rule, probabilistic_connection_rule,
+    random_fan_in_connection_rule, random_fan_out_connection_rule)
+from nineml.user import (
+    Population, DynamicsProperties, Projection, ConnectionRuleProperties,
+    Network, Selection, Concatenate, NetworkPartition)
+from nineml.values import ArrayValue
+from nineml.exceptions import NineMLUsageError
+from nineml import units as un
+
+
+def build_network():
+    dynamics = Dynamics(
+        name='Cell',
+        state_variables=[StateVariable('v', dimension=un.voltage)],
+        regimes=[Regime('dv/dt = -v / tau', name='R1')],
+        parameters=[Parameter('tau', dimension=un.time)],
+        analog_ports=[AnalogSendPort('v', dimension=un.voltage)])
+    cell = DynamicsProperties(name='CellProps', definition=dynamics,
+                              properties={'tau': 10.0 * un.ms})
+    a = Population('A', 40, cell)
+    b = Population('B', 25, cell)
+    ab = Selection('AB', Concatenate((a, b)))
+
+    def projection(name, pre, post, rule, **properties):
+        return Projection(
+            name, pre=pre, post=post, response=cell, delay=1.0 * un.ms,
+            connection_rule_properties=ConnectionRuleProperties(
+                name=name + 'Conn', definition=rule,
+                properties=properties))
+
+    projections = [
+        projection('AllToAll', a, b, all_to_all_connection_rule),
+        projection('OneToOne', b, b, one_to_one_connection_rule),
+        projection('Explicit', b, a, explicit_connection_rule,
+                   sourceIndices=ArrayValue([0, 3, 3, 24]),
+                   destinationIndices=ArrayValue([39, 1, 0, 1])),
+        projection('Probabilistic', b, ab, probabilistic_connection_rule,
+                   probability=0.2),
+        projection('RandomFanIn', ab, a, random_fan_in_connection_rule,
+                   number=3),
+        projection('RandomFanOut', a, ab, random_fan_out_connection_rule,
+                   number=4)]
+    return Network('Net', populations=[a, b], projections=projections,
+                   selections=[ab])
+
+
+def sample_rank(args):
+    num_ranks, rank, strategy = args
+    partition = build_network().partition(num_ranks, strategy=strategy)
+    return dict((p.name, partition.local_connections(p, rank, random_seed=7))
+                for p in partition.network.projections)
+
+
+class TestNetworkPartition(unittest.TestCase):
+
+    def setUp(self):
+        self.network = build_network()
+
+    def test_local_cells(self):
+        for strategy in NetworkPartition.strategies:
+            partition = self.network.partition(3, strategy=strategy)
+            owned = numpy.zeros(65, dtype=int)
+            for rank in range(3):
+                for name, local in partition.local_cells(rank).items():
+                    global_indices = partition.global_indices(name)[
+                        numpy.asarray(local)]
+                    owned[global_indices] += 1
+                    self.assertTrue(numpy.all(
+                        partition.rank_of(name, numpy.asarray(local)) ==
+                        rank))
+            self.assertTrue(numpy.all(owned == 1))
+        partition = self.network.partition(3)
+        self.assertEqual(partition.local_cells(1),
+                         {'A': range(1, 40, 3), 'B': range(0, 25, 3)})
+        self.assertRaises(NineMLUsageError, partition.local_cells, 3)
+        self.assertRaises(NineMLUsageError, self.network.partition, 0)
+        self.assertRaises(NineMLUsageError, self.network.partition, 2,
+                          strategy='random')
+
+    def test_balanced(self):
+        partition = self.network.partition(4, strategy='balanced')
+        loads = partition.expected_loads() + 1.0
+        rank_loads = numpy.bincount(
+            partition.rank_of('AB'), weights=loads, minlength=4)
+        self.assertLess(rank_loads.max() - rank_loads.min(), 2 * loads.max())
+        # B receives all-to-all connections from A so has fewer cells per rank
+        cells = [sum(len(c) for c in partition.local_cells(r).values())
+                 for r in range(4)]
+        self.assertGreater(cells[0], cells[3])
+
+    def test_local_connections(self):
+        partitions = [self.network.partition(n, strategy=s)
+                      for n, s in ((1, 'round_robin'), (3, 'round_robin'),
+                                   (4, 'balanced'))]
+        for projection in self.network.projections:
+            full = list(zip(*partitions[0].local_connections(
+                projection, 0, random_seed=7)))
+            self.assertTrue(full)
+            for partition in partitions[1:]:
+                combined = []
+                for rank in range(partition.num_ranks):
+                    sources, destinations = partition.local_connections(
+                        projection, rank, random_seed=7)
+                    self.assertTrue(numpy.all(numpy.diff(destinations) >= 0))
+                    self.assertTrue(numpy.all(partition.rank_of(
+                        projection.post, destinations) == rank))
+                    combined.extend(zip(sources, destinations))
+                self.assertEqual(sorted(combined), sorted(full),
+                                 "Mismatch in {}".format(projection.name))
+        explicit = partitions[0].local_connections('Explicit', 0, 7)
+        self.assertEqual(list(zip(*explicit)), [(3, 0), (3, 1), (24, 1),
+                                                (0, 39)])
+        fan_in = partitions[0].local_connections('RandomFanIn', 0, 7)
+        self.assertTrue(numpy.all(numpy.bincount(fan_in[1]) == 3))
+        fan_out = partitions[0].local_connections('RandomFanOut', 0, 7)
+        self.assertTrue(numpy.all(numpy.bincount(fan_out[0]) == 4))
+        self.assertRaises(NineMLUsageError, partitions[0].local_connections,
+                          'AllToAll', 0, None)
+
+    def test_multiple_processes(self):
+        num_ranks = 3
+        pool = multiprocessing.Pool(num_ranks)
+        try:
+            results = pool.map(sample_rank, [(num_ranks, r, 'balanced')
+                                             for r in range(num_ranks)])
+        finally:
+            pool.close()
+            pool.join()
+        serial = sample_rank((1, 0, 'round_robin'))
+        for name, (sources, destinations) in serial.items():
+            combined = sorted(chain_pairs(r[name] for r in results))
+            self.assertEqual(combined,
+                             sorted(zip(sources, destinations)))
+
+
+def chain_pairs(results):
+    pairs = []
+    for sources, destinations in results:
+        pairs.extend(zip(sources, destinations))
+    return pairs
@@ -1,6 +1,14 @@
 import os.path
 import unittest
+import numpy
 from nineml import read
+from nineml.abstraction import (
+    Dynamics, Regime, StateVariable, Parameter, RandomDistribution)
+from nineml.user import (
+    Population, DynamicsProperties, RandomDistributionProperties)
+from nineml.values import ArrayValue, RandomDistributionValue
+from nineml.exceptions import NineMLUsageError, NineMLValueError
+from nineml import units as un
 from nineml.serialization.xml import XMLUnserializer
 from nineml.serialization import DEFAULT_VERSION
 
@@ -18,3 +26,71 @@ from nineml.serialization import DEFAULT_VERSION
 #         self.assertEquals(document1, document2,
 #                           "Documents don't match after write/read from file:\n"
 #                           "{}".format(document2.find_mismatch(document1)))
+
+
+class TestPopulationParameterArrays(unittest.TestCase):
+
+    def setUp(self):
+        self.dynamics = Dynamics(
+            name='Cell',
+            state_variables=[StateVariable('v', dimension=un.voltage)],
+            regimes=[Regime('dv/dt = (v_rest - v) / tau', name='R1')],
+            parameters=[Parameter('tau', dimension=un.time),
+                        Parameter('v_rest', dimension=un.voltage)])
+        self.rand_distr = RandomDistributionProperties(
+            name='UniformTau',
+            definition=RandomDistribution(
+                name='Uniform',
+                parameters=[Parameter('minimum', un.dimensionless),
+                            Parameter('maximum', un.dimensionless)],
+                standard_library=(
+                    'http://www.uncertml.org/distributions/uniform')),
+            properties={'minimum': 10.0, 'maximum': 20.0})
+        self.v_rest = numpy.linspace(-70.0, -60.0, 10)
+
+    def population(self, size=10):
+        return Population(
+            'Pop', size, DynamicsProperties(
+                name='CellProps', definition=self.dynamics,
+                properties={
+                    'tau': RandomDistributionValue(self.rand_distr) * un.ms,
+                    'v_rest': ArrayValue(self.v_rest) * un.mV},
+                initial_values={'v': -65.0 * un.mV}))
+
+    def test_parameter_arrays(self):
+        pop = self.population()
+        arrays = pop.parameter_arrays(random_seed=1)
+        self.assertEqual(set(arrays), set(['tau', 'v_rest', 'v']))
+        for array in arrays.values():
+            self.assertEqual(array.shape, (10,))
+            self.assertFalse(array.flags.writeable)
+        self.assertTrue((arrays['v'] == -65.0).all())
+        # Array values are not copied
+        self.assertTrue(numpy.shares_memory(
+            arrays['v_rest'], pop.cell.property('v_rest').value.values))
+        self.assertTrue(((arrays['tau'] >= 10.0) &
+                         (arrays['tau'] < 20.0)).all())
+        self.assertTrue(numpy.array_equal(
+            arrays['tau'], pop.parameter_arrays(random_seed=1)['tau']))
+        self.assertFalse(numpy.array_equal(
+            arrays['tau'], pop.parameter_arrays(random_seed=2)['tau']))
+
+    def test_cell_range(self):
+        pop = self.population()
+        arrays = pop.parameter_arrays(random_seed=1)
+        local = pop.parameter_arrays(random_seed=1, start=3, stop=7)
+        for name, array in arrays.items():
+            self.assertTrue(numpy.array_equal(array[3:7], local[name]))
+
+    def test_units(self):
+        arrays = self.population().parameter_arrays(
+            units={'v_rest': un.V, 'v': un.V}, random_seed=1)
+        self.assertTrue(numpy.allclose(arrays['v_rest'], self.v_rest / 1000))
+        self.assertAlmostEqual(arrays['v'][0], -0.065)
+        self.assertRaises(NineMLUsageError,
+                          self.population().parameter_arrays,
+                          units={'v': un.ms})
+
+    def test_size_mismatch(self):
+        self.assertRaises(NineMLValueError,
+                          self.population(size=5).parameter_arrays)
@@ -1,12 +1,16 @@
 from __future__ import division
 import unittest
+import numpy
 from lxml import etree
 from nineml.abstraction import (
     Parameter, Dynamics, Regime, On, OutputEvent, StateVariable,
     StateAssignment, AnalogSendPort, AnalogReceivePort,
-    ConnectionRule)
+    ConnectionRule, RandomDistribution)
 from nineml.user import (
-    Population, DynamicsProperties, Projection, ConnectionRuleProperties)
+    Population, DynamicsProperties, Projection, ConnectionRuleProperties,
+    RandomDistributionProperties)
+from nineml.values import RandomDistributionValue
+from nineml.exceptions import NineMLUsageError
 from nineml import units as un, Document
 from nineml.serialization import NINEML_NS
 
@@ -101,6 +105,32 @@ class TestProjection(unittest.TestCase):
                           "Projection failed XML roundtrip:\n{}"
                           .format(self.projection.find_mismatch(projection2)))
 
+    def test_delay_array(self):
+        delays = self.projection.delay_array(units=un.s)
+        self.assertEqual(delays.shape, (1,))
+        self.assertAlmostEqual(delays[0], 0.001)
+        self.assertFalse(delays.flags.writeable)
+        self.projection._delay = RandomDistributionValue(
+            RandomDistributionProperties(
+                name='UniformDelay',
+                definition=RandomDistribution(
+                    name='Uniform',
+                    parameters=[Parameter('minimum', un.dimensionless),
+                                Parameter('maximum', un.dimensionless)],
+                    standard_library=(
+                        'http://www.uncertml.org/distributions/uniform')),
+                properties={'minimum': 1.0, 'maximum': 2.0})) * un.ms
+        delays = self.projection.delay_array(num_connections=100,
+                                             random_seed=3)
+        self.assertEqual(delays.shape, (100,))
+        self.assertTrue(((delays >= 1.0) & (delays < 2.0)).all())
+        # Sampled per connection so any range of connections can be drawn
+        self.assertTrue(numpy.array_equal(
+            delays[40:60], self.projection.delay_array(
+                num_connections=100, random_seed=3, start=40, stop=60)))
+        self.assertRaises(NineMLUsageError, self.projection.delay_array,
+                          num_connections=100, units=un.mV)
+
 
 class TestConnectivity(unittest.TestCase):
 
@@ -0,0 +1,139 @@
+import unittest
+import numpy
+from nineml.abstraction import Parameter, RandomDistribution
+from nineml.user import RandomDistributionProperties, RandomDistributionSampler
+from nineml.user.randomdistribution import standard_library_samplers
+from nineml.values import RandomDistributionValue
+from nineml.exceptions import NineMLUsageError
+from nineml import units as un
+
+
+def distribution(standard_type, **properties):
+    return RandomDistributionProperties(
+        name=standard_type.replace('-', '_') + 'Props',
+        definition=RandomDistribution(
+            name=standard_type.replace('-', '_'),
+            parameters=[Parameter(n, un.dimensionless) for n in properties],
+            standard_library=(
+                'http://www.uncertml.org/distributions/' + standard_type)),
+        properties=properties)
+
+
+class TestRandomDistributionSampling(unittest.TestCase):
+
+    distributions = {
+        'bernoulli': {'probabilities': 0.3},
+        'beta': {'alpha': 2.0, 'beta': 5.0},
+        'binomial': {'numberOfTrials': 10, 'probabilityOfSuccess': 0.4},
+        'cauchy': {'location': 0.0, 'scale': 1.0},
+        'chi-square': {'degreesOfFreedom': 3.0},
+        'exponential': {'rate': 2.0},
+        'f': {'numerator': 5.0, 'denominator': 20.0},
+        'gamma': {'shape': 2.0, 'scale': 3.0},
+        'geometric': {'probability': 0.25},
+        'hypergeometric': {'numberOfSuccesses': 20, 'numberOfTrials': 10,
+                           'populationSize': 50},
+        'laplace': {'location': 1.0, 'scale': 2.0},
+        'logistic': {'location': 1.0, 'scale': 2.0},
+        'log-normal': {'logScale': 0.0, 'shape': 0.5},
+        'negative-binomial': {'numberOfSuccesses': 5, 'probability': 0.5},
+        'normal': {'mean': 3.0, 'variance': 4.0},
+        'pareto': {'scale': 2.0, 'shape': 3.0},
+        'poisson': {'rate': 4.0},
+        'uniform': {'minimum': 10.0, 'maximum': 20.0},
+        'weibull': {'scale': 2.0, 'shape': 1.5}}
+
+    def test_all_univariate_types(self):
+        self.assertEqual(
+            set(standard_library_samplers),
+            set(RandomDistribution.standard_types) -
+            set(['dirichlet', 'multinomial']))
+        for standard_type, properties in self.distributions.items():
+            samples = distribution(standard_type, **properties).sample(
+                1000, random_seed=1)
+            self.assertEqual(samples.shape, (1000,))
+            self.assertEqual(samples.dtype, numpy.float64)
+            self.assertTrue(numpy.isfinite(samples).all(),
+                            "Non-finite samples of {}".format(standard_type))
+
+    def test_moments(self):
+        samples = distribution('normal', mean=3.0, variance=4.0).sample(
+            100000, random_seed=1)
+        self.assertAlmostEqual(samples.mean(), 3.0, delta=0.05)
+        self.assertAlmostEqual(samples.std(), 2.0, delta=0.05)
+        samples = distribution('exponential', rate=2.0).sample(
+            100000, random_seed=1)
+        self.assertAlmostEqual(samples.mean(), 0.5, delta=0.01)
+        samples = distribution('pareto', scale=2.0, shape=3.0).sample(
+            100000, random_seed=1)
+        self.assertGreaterEqual(samples.min(), 2.0)
+        self.assertAlmostEqual(samples.mean(), 3.0, delta=0.05)
+
+    def test_support(self):
+        for standard_type, properties in self.distributions.items():
+            dist = distribution(standard_type, **properties)
+            lower, upper = dist.support()
+            samples = dist.sample(1000, random_seed=1)
+            self.assertTrue(((samples >= lower) & (samples <= upper)).all(),
+                            "Samples of {} outside support".format(
+                                standard_type))
+        self.assertEqual(
+            distribution('uniform', minimum=1.0, maximum=3.0).support(),
+            (1.0, 3.0))
+
+    def test_errors(self):
+        self.assertRaises(NineMLUsageError,
+                          distribution('normal', mean=0.0).sample, 10)
+        self.assertRaises(
+            NineMLUsageError,
+            distribution('dirichlet', alpha=1.0).sample, 10)
+
+    def test_value_sample(self):
+        value = RandomDistributionValue(
+            distribution('uniform', minimum=0.0, maximum=1.0))
+        rng1 = numpy.random.default_rng(5)
+        rng2 = numpy.random.default_rng(5)
+        self.assertTrue(numpy.array_equal(value.sample(10, rng=rng1),
+                                          rng2.uniform(0.0, 1.0, 10)))
+
+
+class TestRandomDistributionSampler(unittest.TestCase):
+
+    def setUp(self):
+        self.distribution = distribution('normal', mean=0.0, variance=1.0)
+
+    def test_reproducible(self):
+        sampler = RandomDistributionSampler(42, block_size=64)
+        samples = sampler.sample(self.distribution, 1000, key=('Pop', 'tau'))
+        self.assertEqual(samples.shape, (1000,))
+        self.assertTrue(numpy.array_equal(
+            samples, RandomDistributionSampler(42, block_size=64).sample(
+                self.distribution, 1000, key=('Pop', 'tau'))))
+        # Streams with different keys or seeds are independent
+        self.assertFalse(numpy.array_equal(
+            samples, sampler.sample(self.distribution, 1000,
+                                    key=('Pop', 'v_rest'))))
+        self.assertFalse(numpy.array_equal(
+            samples, RandomDistributionSampler(43, block_size=64).sample(
+                self.distribution, 1000, key=('Pop', 'tau'))))
+
+    def test_split(self):
+        sampler = RandomDistributionSampler(42, block_size=64)
+        samples = sampler.sample(self.distribution, 1000, key='Pop')
+        # Samples split between processes match the samples drawn in one
+        bounds = [0, 10, 64, 65, 300, 999, 1000]
+        self.assertTrue(numpy.array_equal(samples, numpy.concatenate([
+            sampler.sample(self.distribution, 1000, key='Pop', start=s,
+                           stop=e) for s, e in zip(bounds[:-1], bounds[1:])])))
+        self.assertEqual(
+            len(sampler.sample(self.distribution, 1000, start=5, stop=5)), 0)
+        self.assertRaises(NineMLUsageError, sampler.sample,
+                          self.distribution, 1000, start=10, stop=5)
+
+    def test_unseeded(self):
+        sampler = RandomDistributionSampler()
+        self.assertIsNotNone(sampler.seed)
+        self.assertTrue(numpy.array_equal(
+            sampler.sample(self.distribution, 10),
+            RandomDistributionSampler(sampler.seed).sample(
+                self.distribution, 10)))
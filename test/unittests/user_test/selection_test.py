@@ -0,0 +1,91 @@
+import unittest
+import numpy
+from nineml.abstraction import Dynamics, Regime, StateVariable, Parameter
+from nineml.user import (
+    Population, DynamicsProperties, Selection, Concatenate, SelectionIndex)
+from nineml.exceptions import NineMLUsageError, NineMLNameError
+from nineml import units as un
+
+
+class TestSelectionIndex(unittest.TestCase):
+
+    def setUp(self):
+        cell = DynamicsProperties(
+            name='CellProps',
+            definition=Dynamics(
+                name='Cell',
+                state_variables=[StateVariable('v', dimension=un.voltage)],
+                regimes=[Regime('dv/dt = -v / tau', name='R1')],
+                parameters=[Parameter('tau', dimension=un.time)]),
+            properties={'tau': 10.0 * un.ms})
+        self.a = Population('A', 5, cell)
+        self.b = Population('B', 3, cell)
+        self.c = Population('C', 4, cell)
+        self.selection = Selection(
+            'AB_C', Concatenate((Selection('AB', Concatenate((self.a,
+                                                               self.b))),
+                                 self.c)))
+        # Global indices of the cells as (population-name, local index) pairs
+        self.cells = ([('A', i) for i in range(5)] +
+                      [('B', i) for i in range(3)] +
+                      [('C', i) for i in range(4)])
+
+    def assertCells(self, index, cells):
+        pop_indices, local_indices = index.to_local(numpy.arange(len(index)))
+        names = [p.name for p in index.populations]
+        self.assertEqual(
+            [(names[p], l) for p, l in zip(pop_indices, local_indices)],
+            cells)
+
+    def test_translation(self):
+        index = self.selection.cell_index()
+        self.assertEqual(len(index), 12)
+        self.assertEqual(list(index.offsets), [0, 5, 8, 12])
+        self.assertCells(index, self.cells)
+        self.assertEqual(index[6], (self.b, 1))
+        self.assertEqual(index[-1], (self.c, 3))
+        self.assertEqual(list(index.to_global('C', [0, 3])), [8, 11])
+        self.assertEqual(list(index.to_global(self.b, [2])), [7])
+        self.assertRaises(IndexError, index.to_local, 12)
+        self.assertRaises(IndexError, index.to_global, 'B', [3])
+        self.assertRaises(NineMLNameError, index.to_global, 'D', [0])
+
+    def test_subsets(self):
+        index = self.selection.cell_index()
+        sliced = index[2:11:2]
+        self.assertTrue(sliced.is_lazy)
+        self.assertCells(sliced, self.cells[2:11:2])
+        # Slices of slices compose lazily
+        resliced = sliced[::-2]
+        self.assertTrue(resliced.is_lazy)
+        self.assertCells(resliced, self.cells[2:11:2][::-2])
+        selected = sliced[[4, 0, 2]]
+        self.assertFalse(selected.is_lazy)
+        self.assertCells(selected, [self.cells[10], self.cells[2],
+                                    self.cells[6]])
+        masked = index[numpy.arange(12) % 3 == 0]
+        self.assertCells(masked, self.cells[::3])
+        self.assertEqual(list(masked[1:].global_indices), [3, 6, 9])
+        self.assertEqual(list(selected.to_global('B', [1])), [2])
+        self.assertEqual(list(sliced.to_global('C', [2, 0])), [4, 3])
+        self.assertRaises(NineMLUsageError, sliced.to_global, 'A', [1])
+        self.assertRaises(NineMLUsageError, selected.to_global, 'A', [1])
+        self.assertRaises(NineMLUsageError, index.__getitem__,
+                          numpy.ones(3, dtype=bool))
+        self.assertRaises(IndexError, SelectionIndex, [self.a], [5])
+
+    def test_split(self):
+        index = self.selection.cell_index()
+        for subset in (index[1:11:3], index[::-3], index[[9, 0, 6, 3]]):
+            split = subset.split()
+            for name, (positions, local) in split.items():
+                pop_indices, expected = subset.to_local(
+                    numpy.asarray(positions))
+                self.assertEqual(list(local), list(expected))
+                names = [p.name for p in subset.populations]
+                self.assertTrue(all(names[p] == name for p in pop_indices))
+            self.assertEqual(sum(len(p) for p, _ in split.values()),
+                             len(subset))
+        split = index[1:11:3].split()
+        self.assertEqual(list(split), ['A', 'B', 'C'])
+        self.assertEqual(split['B'], (range(2, 3), range(2, 3, 3)))
@@ -0,0 +1,188 @@
+import unittest
+import io
+import os.path
+import sys
+import subprocess
+import multiprocessing
+import pickle
+from itertools import chain
+import numpy
+from nineml.abstraction import (
+    Dynamics, Regime, StateVariable, Parameter, AnalogSendPort,
+    AnalogReducePort, EventSendPort, EventReceivePort, OnCondition, OnEvent,
+    OutputEvent, StateAssignment)
+from nineml.abstraction.connectionrule import explicit_connection_rule
+from nineml.user import (
+    Population, DynamicsProperties, Projection, ConnectionRuleProperties,
+    Network, SharedNetwork)
+from nineml.user.shared import shared_memory, _ExportPickler
+from nineml.values import ArrayValue
+from nineml.exceptions import NineMLUsageError
+import nineml
+from nineml import units as un
+
+
+def build_network(size=50, fan_in=20):
+    cell = Dynamics(
+        name='Cell',
+        state_variables=[StateVariable('v', dimension=un.voltage)],
+        regimes=[Regime('dv/dt = (i * R - v) / tau', name='R1',
+                        transitions=[OnCondition(
+                            'v > theta',
+                            output_events=[OutputEvent('spike')])])],
+        parameters=[Parameter('tau', dimension=un.time),
+                    Parameter('theta', dimension=un.voltage),
+                    Parameter('R', dimension=un.resistance)],
+        analog_ports=[AnalogReducePort('i', dimension=un.current,
+                                       operator='+')],
+        event_ports=[EventSendPort('spike')])
+    synapse = Dynamics(
+        name='Synapse',
+        state_variables=[StateVariable('a', dimension=un.current)],
+        regimes=[Regime('da/dt = -a / tau', name='R1',
+                        transitions=[OnEvent('spike', state_assignments=[
+                            StateAssignment('a', 'a + w')])])],
+        parameters=[Parameter('tau', dimension=un.time),
+                    Parameter('w', dimension=un.current)],
+        analog_ports=[AnalogSendPort('a', dimension=un.current)],
+        event_ports=[EventReceivePort('spike')])
+    rng = numpy.random.RandomState(1)
+    population = Population('Pop', size, DynamicsProperties(
+        'CellProps', cell,
+        {'tau': ArrayValue(rng.uniform(5.0, 20.0, size)) * un.ms,
+         'theta': 10.0 * un.mV, 'R': 1.0 * un.Mohm},
+        initial_values={'v': ArrayValue(rng.uniform(0.0, 10.0, size)) *
+                        un.mV}))
+    num_conns = size * fan_in
+    projection = Projection(
+        'Proj', pre=population, post=population,
+        response=DynamicsProperties(
+            'SynapseProps', synapse,
+            {'tau': 1.0 * un.ms,
+             'w': ArrayValue(rng.uniform(0.0, 1.0, num_conns)) * un.nA},
+            initial_values={'a': 0.0 * un.nA}),
+        connection_rule_properties=ConnectionRuleProperties(
+            'Conn', explicit_connection_rule,
+            {'sourceIndices': ArrayValue(rng.randint(0, size, num_conns)),
+             'destinationIndices': ArrayValue(
+                 numpy.repeat(numpy.arange(size), fan_in))}),
+        delay=1.0 * un.ms,
+        port_connections=[('pre', 'spike', 'response', 'spike'),
+                          ('response', 'a', 'post', 'i')])
+    return Network('Net', populations=[population], projections=[projection])
+
+
+def array_values(component_arrays, connection_groups):
+    """
+    Returns the values of the ArrayValues of the flattened network keyed by
+    the names of the component array/connection group and property
+    """
+    values = {}
+    for comp_array in component_arrays:
+        props = comp_array.dynamics_properties
+        for prop in chain(props.properties, props.initial_values):
+            if prop.value.is_array():
+                values[(comp_array.name, prop.name)] = prop.value.values
+    for conn_group in connection_groups:
+        for prop in conn_group.connectivity.rule_properties.properties:
+            if prop.value.is_array():
+                values[(conn_group.name, prop.name)] = prop.value.values
+    return values
+
+
+# Attaches to an exported network from a separately launched interpreter, which
+# has its own resource tracker, and prints the sums of its arrays
+ATTACH_SCRIPT = """
+import sys, pickle
+descriptor = pickle.loads(sys.stdin.buffer.read())
+flattened = descriptor.attach()
+print(sum(float(p.value.values.sum()) for c in flattened[0]
+          for p in c.dynamics_properties.properties if p.value.is_array()))
+"""
+
+
+def attached_sums(descriptor):
+    flattened = descriptor.attach()
+    return dict((k, (float(v.sum()), v.flags.owndata, v.flags.writeable))
+                for k, v in array_values(*flattened).items())
+
+
+@unittest.skipIf(shared_memory is None,
+                 "multiprocessing.shared_memory is not available")
+class TestSharedNetwork(unittest.TestCase):
+
+    def setUp(self):
+        self.network = build_network()
+
+    def test_attach(self):
+        flattened = self.network.flatten()
+        expected = array_values(*flattened)
+        with SharedNetwork(*flattened, min_bytes=1000) as shared:
+            # Only the per-connection arrays are large enough to be placed in
+            # shared memory
+            self.assertEqual(shared.num_arrays, 5)
+            self.assertGreaterEqual(shared.nbytes, 5 * 1000 * 8)
+            descriptor = pickle.loads(pickle.dumps(shared.descriptor))
+            # Pickle the whole graph without exporting any arrays to compare
+            # against, substituting the documents the objects may have been
+            # bound to (e.g. by other tests) as the export does
+            baseline = io.BytesIO()
+            _ExportPickler(baseline, min_bytes=float('inf')).dump(flattened)
+            self.assertLess(descriptor.graph_size,
+                            len(baseline.getvalue()) / 4)
+            component_arrays, connection_groups = descriptor.attach()
+            self.assertEqual(
+                sorted(c.name for c in component_arrays),
+                sorted(c.name for c in flattened[0]))
+            attached = array_values(component_arrays, connection_groups)
+            self.assertEqual(sorted(attached), sorted(expected))
+            for key, values in attached.items():
+                self.assertTrue(numpy.array_equal(values, expected[key]))
+                self.assertFalse(values.flags.writeable)
+            self.assertEqual(
+                component_arrays[0].dynamics_properties.property(
+                    'tau').units, un.ms)
+            # The objects must be released before the block can be detached
+            self.assertRaises(NineMLUsageError, descriptor.detach)
+            del component_arrays, connection_groups, attached, values
+            descriptor.detach()
+        # The block is released when the export exits its context
+        self.assertRaises(NineMLUsageError, descriptor.attach)
+
+    def test_workers(self):
+        expected = dict((k, float(v.sum())) for k, v in array_values(
+            *self.network.flatten()).items())
+        with self.network.export_shared() as shared:
+            pool = multiprocessing.Pool(2)
+            try:
+                results = pool.map(attached_sums, [shared.descriptor] * 4)
+            finally:
+                pool.close()
+                pool.join()
+        for result in results:
+            self.assertEqual(sorted(result), sorted(expected))
+            for key, (total, owndata, writeable) in result.items():
+                self.assertAlmostEqual(total, expected[key])
+                # The arrays are views of the shared memory block
+                self.assertFalse(owndata)
+                self.assertFalse(writeable)
+
+    def test_independent_processes(self):
+        expected = sum(
+            float(v.sum()) for (_, name), v in array_values(
+                *self.network.flatten()).items()
+            if name in ('tau', 'w'))
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(
+            [os.path.dirname(os.path.dirname(nineml.__file__))] +
+            [p for p in [env.get('PYTHONPATH')] if p])
+        with self.network.export_shared() as shared:
+            pickled = pickle.dumps(shared.descriptor)
+            # The block isn't unlinked when the first process exits
+            for _ in range(2):
+                output = subprocess.check_output(
+                    [sys.executable, '-c', ATTACH_SCRIPT],
+                    input=pickled, env=env)
+                self.assertAlmostEqual(float(output), expected)
+        # Unlinking a block that has already been released is ignored
+        shared.unlink()
@@ -0,0 +1,16 @@
+import unittest
+from nineml.abstraction import Alias
+from nineml.utils.comprehensive_example import dynA, dynB
+
+
+class TestHasher(unittest.TestCase):
+
+    def test_hash_expressions(self):
+        self.assertEqual(hash(Alias('A', 'B * (C + 1)')),
+                         hash(Alias('A', 'B * C + B')))
+        self.assertNotEqual(hash(Alias('A', 'B * C')),
+                            hash(Alias('A', 'B + C')))
+
+    def test_hash_component_classes(self):
+        self.assertEqual(hash(dynA), hash(dynA.clone()))
+        self.assertNotEqual(hash(dynA), hash(dynB))